@@ -16,14 +16,26 @@ from app.config import settings
 from app.database import Base
 
 # Import all models to ensure they're registered with Base
-from app.models import Task, User  # noqa: F401
+from app.models import (  # noqa: F401
+    IdempotencyKey,
+    Task,
+    TaskArchive,
+    TaskChange,
+    User,
+    UserDirectory,
+)
+from app.utils.partitioning import is_partition_table
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
-# Set database URL from environment
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# Set database URL from environment; "alembic -x shard=N" migrates a shard
+shard = context.get_x_argument(as_dictionary=True).get("shard")
+database_url = (
+    settings.SHARD_DATABASE_URLS[int(shard)] if shard else settings.DATABASE_URL
+)
+config.set_main_option("sqlalchemy.url", database_url)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -34,6 +46,12 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave partitions of partitioned tables out of autogenerate."""
+    return not (type_ == "table" and reflected and is_partition_table(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -56,6 +74,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -66,7 +85,11 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection: Connection) -> None:
     """Run migrations with a connection."""
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -100,4 +123,3 @@ if context.is_offline_mode():
     run_migrations_offline()
 else:
     run_migrations_online()
-
@@ -0,0 +1,175 @@
+"""
+Production server launcher: ``python -m app``.
+
+Runs uvicorn with uvloop and httptools in pre-forked workers. The
+application is imported once in the supervisor and its heap frozen with
+``gc.freeze()`` before forking, so workers share those pages copy-on-write
+instead of each importing (and the collector touching) its own copy.
+
+On SIGTERM or SIGINT every worker stops accepting connections, finishes
+its in-flight requests (up to ``SHUTDOWN_TIMEOUT_SECONDS``), then runs the
+lifespan shutdown, which drains queued writes and disposes the engines.
+Workers that die are replaced.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+from app.config import settings
+from app.utils.log import configure_logging, stop_logging
+
+logger = logging.getLogger("uvicorn.error")
+
+# Time on top of the drain timeout before workers are killed
+KILL_GRACE_SECONDS = 5.0
+# Minimum time between restarts of crashed workers
+RESTART_DELAY_SECONDS = 1.0
+
+
+def worker_count(cpus: int | None = None) -> int:
+    """
+    Number of workers to run when none is configured.
+
+    One worker per CPU, as each runs its own event loop, but no more than
+    the database connection budget allows: every worker may open
+    ``DB_POOL_SIZE + DB_MAX_OVERFLOW`` connections to each database.
+
+    Args:
+        cpus: CPU count (defaults to the machine's)
+
+    Returns:
+        int: Number of workers, at least one
+    """
+    cpus = cpus or os.cpu_count() or 1
+    per_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    return max(1, min(cpus, settings.DB_MAX_CONNECTIONS // per_worker))
+
+
+def _spawn(config, sock: socket.socket) -> int:
+    """Fork a worker serving the shared socket; returns its PID."""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    # The parent's log writer thread does not exist in the child
+    configure_logging()
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker %d failed", os.getpid())
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def supervise(config, sock: socket.socket, workers: int) -> None:
+    """
+    Run workers until a shutdown signal, then wait for them to drain.
+
+    Args:
+        config: uvicorn configuration of the workers
+        sock: Bound listening socket shared by the workers
+        workers: Number of workers
+    """
+    children = {_spawn(config, sock) for _ in range(workers)}
+    kill_at: float | None = None
+
+    def stop(signum: int, frame) -> None:
+        nonlocal kill_at
+        if kill_at is not None:
+            return
+        logger.info("Shutting down: draining %d workers", len(children))
+        kill_at = (
+            time.monotonic() + settings.SHUTDOWN_TIMEOUT_SECONDS + KILL_GRACE_SECONDS
+        )
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if kill_at is not None and time.monotonic() > kill_at:
+                for child in children:
+                    os.kill(child, signal.SIGKILL)
+                kill_at = float("inf")
+            time.sleep(0.1)
+            continue
+        children.discard(pid)
+        if kill_at is None:
+            logger.warning(
+                "Worker %d exited with status %d, restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            time.sleep(RESTART_DELAY_SECONDS)
+            children.add(_spawn(config, sock))
+    sock.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Parse arguments and run the server."""
+    parser = argparse.ArgumentParser(prog="python -m app", description=__doc__)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="number of worker processes (default: sized from CPUs and DB budget)",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    # Nothing is collected while the app is imported, so the preloaded heap
+    # is frozen untouched and stays shared with the workers
+    gc.disable()
+
+    import uvicorn
+
+    from app.main import create_app
+
+    config = uvicorn.Config(
+        create_app(),
+        host=args.host,
+        port=args.port,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        proxy_headers=True,
+        timeout_graceful_shutdown=int(settings.SHUTDOWN_TIMEOUT_SECONDS),
+        # Logging is set up by configure_logging(), and the access log is
+        # written by AccessLogMiddleware
+        log_config=None,
+        log_level=settings.LOG_LEVEL.lower(),
+        access_log=False,
+    )
+    workers = args.workers or worker_count()
+
+    if workers == 1:
+        gc.enable()
+        uvicorn.Server(config).run()
+        return
+
+    sock = config.bind_socket()
+    gc.freeze()
+    logger.info("Starting %d workers on %s:%d", workers, args.host, args.port)
+    supervise(config, sock, workers)
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Admin API endpoints for diagnosing production instances.
+
+Every endpoint requires a superuser. Results describe the worker process
+that served the request.
+"""
+
+import asyncio
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies import get_current_superuser
+from app.schemas.admin import (
+    AllocationDiff,
+    LoopBlock,
+    MemorySnapshotSummary,
+    ObjectCounts,
+    ProfileSummary,
+    SlowQuery,
+    TraceSpan,
+    TraceSummary,
+    TracingStatus,
+)
+from app.services import slow_queries
+from app.utils import loop_monitor, memory, tracing
+from app.utils.exceptions import ConflictException, NotFoundException
+from app.utils.profiling import profiles
+
+router = APIRouter(dependencies=[Depends(get_current_superuser)])
+
+
+@router.get(
+    "/slow-queries",
+    response_model=list[SlowQuery],
+    summary="Slow queries",
+    description="Recent slow SQL statements with their captured plans.",
+)
+async def list_slow_queries(
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """
+    Get the most recent slow queries whose plan was captured, newest first.
+
+    - **limit**: Maximum number of queries (default: 50)
+
+    Parameters are redacted. Requires a superuser.
+    """
+    return list(reversed(slow_queries.captured_plans))[:limit]
+
+
+@router.delete(
+    "/slow-queries",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Clear slow queries",
+    description="Forget the captured slow queries.",
+)
+async def clear_slow_queries():
+    """
+    Clear the captured slow queries of this worker.
+
+    Requires a superuser.
+    """
+    slow_queries.captured_plans.clear()
+
+
+@router.get(
+    "/profiles",
+    response_model=list[ProfileSummary],
+    summary="Request profiles",
+    description="Profiles of requests sent with X-Profile: 1, newest first.",
+)
+async def list_profiles():
+    """
+    List the stored request profiles of this worker.
+
+    Send a request with the header **X-Profile: 1** as a superuser to
+    profile it; its response carries the profile ID in **X-Profile-Id**.
+
+    Requires a superuser.
+    """
+    return profiles.list()
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    summary="Get profile",
+    description="A request profile as a text report or a .prof file.",
+)
+async def get_profile(
+    profile_id: str,
+    format: Annotated[Literal["text", "pstats"], Query()] = "text",
+    sort: Annotated[Literal["cumulative", "tottime", "calls"], Query()] = "cumulative",
+    limit: Annotated[int, Query(ge=1, le=1000)] = 50,
+):
+    """
+    Get a stored request profile.
+
+    - **format**: `text` for the top functions, or `pstats` for the
+      profile file (open it with `python -m pstats` or snakeviz)
+    - **sort**: Sort order of the text report (default: cumulative)
+    - **limit**: Functions in the text report (default: 50)
+
+    Requires a superuser.
+    """
+    report = profiles.get(profile_id)
+    if report is None:
+        raise NotFoundException("Profile not found")
+    if format == "pstats":
+        return Response(
+            report.pstats_file(),
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="{profile_id}.prof"'
+            },
+        )
+    return PlainTextResponse(report.text(sort, limit))
+
+
+@router.get(
+    "/memory",
+    response_model=TracingStatus,
+    summary="Allocation tracing status",
+    description="Whether tracemalloc runs, and the memory it traces.",
+)
+async def get_tracing_status():
+    """
+    Get the allocation tracing status of this worker.
+
+    Requires a superuser.
+    """
+    return memory.tracing_status()
+
+
+@router.post(
+    "/memory/start",
+    response_model=TracingStatus,
+    summary="Start allocation tracing",
+    description="Start tracemalloc; allocations are slower while it runs.",
+)
+async def start_tracing(
+    frames: Annotated[int, Query(ge=1, le=50)] = 1,
+):
+    """
+    Start tracing memory allocations on this worker.
+
+    - **frames**: Stack frames kept per allocation (default: 1). More
+      frames show the callers too, at a higher cost.
+
+    Requires a superuser. Fails with 409 if tracing already runs.
+    """
+    memory.start_tracing(frames)
+    return memory.tracing_status()
+
+
+@router.post(
+    "/memory/stop",
+    response_model=TracingStatus,
+    summary="Stop allocation tracing",
+    description="Stop tracemalloc and drop the snapshots.",
+)
+async def stop_tracing():
+    """
+    Stop tracing memory allocations on this worker.
+
+    Requires a superuser.
+    """
+    memory.stop_tracing()
+    return memory.tracing_status()
+
+
+@router.get(
+    "/memory/snapshots",
+    response_model=list[MemorySnapshotSummary],
+    summary="Memory snapshots",
+    description="Stored tracemalloc snapshots, oldest first.",
+)
+async def list_memory_snapshots():
+    """
+    List the stored snapshots of this worker.
+
+    Requires a superuser.
+    """
+    return memory.snapshots.list()
+
+
+@router.post(
+    "/memory/snapshots",
+    response_model=MemorySnapshotSummary,
+    status_code=status.HTTP_201_CREATED,
+    summary="Take memory snapshot",
+    description="Snapshot the traced allocations.",
+)
+async def take_memory_snapshot():
+    """
+    Take a snapshot of the traced allocations.
+
+    Only the latest few snapshots are kept. Requires a superuser.
+    Fails with 409 if tracing is not running.
+    """
+    # Copying and filtering every trace is slow on large heaps
+    return await asyncio.to_thread(memory.snapshots.take)
+
+
+@router.get(
+    "/memory/diff",
+    response_model=list[AllocationDiff],
+    summary="Compare memory snapshots",
+    description="Top allocation changes between two snapshots.",
+)
+async def diff_memory_snapshots(
+    base: Annotated[int, Query()],
+    target: Annotated[int, Query()],
+    group_by: Annotated[Literal["lineno", "filename"], Query()] = "lineno",
+    limit: Annotated[int, Query(ge=1, le=500)] = 25,
+):
+    """
+    Compare two snapshots, largest growth first.
+
+    - **base**: ID of the earlier snapshot
+    - **target**: ID of the later snapshot
+    - **group_by**: `lineno` (file and line, default) or `filename`
+    - **limit**: Number of locations (default: 25)
+
+    Requires a superuser.
+    """
+    base_snapshot = memory.snapshots.get(base)
+    target_snapshot = memory.snapshots.get(target)
+    # Comparing is pure Python over every trace; keep the loop responsive
+    return await asyncio.to_thread(
+        memory.compare, base_snapshot, target_snapshot, group_by, limit
+    )
+
+
+@router.get(
+    "/memory/objects",
+    response_model=ObjectCounts,
+    summary="Object counts",
+    description="Garbage collector state and live ORM instances.",
+)
+async def get_object_counts():
+    """
+    Get garbage collector generation counts and live ORM instances per model.
+
+    Walks every object the collector tracks, so it is slow on large heaps.
+    Requires a superuser.
+    """
+    return await asyncio.to_thread(memory.object_counts)
+
+
+@router.get(
+    "/loop-blocks",
+    response_model=list[LoopBlock],
+    summary="Event loop blocks",
+    description="Recent times synchronous code blocked the event loop.",
+)
+async def list_loop_blocks():
+    """
+    Get the recent event loop blocks of this worker, newest first.
+
+    Each block has its duration, the route being served and the stack of
+    the blocking code, captured while it ran. Requires a superuser.
+    """
+    if loop_monitor.monitor is None:
+        return []
+    return list(reversed(loop_monitor.monitor.blocks))
+
+
+def _kept_traces() -> tracing.InMemorySpanExporter:
+    """The in-memory exporter, which the trace endpoints read."""
+    exporter = tracing.tracer.exporter
+    if not isinstance(exporter, tracing.InMemorySpanExporter):
+        raise ConflictException("Traces are not kept in memory (TRACING_EXPORTER)")
+    return exporter
+
+
+@router.get(
+    "/traces",
+    response_model=list[TraceSummary],
+    summary="Traces",
+    description="Recent sampled request traces, newest first.",
+)
+async def list_traces(
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+):
+    """
+    Get the most recent sampled traces of this worker.
+
+    - **limit**: Maximum number of traces (default: 50)
+
+    Each trace is described by its request's root span. Requires a superuser
+    and the in-memory exporter (**TRACING_EXPORTER=memory**).
+    """
+    return [
+        {
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "start_time": root.start_time,
+            "duration_ms": root.duration_ms,
+            "spans": len(spans),
+        }
+        for spans in _kept_traces().list()[:limit]
+        for root in (spans[-1],)
+    ]
+
+
+@router.get(
+    "/traces/{trace_id}",
+    response_model=list[TraceSpan],
+    summary="Trace spans",
+    description="The spans of a sampled trace, in the order they started.",
+)
+async def get_trace(trace_id: str):
+    """
+    Get the spans of a trace kept by this worker.
+
+    Spans link to their parent through **parent_id**. Time in a span not
+    covered by its children was spent in its own code, e.g. response
+    serialization in the request's root span. Requires a superuser.
+    """
+    return sorted(_kept_traces().get(trace_id), key=lambda span: span.start_time)
@@ -7,8 +7,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.dependencies import get_current_active_user
+from app.database import get_global_db
+from app.dependencies import get_current_active_user, limit_auth_requests
 from app.models.user import User
 from app.schemas.token import Token
 from app.schemas.user import User as UserSchema
@@ -22,12 +22,13 @@ router = APIRouter()
     "/register",
     response_model=UserSchema,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_auth_requests)],
     summary="Register new user",
     description="Create a new user account with email, username, and password.",
 )
 async def register(
     user_data: UserCreate,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_global_db)],
 ):
     """
     Register a new user.
@@ -44,12 +45,13 @@ async def register(
 @router.post(
     "/login",
     response_model=Token,
+    dependencies=[Depends(limit_auth_requests)],
     summary="Login",
     description="Authenticate user and receive JWT access token.",
 )
 async def login(
     credentials: UserLogin,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_global_db)],
 ):
     """
     Login with username and password.
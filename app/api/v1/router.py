@@ -4,10 +4,11 @@ API v1 router aggregation.
 
 from fastapi import APIRouter
 
-from app.api.v1 import auth, tasks
+from app.api.v1 import admin, auth, tasks
 
 api_router = APIRouter()
 
 # Include sub-routers
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
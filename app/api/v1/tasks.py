@@ -4,14 +4,20 @@ Task management API endpoints.
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_active_user
 from app.models.task import TaskPriority, TaskStatus
 from app.models.user import User
-from app.schemas.task import Task, TaskCreate, TaskList, TaskUpdate
+from app.schemas.sync import TaskChanges
+from app.schemas.task import Task, TaskCreate, TaskLease, TaskList, TaskUpdate
+from app.services import read_coalescing
+from app.services.events import stream_task_events
+from app.services.sync import SyncService
 from app.services.task import TaskService
 
 router = APIRouter()
@@ -43,9 +49,41 @@ async def create_task(
     return await TaskService.create_task(db, task_data, current_user)
 
 
+@router.post(
+    "/claim",
+    response_model=Task,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "Queue is empty"}},
+    summary="Claim next task",
+    description="Lease the highest-priority, oldest queued task to a worker.",
+)
+async def claim_task(
+    lease: TaskLease,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    """
+    Claim the next task from the work queue.
+
+    - **worker_id**: Identifier of the claiming worker
+    - **lease_seconds**: Optional lease duration
+
+    The task moves to 'in_progress' and is leased to the worker until the
+    lease expires. Returns 204 when there is nothing to claim.
+
+    Requires authentication.
+    """
+    task = await TaskService.claim_task(
+        db, current_user, lease.worker_id, lease.lease_seconds
+    )
+    if task is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return task
+
+
 @router.get(
     "",
-    response_model=TaskList,
+    response_model=None,
+    responses={200: {"model": TaskList}},
     summary="List tasks",
     description="Get paginated list of tasks with optional filters.",
 )
@@ -56,6 +94,8 @@ async def list_tasks(
     page_size: Annotated[int, Query(ge=1, le=100)] = 20,
     status: Annotated[TaskStatus | None, Query()] = None,
     priority: Annotated[TaskPriority | None, Query()] = None,
+    fields: Annotated[str | None, Query()] = None,
+    include_archived: Annotated[bool, Query()] = False,
 ):
     """
     Get list of tasks for the current user.
@@ -64,15 +104,88 @@ async def list_tasks(
     - **page_size**: Items per page (default: 20, max: 100)
     - **status**: Filter by status (optional)
     - **priority**: Filter by priority (optional)
+    - **fields**: Comma-separated task fields to return (optional).
+      Defaults to every field except `description`; `id` is always included.
+    - **include_archived**: Also list archived tasks (default: false)
 
     Requires authentication.
     """
     skip = (page - 1) * page_size
     status_value = status.value if status else None
     priority_value = priority.value if priority else None
+    field_names = (
+        [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    )
 
-    return await TaskService.get_tasks(
-        db, current_user, skip, page_size, status_value, priority_value
+    content = await read_coalescing.get_tasks_json(
+        db,
+        current_user,
+        skip=skip,
+        limit=page_size,
+        status=status_value,
+        priority=priority_value,
+        fields=field_names,
+        include_archived=include_archived,
+    )
+    return Response(content, media_type="application/json")
+
+
+@router.get(
+    "/changes",
+    response_model=TaskChanges,
+    summary="Delta sync",
+    description="Get tasks created, updated or deleted since a sync token.",
+)
+async def list_task_changes(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    since: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.SYNC_MAX_CHANGES)] = 500,
+):
+    """
+    Get changes to the current user's tasks since a sync token.
+
+    - **since**: `next_token` from the previous response (omit on first sync)
+    - **limit**: Maximum number of changes per response (default: 500)
+
+    Returns changed tasks, IDs of deleted tasks and a `next_token`. Keep
+    calling while `has_more` is true. When `reset` is true the token was
+    missing or too old: download the full task list, then sync from
+    `next_token`.
+
+    Requires authentication.
+    """
+    return await SyncService.get_changes(db, current_user, since, limit)
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    summary="Task change feed",
+    description="Stream task changes as Server-Sent Events.",
+)
+async def task_events(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    last_event_id: Annotated[int | None, Header(alias="Last-Event-ID")] = None,
+):
+    """
+    Stream changes to the current user's tasks.
+
+    Each event carries the task ID and, when it fits, the task itself.
+    Reconnecting clients send **Last-Event-ID** to resume; if the events
+    in between are no longer available a `reset` event is sent and the
+    client should refetch its tasks.
+
+    Requires authentication.
+    """
+    # The stream can stay open for hours; do not pin a pool connection to it.
+    await db.close()
+
+    return StreamingResponse(
+        stream_task_events(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -86,15 +199,20 @@ async def get_task(
     task_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_active_user)],
+    include_archived: Annotated[bool, Query()] = False,
 ):
     """
     Get task by ID.
 
     - **task_id**: Task ID
+    - **include_archived**: Also look in the archive (default: false)
 
     Requires authentication. Users can only access their own tasks.
     """
-    return await TaskService.get_task(db, task_id, current_user)
+    content = await read_coalescing.get_task_json(
+        db, task_id, current_user, include_archived=include_archived
+    )
+    return Response(content, media_type="application/json")
 
 
 @router.put(
@@ -167,3 +285,53 @@ async def complete_task(
     Requires authentication. Users can only complete their own tasks.
     """
     return await TaskService.complete_task(db, task_id, current_user)
+
+
+@router.post(
+    "/{task_id}/lease/heartbeat",
+    response_model=Task,
+    summary="Renew lease",
+    description="Extend the lease on a claimed task.",
+)
+async def renew_task_lease(
+    task_id: int,
+    lease: TaskLease,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    """
+    Renew the lease on a claimed task.
+
+    - **task_id**: Task ID
+    - **worker_id**: Worker holding the lease
+    - **lease_seconds**: Optional new lease duration
+
+    Requires authentication. Fails with 409 if the worker does not hold the lease.
+    """
+    return await TaskService.renew_lease(
+        db, task_id, current_user, lease.worker_id, lease.lease_seconds
+    )
+
+
+@router.post(
+    "/{task_id}/lease/release",
+    response_model=Task,
+    summary="Release lease",
+    description="Give up a lease and return the task to the queue.",
+)
+async def release_task_lease(
+    task_id: int,
+    lease: TaskLease,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user)],
+):
+    """
+    Release the lease on a claimed task.
+
+    - **task_id**: Task ID
+    - **worker_id**: Worker holding the lease
+
+    The task goes back to 'todo'. Requires authentication.
+    Fails with 409 if the worker does not hold the lease.
+    """
+    return await TaskService.release_lease(db, task_id, current_user, lease.worker_id)
@@ -23,6 +23,21 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     DATABASE_URL_SYNC: str  # For Alembic migrations
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Connections all workers together may open to one database
+    DB_MAX_CONNECTIONS: int = 100
+    # Compiled SQL kept per engine, and prepared statements kept per
+    # asyncpg connection; both are keyed by statement shape, not values
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+    # statement_timeout set on every PostgreSQL connection (0 keeps the
+    # server's); request deadlines only set their own when they are tighter
+    DB_STATEMENT_TIMEOUT_SECONDS: float = 0
+
+    # Sharding: users and their tasks are spread over these databases, while
+    # DATABASE_URL keeps the global user directory. Empty disables sharding.
+    SHARD_DATABASE_URLS: List[str] = []
 
     # Security
     SECRET_KEY: str
@@ -36,6 +51,141 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
 
+    # Work queue
+    TASK_LEASE_SECONDS: int = 300
+    TASK_LEASE_MAX_SECONDS: int = 3600
+    LEASE_REAPER_INTERVAL_SECONDS: float = 30.0
+
+    # Task change feed (Server-Sent Events)
+    TASK_EVENTS_CHANNEL: str = "task_events"
+    SSE_SUBSCRIBER_QUEUE_SIZE: int = 256
+    SSE_REPLAY_BUFFER_SIZE: int = 1024
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    SSE_RETRY_MILLISECONDS: int = 3000
+    SSE_LISTEN_RECONNECT_SECONDS: float = 1.0
+
+    # Delta sync
+    SYNC_MAX_CHANGES: int = 1000
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    SYNC_COMPACTION_INTERVAL_SECONDS: float = 3600.0
+    SYNC_COMPACTION_BATCH_SIZE: int = 1000
+
+    # Archival of finished tasks
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Group commit of task writes
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_SECONDS: float = 0.002
+    GROUP_COMMIT_MAX_BATCH: int = 64
+
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long a request may hold its key before a retry may take it over;
+    # longer than any request deadline
+    IDEMPOTENCY_CLAIM_SECONDS: float = 120.0
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_POLL_SECONDS: float = 0.1
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 1000
+
+    # Coalescing of identical concurrent reads
+    READ_COALESCING_ENABLED: bool = True
+
+    # Admission control: the concurrency limit adapts (AIMD) between the
+    # bounds below; each route class may use its share of the limit.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 100
+    ADMISSION_MIN_LIMIT: int = 10
+    ADMISSION_MAX_LIMIT: int = 1000
+    ADMISSION_BACKOFF_RATIO: float = 0.9
+    ADMISSION_LATENCY_TARGET_SECONDS: float = 1.0
+    ADMISSION_POOL_WAIT_TARGET_SECONDS: float = 0.05
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_CLASS_SHARES: dict[str, float] = {
+        "read": 1.0,
+        "write": 0.8,
+        "expensive": 0.5,
+    }
+    ADMISSION_EXPENSIVE_PAGE_SIZE: int = 50
+
+    # Rate limiting (token buckets): per user on the API, per IP on auth
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_API_PER_MINUTE: int = 600
+    RATE_LIMIT_API_BURST: int = 100
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 10
+    RATE_LIMIT_AUTH_BURST: int = 10
+    # Profiled requests (X-Profile) per superuser
+    RATE_LIMIT_PROFILE_PER_MINUTE: int = 2
+    RATE_LIMIT_PROFILE_BURST: int = 2
+
+    # Request deadlines per route class (see admission control); clients may
+    # ask for a shorter timeout with X-Request-Timeout
+    REQUEST_DEADLINES_ENABLED: bool = True
+    REQUEST_TIMEOUT_SECONDS: dict[str, float] = {
+        "read": 5.0,
+        "write": 10.0,
+        "expensive": 30.0,
+    }
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 60.0
+
+    # Partitioning
+    TASKS_HASH_PARTITIONS: int = 16
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_LOCK_TIMEOUT: str = "5s"
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 86400.0
+
+    # Startup warm-up; /ready reports ready once it is done
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 5
+    WARMUP_TIMEOUT_SECONDS: float = 30.0
+
+    # Server launcher (python -m app); 0 workers sizes the worker count
+    # from the CPU count and DB_MAX_CONNECTIONS
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SHUTDOWN_TIMEOUT_SECONDS: float = 30.0
+
+    # Slow-query log: statements slower than the threshold are logged, and
+    # the plans of a sample of the SELECTs captured for the admin API
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_SECONDS: float = 0.5
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS: float = 10.0
+    SLOW_QUERY_MAX_PENDING_CAPTURES: int = 2
+    SLOW_QUERY_BUFFER_SIZE: int = 50
+
+    # On-demand profiling: superusers send X-Profile: 1; the latest profiles
+    # of each worker are kept for the admin API
+    PROFILING_ENABLED: bool = True
+    PROFILE_STORE_SIZE: int = 20
+    # tracemalloc snapshots kept per worker by the admin API
+    MEMORY_SNAPSHOT_LIMIT: int = 5
+
+    # Event loop watchdog: a heartbeat measures loop lag, and lag above the
+    # threshold is logged with the blocking stack; the watchdog thread wakes
+    # twice per threshold. LOOP_BLOCK_FAIL_MS > 0 is a debug mode for the
+    # test suite: tests fail when a request blocks the loop for longer.
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1
+    LOOP_BLOCK_FAIL_MS: float = 0
+
+    # Request tracing: a sampled fraction of requests (and those whose
+    # incoming traceparent is sampled, up to a rate per worker) get spans
+    # for auth, services and SQL. The exporter is "memory" (kept for the
+    # admin API), "file" (JSON lines) or the "module:Class" path of a
+    # SpanExporter
+    TRACING_ENABLED: bool = True
+    TRACING_SAMPLE_RATE: float = 0.01
+    TRACING_PARENT_SAMPLED_PER_SECOND: float = 10.0
+    TRACING_EXPORTER: str = "memory"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_BUFFER_SIZE: int = 100
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -49,8 +199,14 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
-    # Logging
+    # Logging: JSON lines on stdout. Successful requests are all logged up
+    # to ACCESS_LOG_SAMPLING_RPS; above it only ACCESS_LOG_SAMPLE_RATE of them
+    # are. Errors and requests slower than ACCESS_LOG_SLOW_SECONDS always are.
     LOG_LEVEL: str = "INFO"
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLING_RPS: float = 50.0
+    ACCESS_LOG_SAMPLE_RATE: float = 0.1
+    ACCESS_LOG_SLOW_SECONDS: float = 1.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,52 +1,488 @@
 """
 Database configuration and session management.
+
+``engine`` is the global database. When ``SHARD_DATABASE_URLS`` is set,
+users and everything they own live on the shard databases instead, and the
+global database only keeps the user directory used to find a user's shard.
+
+Engines and session factories are created on first use, so importing this
+module (as Alembic, CLI tools and tests do) loads no database driver.
 """
 
-from typing import AsyncGenerator
+import sys
+import time
+import zlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.engine.default import CacheStats
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session, SessionTransaction
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
+from starlette.requests import Request
 
 from app.config import settings
+from app.utils.deadline import Deadline, current_deadline
+from app.utils.metrics import Counter, Gauge
+from app.utils.security import request_claims
+
+# Pool checkout waits of the current request, see record_pool_waits()
+_pool_waits: ContextVar[list[float] | None] = ContextVar("pool_waits", default=None)
+
+
+def record_pool_waits() -> list[float]:
+    """
+    Collect the connection pool waits of the current context.
+
+    Returns:
+        list[float]: Seconds spent waiting for each checkout made from now
+        on in this context (e.g. the current request)
+    """
+    waits: list[float] = []
+    _pool_waits.set(waits)
+    return waits
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+
+# Durations of the statements of the current request, see record_statement_times()
+_statement_times: ContextVar[list[float] | None] = ContextVar(
+    "statement_times", default=None
 )
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+
+def record_statement_times() -> list[float]:
+    """
+    Collect the durations of the SQL statements run in the current context.
+
+    Returns:
+        list[float]: Seconds each statement executed from now on in this
+        context (e.g. the current request) took
+    """
+    times: list[float] = []
+    _statement_times.set(times)
+    return times
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waits = _pool_waits.get()
+            if waits is not None:
+                waits.append(time.perf_counter() - started)
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine, with a connection pool sized for servers.
+
+    Hot queries are built once with bound parameters, so they hit the
+    engine's compiled cache; on PostgreSQL asyncpg also keeps them prepared
+    on each connection and skips parsing and planning on reuse.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(
+            url, echo=settings.DEBUG, query_cache_size=settings.DB_QUERY_CACHE_SIZE
+        )
+    connect_args: dict = {
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
+    if settings.DB_STATEMENT_TIMEOUT_SECONDS > 0:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(int(settings.DB_STATEMENT_TIMEOUT_SECONDS * 1000))
+        }
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args=connect_args,
+        poolclass=MonitoredQueuePool,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+
+
+def _sessionmaker(
+    bind: AsyncEngine, read_only: bool = False
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Create a session factory for an engine.
+
+    Sessions check out a connection only when they first run a query.
+    Read-only sessions run in ``READ ONLY`` transactions on PostgreSQL,
+    which lets the planner skip write bookkeeping and allows routing to a
+    hot standby. They are also ``DEFERRABLE``, which only takes effect at
+    ``SERIALIZABLE`` isolation: long reads then wait for a safe snapshot
+    instead of risking serialization failures. Neither adds a round trip,
+    both are sent with ``BEGIN``.
+    """
+    if read_only and bind.dialect.name == "postgresql":
+        bind = bind.execution_options(
+            postgresql_readonly=True, postgresql_deferrable=True
+        )
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+        info={"read_only": read_only},
+    )
+
+
+# Global engine and session factories, created by __getattr__ on first use
+GLOBAL_DATABASE_NAMES = ("engine", "AsyncSessionLocal", "ReadOnlySessionLocal")
+engine: AsyncEngine
+AsyncSessionLocal: async_sessionmaker[AsyncSession]
+ReadOnlySessionLocal: async_sessionmaker[AsyncSession]
+
+# This module, for reading the lazy attributes above from its functions
+_module = sys.modules[__name__]
+
+
+def __getattr__(name: str):
+    """
+    Create the global engine and its session factories on first access.
+
+    Attributes already set (e.g. replaced by tests) are kept.
+    """
+    if name not in GLOBAL_DATABASE_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    namespace = globals()
+    if "engine" not in namespace:
+        namespace["engine"] = _create_engine(settings.DATABASE_URL)
+    if "AsyncSessionLocal" not in namespace:
+        namespace["AsyncSessionLocal"] = _sessionmaker(namespace["engine"])
+    if "ReadOnlySessionLocal" not in namespace:
+        namespace["ReadOnlySessionLocal"] = _sessionmaker(
+            namespace["engine"], read_only=True
+        )
+    return namespace[name]
+
+
+# Shard engines and session factories, indexed by shard number; filled from
+# SHARD_DATABASE_URLS on first use
+shard_engines: list[AsyncEngine] = []
+shard_sessionmakers: list[async_sessionmaker[AsyncSession]] = []
+shard_read_only_sessionmakers: list[async_sessionmaker[AsyncSession]] = []
+_shards_configured = False
+
+
+def configure_shards(urls: list[str]) -> None:
+    """
+    Set up one engine per shard database.
+
+    Args:
+        urls: Shard database URLs; shard numbers are positions in this list
+    """
+    global _shards_configured
+    _shards_configured = True
+    shard_engines[:] = [_create_engine(url) for url in urls]
+    shard_sessionmakers[:] = [_sessionmaker(bind) for bind in shard_engines]
+    shard_read_only_sessionmakers[:] = [
+        _sessionmaker(bind, read_only=True) for bind in shard_engines
+    ]
+
+
+def _shards() -> list[async_sessionmaker[AsyncSession]]:
+    """Shard session factories, setting up the shards on first use."""
+    if not _shards_configured:
+        configure_shards(settings.SHARD_DATABASE_URLS)
+    return shard_sessionmakers
+
+
+def data_engines() -> list[AsyncEngine]:
+    """Engines of every database holding users and tasks."""
+    _shards()
+    return list(shard_engines) or [_module.engine]
+
+
+def created_engines() -> list[AsyncEngine]:
+    """Engines created so far, without creating any."""
+    created = [globals()["engine"]] if "engine" in globals() else []
+    return created + shard_engines
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of every engine created so far."""
+    for bind in created_engines():
+        await bind.dispose()
+
+
+def compiled_cache_size() -> int:
+    """Number of statements held in the compiled caches of all engines."""
+    return sum(
+        len(bind.sync_engine._compiled_cache or ()) for bind in created_engines()
+    )
+
+
+compiled_cache_lookups = Counter(
+    "taskflow_sql_compiled_cache_total",
+    "Statement executions by compiled cache result (hit, miss, uncached).",
+    ("result",),
+)
+Gauge(
+    "taskflow_sql_compiled_cache_size",
+    "Statements held in the SQL compiled caches.",
+    callback=compiled_cache_size,
 )
 
 
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(
+    conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    """Note when a statement starts, for its duration after it ran."""
+    if context is not None:
+        context._statement_started = time.perf_counter()
+
+
+def statement_elapsed(context) -> float | None:
+    """
+    Seconds since the cursor execution of a statement started.
+
+    Args:
+        context: Execution context passed to cursor execute events
+
+    Returns:
+        float | None: Elapsed time, or None if the start was not recorded
+    """
+    started = getattr(context, "_statement_started", None)
+    return None if started is None else time.perf_counter() - started
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_statement_timer(
+    conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    """Add the statement's duration to the times recorded in this context."""
+    times = _statement_times.get()
+    if times is not None:
+        elapsed = statement_elapsed(context)
+        if elapsed is not None:
+            times.append(elapsed)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_compiled_cache(
+    conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    """Count whether an executed statement came from the compiled cache."""
+    if context is None or context.compiled is None:
+        return
+    if context.cache_hit == CacheStats.CACHE_HIT:
+        compiled_cache_lookups.inc(result="hit")
+    elif context.cache_hit == CacheStats.CACHE_MISS:
+        compiled_cache_lookups.inc(result="miss")
+    else:
+        compiled_cache_lookups.inc(result="uncached")
+
+
 class Base(DeclarativeBase):
     """Base class for all database models."""
 
     pass
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+def sharding_enabled() -> bool:
+    """Check if users are spread over shard databases."""
+    return bool(_shards())
+
+
+def shard_for_user(user_id: int) -> int:
     """
-    Dependency for getting async database sessions.
+    Place a new user on a shard by a stable hash of their ID.
 
-    Yields:
-        AsyncSession: Database session
+    The placement is recorded in the user directory, so changing the number
+    of shards only affects users registered afterwards.
+    """
+    return zlib.crc32(str(user_id).encode()) % len(_shards())
+
+
+def session_for_shard(shard: int | None, read_only: bool = False) -> AsyncSession:
+    """
+    Open a session on a shard, or on the global database.
+
+    Args:
+        shard: Shard number, or None for the global database
+        read_only: Open a session for reads only
+    """
+    if shard is None or not _shards():
+        if read_only:
+            return _module.ReadOnlySessionLocal()
+        return _module.AsyncSessionLocal()
+    if read_only:
+        return shard_read_only_sessionmakers[shard]()
+    return shard_sessionmakers[shard]()
+
+
+def sibling_session(session: AsyncSession) -> AsyncSession:
+    """
+    Open a new session on the database of ``session``, with its options.
+
+    For work shared by several requests: it must not run on the session of
+    the request that started it, which is closed when that request ends or
+    is cancelled. The request's read-only flag carries over, but not its
+    deadline, which would stop the work for every request when the first
+    one times out or is cancelled. The work gets the longest deadline any
+    request can have instead; each request still stops waiting at its own.
+    """
+    info = {key: value for key, value in session.info.items() if key == "read_only"}
+    info["deadline"] = Deadline(settings.REQUEST_TIMEOUT_MAX_SECONDS)
+    return AsyncSession(
+        session.bind, expire_on_commit=False, autoflush=False, info=info
+    )
+
+
+def data_sessionmakers() -> list[async_sessionmaker[AsyncSession]]:
+    """Session factories of every database holding users and tasks."""
+    return list(_shards()) or [_module.AsyncSessionLocal]
+
+
+def request_shard(request: Request) -> int | None:
+    """
+    Find the shard of the user making a request.
+
+    Access tokens carry the user's shard (see ``AuthService``), so no
+    directory lookup is needed per request. Requests without a valid token
+    go to the global database; authentication rejects them later.
+    """
+    if not _shards():
+        return None
+    claims = request_claims(request)
+    shard = claims.get("shard") if claims else None
+    if not isinstance(shard, int) or not 0 <= shard < len(shard_sessionmakers):
+        return None
+    return shard
+
+
+# Requests served by read-only sessions
+READ_ONLY_METHODS = frozenset({"GET", "HEAD"})
+
+# SQLite virtual machine instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+
+def _default_statement_timeout(connection: Connection) -> int:
     """
-    async with AsyncSessionLocal() as session:
+    A PostgreSQL connection's own ``statement_timeout`` in ms, 0 for none.
+
+    Read once per connection: from ``DB_STATEMENT_TIMEOUT_SECONDS`` when set,
+    otherwise from the server (which includes role and database defaults).
+    """
+    info = connection.connection.info
+    if "statement_timeout_ms" not in info:
+        if settings.DB_STATEMENT_TIMEOUT_SECONDS > 0:
+            timeout = int(settings.DB_STATEMENT_TIMEOUT_SECONDS * 1000)
+        else:
+            timeout = connection.exec_driver_sql(
+                "SELECT setting::int FROM pg_settings WHERE name = 'statement_timeout'"
+            ).scalar()
+        info["statement_timeout_ms"] = timeout
+    return info["statement_timeout_ms"]
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_deadline(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """
+    Bound every statement of a transaction by the session's request deadline.
+
+    PostgreSQL gets a ``statement_timeout`` for the rest of the transaction,
+    and cancels the query itself when it runs out; the extra round trip is
+    skipped when the connection's own timeout is at least as tight. SQLite
+    has no statement timeout, so a progress handler aborts the query
+    instead; it also stops when the request is cancelled, since cancelling
+    the awaiting task does not stop a query running in aiosqlite's thread.
+    """
+    deadline: Deadline | None = session.info.get("deadline")
+    if deadline is not None and deadline.expired():
+        from app.utils.exceptions import DeadlineExceededException
+
+        raise DeadlineExceededException()
+
+    if connection.dialect.name == "postgresql":
+        if deadline is not None:
+            timeout = max(1, int(deadline.remaining() * 1000))
+            default = _default_statement_timeout(connection)
+            if not default or timeout < default:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+    elif connection.dialect.name == "sqlite":
+        # The handler stays on the pooled connection, so clear a stale one
+        info = connection.connection.info
+        if deadline is None and not info.get("deadline_handler"):
+            return
+        handler = deadline.expired if deadline is not None else None
+        driver = connection.connection.driver_connection
+        await_only(driver.set_progress_handler(handler, SQLITE_PROGRESS_STEPS))
+        info["deadline_handler"] = deadline is not None
+
+
+@asynccontextmanager
+async def _scoped(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Commit the session if the request succeeds, roll it back otherwise.
+
+    The commit is skipped when there is nothing to commit: when no
+    transaction is open (nothing was queried, or the service committed its
+    own work already) and for read-only sessions, whose transaction is
+    ended when the connection goes back to the pool.
+
+    Queries of the session are bounded by the request's deadline, if any.
+    """
+    deadline = current_deadline.get()
+    if deadline is not None:
+        session.info["deadline"] = deadline
+    async with session:
         try:
             yield session
-            await session.commit()
+            if session.in_transaction() and not session.info.get("read_only"):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting async database sessions.
+
+    With sharding enabled the session is bound to the caller's shard.
+    ``GET`` and ``HEAD`` requests get a read-only session.
+
+    Yields:
+        AsyncSession: Database session
+    """
+    read_only = request.method in READ_ONLY_METHODS
+    session = session_for_shard(request_shard(request), read_only=read_only)
+    async with _scoped(session) as session:
+        yield session
+
+
+async def get_global_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for sessions on the global database, whoever the caller is.
+
+    Used by registration and login, which go through the user directory.
+
+    Yields:
+        AsyncSession: Database session
+    """
+    async with _scoped(_module.AsyncSessionLocal()) as session:
+        yield session
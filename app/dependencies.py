@@ -4,27 +4,41 @@ FastAPI dependencies for authentication and authorization.
 
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.utils.exceptions import ForbiddenException
+from app.utils.profiling import start_profile
+from app.utils.rate_limit import client_ip, rate_limiter
+from app.utils.security import request_claims
+from app.utils.tracing import traced
 
 security = HTTPBearer()
 
 
+# Query loading the user an access token was issued to, built once
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+
+@traced()
 async def get_current_user(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> User:
     """
     Dependency to get current authenticated user from JWT token.
 
+    Also applies the per-user API rate limit, before the database is hit,
+    and starts profiling superuser requests sent with ``X-Profile: 1``.
+
     Args:
+        request: Current request
         credentials: HTTP bearer token credentials
         db: Database session
 
@@ -33,6 +47,8 @@ async def get_current_user(
 
     Raises:
         HTTPException: If token is invalid or user not found
+        TooManyRequestsException: If the user exceeded the API rate limit,
+            or may not profile the request right now
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,21 +56,20 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    # Same token as ``credentials``, decoded once for the whole request
+    claims = request_claims(request)
+    user_id: str | None = claims.get("sub") if claims else None
+    if user_id is None:
         raise credentials_exception
 
+    # Identifies the user in the access log
+    request.state.user_id = int(user_id)
+
+    if settings.RATE_LIMIT_ENABLED:
+        await rate_limiter.check(request, "api", f"user:{user_id}")
+
     # Get user from database
-    result = await db.execute(select(User).where(User.id == int(user_id)))
+    result = await db.execute(USER_BY_ID, {"user_id": int(user_id)})
     user = result.scalar_one_or_none()
 
     if user is None:
@@ -66,6 +81,10 @@ async def get_current_user(
             detail="Inactive user",
         )
 
+    # X-Profile is honoured for superusers only (see ProfilingMiddleware)
+    if user.is_superuser and getattr(request.state, "profile_requested", False):
+        await start_profile(request, user.id)
+
     return user
 
 
@@ -87,3 +106,40 @@ async def get_current_active_user(
             detail="Inactive user",
         )
     return current_user
+
+
+async def limit_auth_requests(request: Request) -> None:
+    """
+    Dependency applying the per-IP rate limit of authentication endpoints.
+
+    Password hashing is deliberately slow, so these get a much smaller
+    budget than the rest of the API.
+
+    Args:
+        request: Current request
+
+    Raises:
+        TooManyRequestsException: If the client exceeded the limit
+    """
+    if settings.RATE_LIMIT_ENABLED:
+        await rate_limiter.check(request, "auth", f"ip:{client_ip(request)}")
+
+
+async def get_current_superuser(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+) -> User:
+    """
+    Dependency to ensure user is a superuser.
+
+    Args:
+        current_user: Current active user
+
+    Returns:
+        User: Current superuser
+
+    Raises:
+        ForbiddenException: If the user is not a superuser
+    """
+    if not current_user.is_superuser:
+        raise ForbiddenException("Superuser privileges required")
+    return current_user
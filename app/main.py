@@ -1,15 +1,89 @@
 """
 FastAPI application entry point.
+
+``create_app()`` builds the application. ``app`` (as served by
+``uvicorn app.main:app``) is created from it on first access, so importing
+this module builds no application, engine or connection pool.
 """
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import DBAPIError
 
+from app import database
 from app.api.v1.router import api_router
 from app.config import settings
+from app.database import data_engines, data_sessionmakers, dispose_engines
+from app.middleware.access_log import AccessLogMiddleware
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import RateLimitHeadersMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.archive import ArchiveService
+from app.services.events import TaskEventListener
+from app.services.group_commit import drain_write_coalescers
+from app.services.idempotency import IdempotencyService
+from app.services.sync import SyncService
+from app.services.task import TaskService
+from app.services.warmup import warm_up
+from app.utils import metrics
+from app.utils.background import run_periodically
+from app.utils.deadline import is_deadline_error
+from app.utils.log import configure_logging, stop_logging
+from app.utils.loop_monitor import start_loop_monitor
+from app.utils.partitioning import ensure_all_future_partitions
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+async def reap_expired_leases() -> None:
+    """Return work-queue tasks whose lease has expired to the queue."""
+    for sessionmaker in data_sessionmakers():
+        async with sessionmaker() as session:
+            await TaskService.release_expired_leases(session)
+
+
+async def compact_sync_log() -> None:
+    """Drop superseded change log entries and expired tombstones."""
+    for sessionmaker in data_sessionmakers():
+        async with sessionmaker() as session:
+            await SyncService.compact_changes(session)
+
+
+async def archive_finished_tasks() -> None:
+    """Move long-finished tasks to the archive table."""
+    for sessionmaker in data_sessionmakers():
+        async with sessionmaker() as session:
+            await ArchiveService.archive_tasks(session)
+
+
+async def purge_idempotency_keys() -> None:
+    """Delete expired idempotency keys."""
+    for sessionmaker in data_sessionmakers():
+        async with sessionmaker() as session:
+            await IdempotencyService.purge_expired(session)
+
+
+async def create_future_partitions() -> None:
+    """Create the coming months' partitions of range-partitioned tables."""
+    for bind in data_engines():
+        async with bind.begin() as conn:
+            await conn.run_sync(ensure_all_future_partitions)
+
+
+async def warm_up_then_ready(app: FastAPI) -> None:
+    """Warm the instance up, then report ready on ``/ready``."""
+    if settings.WARMUP_ENABLED:
+        await warm_up()
+    app.state.ready = True
 
 
 @asynccontextmanager
@@ -19,37 +93,95 @@ async def lifespan(app: FastAPI):
     Handles startup and shutdown logic.
     """
     # Startup
-    print(f"Starting {settings.APP_NAME} v{settings.VERSION}")
-    print(f"Environment: {settings.ENVIRONMENT}")
-    print(f"Debug mode: {settings.DEBUG}")
+    configure_logging()
+    logger.info(
+        "Starting %s v%s",
+        settings.APP_NAME,
+        settings.VERSION,
+        extra={"environment": settings.ENVIRONMENT, "debug": settings.DEBUG},
+    )
+    app.state.ready = False
+    loop_monitor = start_loop_monitor() if settings.LOOP_MONITOR_ENABLED else None
+    event_listeners = []
+    if database.engine.dialect.name == "postgresql":
+        # Task events are notified on the database holding the task
+        for url in settings.SHARD_DATABASE_URLS or [settings.DATABASE_URL]:
+            listener = TaskEventListener(url, settings.TASK_EVENTS_CHANNEL)
+            listener.start()
+            event_listeners.append(listener)
+    background_jobs = [
+        asyncio.create_task(
+            run_periodically(
+                "lease-reaper",
+                settings.LEASE_REAPER_INTERVAL_SECONDS,
+                reap_expired_leases,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                "sync-compaction",
+                settings.SYNC_COMPACTION_INTERVAL_SECONDS,
+                compact_sync_log,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                "idempotency-purge",
+                settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+                purge_idempotency_keys,
+            )
+        ),
+    ]
+    if settings.ARCHIVE_ENABLED:
+        background_jobs.append(
+            asyncio.create_task(
+                run_periodically(
+                    "task-archiver",
+                    settings.ARCHIVE_INTERVAL_SECONDS,
+                    archive_finished_tasks,
+                )
+            )
+        )
+    if database.engine.dialect.name == "postgresql":
+        background_jobs.append(
+            asyncio.create_task(
+                run_periodically(
+                    "partition-maintenance",
+                    settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+                    create_future_partitions,
+                )
+            )
+        )
+    background_jobs.append(asyncio.create_task(warm_up_then_ready(app)))
     yield
     # Shutdown
-    print("Shutting down application...")
-
-
-# Create FastAPI application
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.VERSION,
-    description="Production-ready task management REST API with FastAPI and PostgreSQL",
-    docs_url="/docs" if settings.is_development else None,
-    redoc_url="/redoc" if settings.is_development else None,
-    lifespan=lifespan,
-)
-
-# Configure CORS
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    logger.info("Shutting down application")
+    app.state.ready = False
+    for job in background_jobs:
+        job.cancel()
+    await asyncio.gather(*background_jobs, return_exceptions=True)
+    await drain_write_coalescers()
+    for listener in event_listeners:
+        await listener.stop()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    # Close pooled connections instead of leaving the server to time them out
+    await dispose_engines()
+    tracer.exporter.shutdown()
+    stop_logging()
+
+
+async def database_error_handler(request: Request, exc: DBAPIError):
+    """
+    Answer queries stopped by the request deadline with 504.
+
+    Other database errors are left to the default 500 handling.
+    """
+    if not is_deadline_error(exc):
+        raise exc
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
 
 
-# Health check endpoint
-@app.get("/health", tags=["Health"])
 async def health_check():
     """
     Health check endpoint to verify service is running.
@@ -67,12 +199,28 @@ async def health_check():
     )
 
 
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_PREFIX)
+async def readiness_check(request: Request):
+    """
+    Readiness probe: ready once startup warm-up has finished.
+
+    Returns:
+        JSONResponse: 200 when ready, 503 while warming up or shutting down
+    """
+    if getattr(request.app.state, "ready", False):
+        return JSONResponse(content={"status": "ready"})
+    return JSONResponse(content={"status": "starting"}, status_code=503)
+
+
+async def metrics_endpoint():
+    """
+    Expose application metrics for Prometheus.
+
+    Returns:
+        Response: Metrics in the Prometheus text format
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
-# Root endpoint
-@app.get("/", tags=["Root"])
 async def root():
     """
     Root endpoint with API information.
@@ -89,3 +237,63 @@ async def root():
             else "Documentation disabled in production"
         ),
     }
+
+
+def create_app() -> FastAPI:
+    """
+    Create the FastAPI application.
+
+    Returns:
+        FastAPI: Application with middleware, routes and lifespan configured
+    """
+    application = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.VERSION,
+        description=(
+            "Production-ready task management REST API with FastAPI and PostgreSQL"
+        ),
+        docs_url="/docs" if settings.is_development else None,
+        redoc_url="/redoc" if settings.is_development else None,
+        lifespan=lifespan,
+    )
+
+    if settings.PROFILING_ENABLED:
+        application.add_middleware(ProfilingMiddleware)
+    application.add_middleware(RateLimitHeadersMiddleware)
+    application.add_middleware(IdempotencyMiddleware)
+    application.add_middleware(DeadlineMiddleware)
+    application.add_middleware(AdmissionControlMiddleware)
+    if settings.TRACING_ENABLED:
+        application.add_middleware(TracingMiddleware)
+    if settings.ACCESS_LOG_ENABLED:
+        application.add_middleware(AccessLogMiddleware)
+
+    # Configure CORS
+    if settings.BACKEND_CORS_ORIGINS:
+        application.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    application.add_exception_handler(DBAPIError, database_error_handler)
+
+    application.add_api_route("/health", health_check, tags=["Health"])
+    application.add_api_route("/ready", readiness_check, tags=["Health"])
+    application.add_api_route(
+        "/metrics", metrics_endpoint, tags=["Health"], include_in_schema=False
+    )
+    application.include_router(api_router, prefix=settings.API_V1_PREFIX)
+    application.add_api_route("/", root, tags=["Root"])
+
+    return application
+
+
+def __getattr__(name: str):
+    """Create the module's ``app`` with ``create_app()`` on first access."""
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    application = globals()["app"] = create_app()
+    return application
@@ -0,0 +1,146 @@
+"""
+Structured access log with request IDs and sampling of successful requests.
+"""
+
+import logging
+import random
+import re
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import record_statement_times
+from app.utils.log import request_scope
+
+logger = logging.getLogger("taskflow.access")
+
+# Incoming request IDs are kept only if they are short and printable
+_REQUEST_ID = re.compile(r"[\w.:-]{1,128}")
+
+
+class SuccessSampler:
+    """
+    Decide which successful requests to log.
+
+    Below ``rate_threshold`` requests per second every request is logged;
+    above it only a ``sample_rate`` fraction of successful ones is. The rate
+    is measured over one-second windows.
+    """
+
+    def __init__(self, rate_threshold: float, sample_rate: float):
+        self.rate_threshold = rate_threshold
+        self.sample_rate = sample_rate
+        self._window_started = time.monotonic()
+        self._window_requests = 0
+        self._rate = 0.0
+
+    def sample(self) -> float:
+        """
+        Count a request and get the fraction of successes logged right now.
+
+        Returns:
+            float: 1.0 when every request is logged, else the sample rate
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        if elapsed >= 1.0:
+            self._rate = self._window_requests / elapsed
+            self._window_started = now
+            self._window_requests = 0
+        self._window_requests += 1
+        if self._rate <= self.rate_threshold:
+            return 1.0
+        return self.sample_rate
+
+
+class AccessLogMiddleware:
+    """
+    Log one structured line per request.
+
+    Each line carries the request ID (taken from ``X-Request-ID`` or
+    generated, and returned in the response), the authenticated user, the
+    route template, latency and the time spent in SQL statements. Errors
+    and slow requests are always logged; successful ones are sampled under
+    load (see ``SuccessSampler``), with the ``sample_rate`` in the line.
+    """
+
+    def __init__(self, app: ASGIApp, sampler: SuccessSampler | None = None):
+        self.app = app
+        self.sampler = sampler or SuccessSampler(
+            settings.ACCESS_LOG_SAMPLING_RPS, settings.ACCESS_LOG_SAMPLE_RATE
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope)
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        request_scope.set(scope)
+        statement_times = record_statement_times()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self._log(scope, status, time.perf_counter() - started, statement_times)
+
+    def _log(
+        self, scope: Scope, status: int, latency: float, statement_times: list[float]
+    ) -> None:
+        sample_rate = self.sampler.sample()
+        if (
+            status < 400
+            and latency < settings.ACCESS_LOG_SLOW_SECONDS
+            and sample_rate < 1.0
+            and random.random() >= sample_rate
+        ):
+            return
+        if status >= 400 or latency >= settings.ACCESS_LOG_SLOW_SECONDS:
+            sample_rate = 1.0
+
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        logger.log(
+            logging.ERROR if status >= 500 else logging.INFO,
+            "%s %s %d",
+            scope["method"],
+            route,
+            status,
+            extra={
+                "request_id": scope["state"]["request_id"],
+                "user_id": scope["state"].get("user_id"),
+                "trace_id": scope["state"].get("trace_id"),
+                "method": scope["method"],
+                "route": route,
+                "path": scope["path"],
+                "status": status,
+                "latency_ms": round(latency * 1000, 2),
+                "db_ms": round(sum(statement_times) * 1000, 2),
+                "db_statements": len(statement_times),
+                "sample_rate": sample_rate,
+            },
+        )
+
+
+def _request_id(scope: Scope) -> str:
+    """The client's ``X-Request-ID`` if usable, else a new one."""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            if _REQUEST_ID.fullmatch(candidate):
+                return candidate
+            break
+    return uuid.uuid4().hex
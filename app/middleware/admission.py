@@ -0,0 +1,165 @@
+"""
+Adaptive admission control: shed load before the database pool saturates.
+"""
+
+import time
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.database import record_pool_waits
+from app.utils.metrics import Counter, Gauge
+
+# Never shed: cheap, and needed to see what is going on
+CRITICAL_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
+shed_requests = Counter(
+    "taskflow_admission_shed_total",
+    "Requests rejected with 503 by admission control.",
+    ("route_class",),
+)
+pool_wait_seconds = Counter(
+    "taskflow_db_pool_wait_seconds_total",
+    "Time requests spent waiting for a database connection.",
+)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    Each request that finishes in time while the limit is in use raises it
+    by ``1 / limit`` (about one per round of ``limit`` requests). A request
+    that waited too long for a pooled connection, or took longer than the
+    latency target, cuts it by ``backoff_ratio``. Requests that started
+    before the last cut do not cut it again, so a burst of slow requests
+    counts as one overload.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        backoff_ratio: float,
+        latency_target: float,
+        pool_wait_target: float,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff_ratio = backoff_ratio
+        self.latency_target = latency_target
+        self.pool_wait_target = pool_wait_target
+        self.in_flight = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self, share: float) -> bool:
+        """Admit a request if in-flight requests are below its share of the limit."""
+        if self.in_flight >= max(self.limit * share, 1):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, started: float, latency: float, pool_wait: float) -> None:
+        """Record a finished request and adapt the limit."""
+        self.in_flight -= 1
+        overloaded = latency > self.latency_target or pool_wait > self.pool_wait_target
+        if overloaded:
+            if started >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.backoff_ratio)
+                self._last_decrease = time.monotonic()
+        elif self.in_flight * 2 >= self.limit:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+def route_class(scope: Scope) -> str | None:
+    """
+    Classify a request for admission.
+
+    Returns:
+        str | None: ``read``, ``write`` or ``expensive``; None for requests
+        that are always admitted (health checks, metrics, event streams)
+    """
+    path = scope["path"]
+    if path in CRITICAL_PATHS or path.endswith("/events"):
+        return None
+    if scope["method"] in ("GET", "HEAD"):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        page_size = query.get("page_size", ["0"])[0]
+        if query.get("include_archived", ["false"])[0].lower() in ("1", "true") or (
+            page_size.isdigit()
+            and int(page_size) > settings.ADMISSION_EXPENSIVE_PAGE_SIZE
+        ):
+            return "expensive"
+        return "read"
+    if path.endswith("/auth/login") or path.endswith("/auth/register"):
+        # Password hashing makes these the most CPU-hungry writes
+        return "expensive"
+    return "write"
+
+
+# Shared by the process's requests
+admission_limit = AdaptiveLimit(
+    settings.ADMISSION_INITIAL_LIMIT,
+    settings.ADMISSION_MIN_LIMIT,
+    settings.ADMISSION_MAX_LIMIT,
+    settings.ADMISSION_BACKOFF_RATIO,
+    settings.ADMISSION_LATENCY_TARGET_SECONDS,
+    settings.ADMISSION_POOL_WAIT_TARGET_SECONDS,
+)
+Gauge(
+    "taskflow_admission_limit",
+    "Current adaptive concurrency limit.",
+    callback=lambda: admission_limit.limit,
+)
+Gauge(
+    "taskflow_admission_in_flight",
+    "Requests currently admitted.",
+    callback=lambda: admission_limit.in_flight,
+)
+
+
+class AdmissionControlMiddleware:
+    """
+    Reject requests with 503 and ``Retry-After`` when the service is saturated.
+
+    Shedding early keeps queued requests from all timing out together when
+    the database slows down. Lower-priority route classes get a smaller
+    share of the limit (``ADMISSION_CLASS_SHARES``), so they are shed first.
+    """
+
+    def __init__(self, app: ASGIApp, limit: AdaptiveLimit | None = None):
+        self.app = app
+        self.limit = limit or admission_limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        share = settings.ADMISSION_CLASS_SHARES.get(name, 1.0)
+        if not self.limit.try_acquire(share):
+            shed_requests.inc(route_class=name)
+            response = JSONResponse(
+                {"detail": "Service overloaded, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        waits = record_pool_waits()
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool_wait = sum(waits)
+            pool_wait_seconds.inc(pool_wait)
+            self.limit.release(started, time.monotonic() - started, pool_wait)
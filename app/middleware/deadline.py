@@ -0,0 +1,152 @@
+"""
+Per-request deadlines and cancellation on client disconnect.
+"""
+
+import asyncio
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.middleware.admission import route_class
+from app.utils.deadline import Deadline, current_deadline
+from app.utils.metrics import Counter
+
+TIMEOUT_HEADER = "x-request-timeout"
+
+deadline_exceeded = Counter(
+    "taskflow_deadline_exceeded_total",
+    "Requests answered with 504 because they ran past their deadline.",
+    ("route_class",),
+)
+client_disconnects = Counter(
+    "taskflow_client_disconnects_total",
+    "Requests cancelled because the client disconnected.",
+)
+
+
+def request_timeout(scope: Scope, name: str) -> float:
+    """
+    Time allowed for a request.
+
+    Clients may ask for a shorter timeout with ``X-Request-Timeout``
+    (seconds); otherwise the route class default from
+    ``REQUEST_TIMEOUT_SECONDS`` applies. Neither may exceed
+    ``REQUEST_TIMEOUT_MAX_SECONDS``.
+    """
+    timeout = settings.REQUEST_TIMEOUT_SECONDS.get(
+        name, settings.REQUEST_TIMEOUT_MAX_SECONDS
+    )
+    requested = Headers(scope=scope).get(TIMEOUT_HEADER)
+    if requested:
+        try:
+            value = float(requested)
+        except ValueError:
+            value = 0.0
+        if value > 0:
+            timeout = min(timeout, value)
+    return min(timeout, settings.REQUEST_TIMEOUT_MAX_SECONDS)
+
+
+class DeadlineMiddleware:
+    """
+    Stop working on requests nobody is waiting for any more.
+
+    Each request gets a deadline that database sessions turn into statement
+    timeouts (see ``app.database``). If the endpoint is still running when
+    the deadline passes it is cancelled and, unless the response already
+    started, a 504 is sent. If the client disconnects first the endpoint is
+    cancelled too, which cancels its running query and returns the
+    connection to the pool instead of finishing work whose answer would be
+    thrown away.
+
+    Event streams are left alone: they are meant to stay open and notice
+    disconnects themselves.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.REQUEST_DEADLINES_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(request_timeout(scope, name))
+        token = current_deadline.set(deadline)
+        try:
+            await self._run(scope, receive, send, deadline, name)
+        finally:
+            current_deadline.reset(token)
+
+    async def _run(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        deadline: Deadline,
+        name: str,
+    ) -> None:
+        # Read the body up front, so only this middleware listens on
+        # ``receive`` afterwards and a disconnect cannot go unnoticed
+        body: list[Message] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                client_disconnects.inc()
+                return
+            body.append(message)
+            if not message.get("more_body", False):
+                break
+
+        disconnected = asyncio.Event()
+        response_started = False
+
+        async def app_receive() -> Message:
+            if body:
+                return body.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def app_send(message: Message) -> None:
+            nonlocal response_started
+            response_started = True
+            await send(message)
+
+        endpoint = asyncio.create_task(self.app(scope, app_receive, app_send))
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            if not endpoint.done():
+                client_disconnects.inc()
+                deadline.cancel()
+                endpoint.cancel()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await asyncio.wait_for(asyncio.shield(endpoint), deadline.remaining())
+        except asyncio.TimeoutError:
+            deadline.cancel()
+            endpoint.cancel()
+            await asyncio.gather(endpoint, return_exceptions=True)
+            if response_started or disconnected.is_set():
+                return
+            deadline_exceeded.inc(route_class=name)
+            response = JSONResponse(
+                {"detail": "Request deadline exceeded"}, status_code=504
+            )
+            await response(scope, receive, send)
+        except asyncio.CancelledError:
+            if not disconnected.is_set():
+                # The server cancelled us, not a disconnect
+                endpoint.cancel()
+                raise
+        finally:
+            watcher.cancel()
@@ -0,0 +1,155 @@
+"""
+Idempotency-Key support for mutating task requests.
+"""
+
+import asyncio
+import hashlib
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import request_shard, session_for_shard
+from app.services.idempotency import IdempotencyService
+from app.utils.security import request_claims
+
+IDEMPOTENT_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_KEY_LENGTH = 255
+
+# Client errors that say "try again later" rather than "this request fails":
+# timeout, conflict, too early, rate limited (and 503 from admission control)
+TRANSIENT_STATUSES = frozenset({408, 409, 425, 429, 503})
+
+
+class IdempotencyMiddleware:
+    """
+    Replay the stored response when a task mutation is retried.
+
+    A request carrying an ``Idempotency-Key`` header runs once per user and
+    key. Retries get the first response back, marked with
+    ``Idempotent-Replayed: true``, without the endpoint running again;
+    duplicates arriving while it runs wait for it. Only final outcomes are
+    stored: 5xx and transient 4xx responses (``TRANSIENT_STATUSES``) release
+    the key, so the request can be retried. Requests reusing
+    a key with a different method, path or body are rejected with 422.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str | None = None):
+        self.app = app
+        self.path_prefix = path_prefix or f"{settings.API_V1_PREFIX}/tasks"
+        # Requests in flight in this process, so local duplicates wait
+        # without polling the database
+        self._in_flight: dict[tuple[int | None, int, str], asyncio.Event] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        key = request.headers.get("idempotency-key")
+        user_id = _caller(request)
+        if key is None or user_id is None:
+            # Anonymous requests are rejected by the endpoint itself
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": "Invalid Idempotency-Key header"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await request.body()
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), body])
+        ).hexdigest()
+        shard = request_shard(request)
+        slot = (shard, user_id, key)
+
+        while slot in self._in_flight:
+            await self._in_flight[slot].wait()
+        self._in_flight[slot] = done = asyncio.Event()
+        try:
+            async with session_for_shard(shard) as db:
+                try:
+                    record = await IdempotencyService.claim(
+                        db, user_id, key, fingerprint
+                    )
+                except HTTPException as exc:
+                    response = JSONResponse(
+                        {"detail": exc.detail}, status_code=exc.status_code
+                    )
+                    await response(scope, receive, send)
+                    return
+                if record is not None:
+                    replay = Response(
+                        record.body,
+                        status_code=record.status_code,
+                        media_type=record.content_type,
+                        headers={"Idempotent-Replayed": "true"},
+                    )
+                    await replay(scope, receive, send)
+                    return
+
+                await self._run(scope, send, body, db, user_id, key)
+        finally:
+            del self._in_flight[slot]
+            done.set()
+
+    async def _run(
+        self,
+        scope: Scope,
+        send: Send,
+        body: bytes,
+        db: AsyncSession,
+        user_id: int,
+        key: str,
+    ) -> None:
+        """Run the endpoint once, store its response, then send it."""
+        messages: list[Message] = []
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message: Message) -> None:
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            await asyncio.shield(IdempotencyService.release(db, user_id, key))
+            raise
+
+        start = messages[0]
+        if start["status"] >= 500 or start["status"] in TRANSIENT_STATUSES:
+            await IdempotencyService.release(db, user_id, key)
+        else:
+            headers = dict(start.get("headers", []))
+            await IdempotencyService.complete(
+                db,
+                user_id,
+                key,
+                start["status"],
+                headers.get(b"content-type", b"").decode() or None,
+                b"".join(m.get("body", b"") for m in messages[1:]),
+            )
+        # Sent only once stored, so a retry after this response always replays
+        for message in messages:
+            await send(message)
+
+
+def _caller(request: Request) -> int | None:
+    """User ID from the bearer token, if it is valid."""
+    claims = request_claims(request)
+    try:
+        return int(claims["sub"]) if claims else None
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,42 @@
+"""
+Per-request CPU profiling on request of a superuser.
+"""
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiling import finish_profile
+
+
+class ProfilingMiddleware:
+    """
+    Mark requests sent with ``X-Profile: 1`` and finish their profile.
+
+    The profiler is started by ``get_current_user`` once the user is known
+    to be a superuser (see ``app.utils.profiling``), and stopped when the
+    response starts, which gets an ``X-Profile-Id`` header. Requests
+    without the header only pay for the header lookup.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (b"x-profile", b"1") not in scope["headers"]:
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["profile_requested"] = True
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile_id = finish_profile(scope)
+                if profile_id is not None:
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            # The request failed before responding
+            finish_profile(scope)
@@ -0,0 +1,59 @@
+"""
+Root spans for traced requests, continuing the caller's W3C trace context.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import tracing
+from app.utils.tracing import Tracer, parse_traceparent
+
+
+class TracingMiddleware:
+    """
+    Trace a sample of requests (see ``app.utils.tracing``).
+
+    The root span covers everything inside this middleware, and is named
+    after the route template once routing has matched. The trace ID is put
+    in the request state, so the logs of a traced request carry it.
+    Unsampled requests only pay for the sampling decision.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer | None = None):
+        self.app = app
+        self.tracer = tracer or tracing.tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        method = scope["method"]
+        with self.tracer.trace(
+            f"{method} {scope['path']}",
+            parent,
+            **{"http.method": method, "http.target": scope["path"]},
+        ) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            scope.setdefault("state", {})["trace_id"] = root.trace_id
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.attributes["http.status_code"] = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    root.name = f"{method} {route}"
+                    root.attributes["http.route"] = route
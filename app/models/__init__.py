@@ -2,7 +2,18 @@
 Database models.
 """
 
+from app.models.idempotency_key import IdempotencyKey
 from app.models.task import Task
+from app.models.task_archive import TaskArchive
+from app.models.task_change import TaskChange
 from app.models.user import User
+from app.models.user_directory import UserDirectory
 
-__all__ = ["User", "Task"]
+__all__ = [
+    "User",
+    "Task",
+    "TaskArchive",
+    "TaskChange",
+    "UserDirectory",
+    "IdempotencyKey",
+]
@@ -8,7 +8,7 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -38,6 +38,14 @@ class Task(Base):
     """Task model for todo items."""
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the work-queue claim: equality on owner/status/priority,
+        # then oldest first.
+        Index("ix_tasks_queue", "owner_id", "status", "priority", "created_at"),
+        Index("ix_tasks_lease_expires_at", "lease_expires_at"),
+        # Serves the archiver's scan for long-finished tasks
+        Index("ix_tasks_status_updated_at", "status", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -58,6 +66,10 @@ class Task(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    # Work-queue lease
+    lease_owner: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
     # Foreign key
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
 
@@ -0,0 +1,51 @@
+"""
+Task change log model used for delta sync.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class TaskChange(Base):
+    """
+    One entry per task write.
+
+    Sync tokens are positions in commit order. On PostgreSQL, sequence
+    values (``id``) are handed out before commit, so entries are ordered by
+    their writing transaction (``xid``, set by whoever inserts the entry)
+    first, see ``SyncService``. SQLite serializes writers, so there ``id``
+    alone follows commit order and ``xid`` is NULL. Deletes are kept as
+    tombstones until compacted, since the task row itself is gone.
+    """
+
+    __tablename__ = "task_changes"
+    __table_args__ = (
+        Index("ix_task_changes_owner_seq", "owner_id", "id"),
+        Index("ix_task_changes_task_id", "task_id"),
+        Index("ix_task_changes_owner_xid_seq", "owner_id", "xid", "id"),
+        # Never reuse sequence values on SQLite after compaction
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    # Not a foreign key: tombstones outlive the task row
+    task_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    # Writing transaction on PostgreSQL, see SyncService.writing_transaction
+    xid: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<TaskChange(id={self.id}, task_id={self.task_id}, "
+            f"deleted={self.deleted})>"
+        )
@@ -0,0 +1,34 @@
+"""
+Global user directory model used to route users to their shard.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class UserDirectory(Base):
+    """
+    Maps every user to the shard holding their data.
+
+    Lives on the global database. Its ``id`` allocates user IDs, so they
+    stay unique across shards, and its unique ``email``/``username`` columns
+    enforce uniqueness across shards at registration. Moving a user to
+    another shard means copying their rows and updating ``shard``.
+    """
+
+    __tablename__ = "user_directory"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    username: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    shard: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<UserDirectory(id={self.id}, shard={self.shard})>"
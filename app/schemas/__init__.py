@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation.
 """
 
-from app.schemas.task import Task, TaskCreate, TaskUpdate
+from app.schemas.task import Task, TaskCreate, TaskLease, TaskUpdate
 from app.schemas.token import Token, TokenPayload
 from app.schemas.user import User, UserCreate, UserLogin, UserUpdate
 
@@ -13,6 +13,7 @@ __all__ = [
     "UserUpdate",
     "Task",
     "TaskCreate",
+    "TaskLease",
     "TaskUpdate",
     "Token",
     "TokenPayload",
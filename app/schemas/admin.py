@@ -0,0 +1,113 @@
+"""
+Admin API Pydantic schemas.
+"""
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SlowQuery(BaseModel):
+    """Schema for a slow SQL statement with its captured plan."""
+
+    captured_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    service: str | None
+    route: str | None
+    request_id: str | None
+    plan: str | None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProfileSummary(BaseModel):
+    """Schema for a stored request profile."""
+
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    route: str
+    user_id: int
+    duration_ms: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TracingStatus(BaseModel):
+    """Schema for the state of allocation tracing."""
+
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    peak_traced_bytes: int
+    tracemalloc_overhead_bytes: int
+
+
+class MemorySnapshotSummary(BaseModel):
+    """Schema for a stored tracemalloc snapshot."""
+
+    id: int
+    taken_at: datetime
+    traced_bytes: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AllocationDiff(BaseModel):
+    """Schema for the change in allocations at one location."""
+
+    location: str
+    size_bytes: int
+    size_diff_bytes: int
+    count: int
+    count_diff: int
+
+
+class ObjectCounts(BaseModel):
+    """Schema for garbage collector state and live ORM instances."""
+
+    gc_counts: list[int]
+    gc_thresholds: list[int]
+    gc_collections: list[int]
+    gc_frozen: int
+    orm_instances: dict[str, int]
+
+
+class LoopBlock(BaseModel):
+    """Schema for a time the event loop was blocked."""
+
+    detected_at: datetime
+    duration_ms: float
+    route: str | None
+    stack: str | None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TraceSummary(BaseModel):
+    """Schema for a trace kept in memory, described by its root span."""
+
+    trace_id: str
+    name: str
+    start_time: datetime
+    duration_ms: float | None
+    spans: int
+
+
+class TraceSpan(BaseModel):
+    """Schema for a span of a trace."""
+
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_time: datetime
+    duration_ms: float | None
+    attributes: dict[str, Any]
+    error: str | None
+
+    model_config = ConfigDict(from_attributes=True)
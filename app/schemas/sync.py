@@ -0,0 +1,17 @@
+"""
+Delta sync Pydantic schemas.
+"""
+
+from pydantic import BaseModel
+
+from app.schemas.task import Task
+
+
+class TaskChanges(BaseModel):
+    """Schema for a delta sync response."""
+
+    tasks: list[Task]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
+    reset: bool = False
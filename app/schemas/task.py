@@ -3,8 +3,9 @@ Task Pydantic schemas.
 """
 
 from datetime import datetime
+from functools import lru_cache
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
 from app.models.task import TaskPriority, TaskStatus
 
@@ -44,10 +45,58 @@ class Task(TaskBase):
     created_at: datetime
     updated_at: datetime
     owner_id: int
+    lease_owner: str | None = None
+    lease_expires_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Fields a client can select with ``fields=`` on task lists
+TASK_FIELDS = frozenset(Task.model_fields)
+
+# List responses leave out the unbounded description unless asked for it
+DEFAULT_TASK_LIST_FIELDS = TASK_FIELDS - {"description"}
+
+
+@lru_cache(maxsize=256)
+def get_task_list_schema(fields: frozenset[str]) -> type[BaseModel]:
+    """
+    Build (once per field set) a task list schema restricted to some fields.
+
+    Args:
+        fields: Task fields to include; must be a subset of ``TASK_FIELDS``
+
+    Returns:
+        type[BaseModel]: ``TaskList``-shaped schema whose tasks only carry
+        the given fields
+    """
+    if fields == TASK_FIELDS:
+        return TaskList
+
+    # Keep the declaration order of the full schema
+    selected = [name for name in Task.model_fields if name in fields]
+    partial_task = create_model(
+        f"Task[{','.join(selected)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{
+            name: (Task.model_fields[name].annotation, Task.model_fields[name])
+            for name in selected
+        },
+    )
+    return create_model(
+        f"TaskList[{','.join(selected)}]",
+        __base__=TaskList,
+        tasks=(list[partial_task], ...),
+    )
+
+
+class TaskLease(BaseModel):
+    """Schema for claiming a task or renewing/releasing its lease."""
+
+    worker_id: str = Field(..., min_length=1, max_length=100)
+    lease_seconds: int | None = Field(None, ge=1)
+
+
 class TaskList(BaseModel):
     """Schema for paginated task list response."""
 
@@ -0,0 +1,106 @@
+"""
+Archive service moving long-finished tasks out of the hot table.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Boolean, DateTime, delete, insert, literal, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.task import Task, TaskStatus
+from app.models.task_archive import TaskArchive
+from app.models.task_change import TaskChange
+from app.services.sync import SyncService
+
+# Tasks in these states are done and may leave the hot table
+ARCHIVABLE_STATUSES = (TaskStatus.COMPLETED.value, TaskStatus.CANCELLED.value)
+
+# Columns copied from tasks to tasks_archive
+ARCHIVED_COLUMNS = [
+    column.name
+    for column in TaskArchive.__table__.columns
+    if column.name != "archived_at"
+]
+
+
+class ArchiveService:
+    """Service for archiving finished tasks."""
+
+    @staticmethod
+    async def archive_tasks(
+        db: AsyncSession,
+        older_than_days: int | None = None,
+        batch_size: int | None = None,
+    ) -> int:
+        """
+        Move tasks finished more than ``older_than_days`` ago to the archive.
+
+        A task counts as finished when it is completed or cancelled; its last
+        update is taken as the finish time. Each batch is copied and deleted
+        in its own short transaction, and rows locked by concurrent writers
+        are skipped until the next run. The same transaction records a
+        tombstone per task in the change log, so delta sync clients drop
+        archived tasks from their hot list.
+
+        Args:
+            db: Database session
+            older_than_days: Minimum age in days (defaults to settings)
+            batch_size: Tasks moved per transaction (defaults to settings)
+
+        Returns:
+            int: Number of tasks archived
+        """
+        days = (
+            settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        )
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        cutoff = datetime.utcnow() - timedelta(days=days)
+
+        batch_query = (
+            select(Task.id)
+            .where(Task.status.in_(ARCHIVABLE_STATUSES), Task.updated_at < cutoff)
+            .order_by(Task.updated_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+        archived = 0
+        while True:
+            ids = (await db.execute(batch_query)).scalars().all()
+            if not ids:
+                break
+
+            now = literal(datetime.utcnow(), DateTime)
+            rows = select(
+                *(Task.__table__.c[name] for name in ARCHIVED_COLUMNS),
+                now.label("archived_at"),
+            ).where(Task.id.in_(ids))
+            await db.execute(
+                insert(TaskArchive).from_select(
+                    [*ARCHIVED_COLUMNS, "archived_at"], rows
+                )
+            )
+            xid = SyncService.writing_transaction(db)
+            tombstones = select(
+                Task.id,
+                Task.owner_id,
+                literal(True, Boolean),
+                now,
+                xid if xid is not None else null(),
+            ).where(Task.id.in_(ids))
+            await db.execute(
+                insert(TaskChange).from_select(
+                    ["task_id", "owner_id", "deleted", "changed_at", "xid"],
+                    tombstones,
+                )
+            )
+            await db.execute(
+                delete(Task)
+                .where(Task.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            archived += len(ids)
+
+        return archived
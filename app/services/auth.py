@@ -2,10 +2,14 @@
 Authentication service for user registration and login.
 """
 
+import asyncio
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import session_for_shard, shard_for_user, sharding_enabled
 from app.models.user import User
+from app.models.user_directory import UserDirectory
 from app.schemas.user import UserCreate
 from app.utils.exceptions import ConflictException, UnauthorizedException
 from app.utils.security import create_access_token, get_password_hash, verify_password
@@ -29,33 +33,74 @@ class AuthService:
         Raises:
             ConflictException: If email or username already exists
         """
+        if sharding_enabled():
+            return await AuthService._register_sharded_user(db, user_data)
+
+        await AuthService._check_available(db, User, user_data)
+        db_user = await AuthService._new_user(user_data)
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+
+        return db_user
+
+    @staticmethod
+    async def _register_sharded_user(db: AsyncSession, user_data: UserCreate) -> User:
+        """
+        Register a user in the directory and create them on their shard.
+
+        The directory entry stays uncommitted, holding the email and username,
+        until the user exists on the shard.
+        """
+        await AuthService._check_available(db, UserDirectory, user_data)
+        entry = UserDirectory(email=user_data.email, username=user_data.username)
+        # The shard depends on the ID the directory allocates on flush
+        entry.shard = 0
+        db.add(entry)
+        await db.flush()
+        entry.shard = shard_for_user(entry.id)
+
+        async with session_for_shard(entry.shard) as shard_db:
+            db_user = await AuthService._new_user(user_data)
+            db_user.id = entry.id
+            shard_db.add(db_user)
+            await shard_db.commit()
+            await shard_db.refresh(db_user)
+        await db.commit()
+
+        return db_user
+
+    @staticmethod
+    async def _check_available(
+        db: AsyncSession, model: type[User] | type[UserDirectory], user_data: UserCreate
+    ) -> None:
+        """Raise ConflictException if the email or username is taken."""
         # Check if email already exists
-        result = await db.execute(select(User).where(User.email == user_data.email))
+        result = await db.execute(
+            select(model.id).where(model.email == user_data.email)
+        )
         if result.scalar_one_or_none():
             raise ConflictException("Email already registered")
 
         # Check if username already exists
         result = await db.execute(
-            select(User).where(User.username == user_data.username)
+            select(model.id).where(model.username == user_data.username)
         )
         if result.scalar_one_or_none():
             raise ConflictException("Username already taken")
 
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
-        db_user = User(
+    @staticmethod
+    async def _new_user(user_data: UserCreate) -> User:
+        """Build a user with a hashed password."""
+        # bcrypt is deliberately slow; hash off the event loop
+        hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
+        return User(
             email=user_data.email,
             username=user_data.username,
             full_name=user_data.full_name,
             hashed_password=hashed_password,
         )
 
-        db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
-
-        return db_user
-
     @staticmethod
     async def authenticate_user(
         db: AsyncSession, username: str, password: str
@@ -63,6 +108,9 @@ class AuthService:
         """
         Authenticate user and generate access token.
 
+        With sharding enabled the user is found through the global directory
+        and the token records their shard, which ``get_db`` routes on.
+
         Args:
             db: Database session
             username: Username
@@ -74,15 +122,29 @@ class AuthService:
         Raises:
             UnauthorizedException: If credentials are invalid
         """
-        # Get user by username
-        result = await db.execute(select(User).where(User.username == username))
-        user = result.scalar_one_or_none()
+        # Get user by username, on their shard if sharding is enabled
+        shard = None
+        if sharding_enabled():
+            result = await db.execute(
+                select(UserDirectory.id, UserDirectory.shard).where(
+                    UserDirectory.username == username
+                )
+            )
+            entry = result.first()
+            if not entry:
+                raise UnauthorizedException("Incorrect username or password")
+            shard = entry.shard
+            async with session_for_shard(shard) as shard_db:
+                user = await shard_db.get(User, entry.id)
+        else:
+            result = await db.execute(select(User).where(User.username == username))
+            user = result.scalar_one_or_none()
 
         if not user:
             raise UnauthorizedException("Incorrect username or password")
 
         # Verify password
-        if not verify_password(password, user.hashed_password):
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
             raise UnauthorizedException("Incorrect username or password")
 
         # Check if user is active
@@ -90,6 +152,6 @@ class AuthService:
             raise UnauthorizedException("User account is inactive")
 
         # Create access token
-        access_token = create_access_token(subject=user.id)
+        access_token = create_access_token(subject=user.id, shard=shard)
 
         return user, access_token
@@ -0,0 +1,366 @@
+"""
+Task change feed.
+
+``TaskService`` writes emit task events. On PostgreSQL they are sent with
+``NOTIFY`` inside the writing transaction and come back through a single
+per-process ``LISTEN`` connection, so every API process sees every change.
+On other databases (SQLite in tests and local development) events are
+published to the in-process bus once the session commits.
+
+The bus fans events out to per-subscriber bounded queues. A subscriber that
+falls behind is disconnected instead of buffering without limit, and a
+short replay buffer lets reconnecting clients resume from ``Last-Event-ID``.
+
+Event IDs are the IDs of the events' ``task_changes`` entries, so they are
+the same in every process. Notifications arrive in commit order on every
+``LISTEN`` connection, so all processes buffer events in the same order and
+a client can resume on any of them: the events after its last one in the
+buffer are exactly those it missed.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.task import Task
+from app.schemas.task import Task as TaskSchema
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+
+_PENDING_EVENTS_KEY = "pending_task_events"
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """A change to a single task."""
+
+    id: int
+    type: str
+    task_id: int
+    owner_id: int
+    data: dict[str, Any] | None = None
+
+    def to_sse(self) -> str:
+        """Format the event as a Server-Sent Events message."""
+        payload = json.dumps(
+            {"task_id": self.task_id, "task": self.data}, separators=(",", ":")
+        )
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """A subscriber's view of the bus, filtered to one owner."""
+
+    def __init__(self, owner_id: int, queue_size: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue[TaskEvent] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, task_event: TaskEvent) -> bool:
+        """
+        Queue an event without blocking.
+
+        Returns:
+            bool: False if the subscriber is too slow and must be dropped
+        """
+        try:
+            self.queue.put_nowait(task_event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+        return True
+
+
+class TaskEventBus:
+    """In-process fan-out of task events to SSE subscribers."""
+
+    def __init__(self, queue_size: int, replay_size: int):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._replay: deque[TaskEvent] = deque(maxlen=replay_size)
+
+    @property
+    def last_id(self) -> int | None:
+        """ID of the most recently published event still buffered."""
+        return self._replay[-1].id if self._replay else None
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(
+        self, owner_id: int, last_event_id: int | None = None
+    ) -> tuple[Subscription, bool]:
+        """
+        Register a subscriber for one owner's task events.
+
+        Args:
+            owner_id: Only events for this owner's tasks are delivered
+            last_event_id: Last event the client saw, to resume from
+
+        Returns:
+            tuple: (Subscription, whether the resume was complete). An
+            incomplete resume means events were missed and the client must
+            refetch its tasks.
+        """
+        subscription = Subscription(owner_id, self.queue_size)
+        complete = True
+
+        if last_event_id is not None:
+            missed = self._events_after(last_event_id)
+            complete = missed is not None
+            for task_event in missed or ():
+                if task_event.owner_id == owner_id:
+                    subscription.offer(task_event)
+
+        self._subscribers.add(subscription)
+        return subscription, complete
+
+    def _events_after(self, event_id: int) -> list[TaskEvent] | None:
+        """Buffered events published after ``event_id``, None if it is not buffered."""
+        for position, task_event in enumerate(self._replay):
+            if task_event.id == event_id:
+                return list(self._replay)[position + 1 :]
+        return None
+
+    def clear_replay(self) -> None:
+        """Forget buffered events, e.g. after missing some while disconnected."""
+        self._replay.clear()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber."""
+        self._subscribers.discard(subscription)
+
+    def publish(
+        self,
+        event_id: int,
+        event_type: str,
+        task_id: int,
+        owner_id: int,
+        data: dict | None = None,
+    ) -> TaskEvent:
+        """
+        Deliver an event to matching subscribers.
+
+        Subscribers whose queue is full are disconnected.
+
+        Args:
+            event_id: ID of the event's change log entry
+            event_type: Event name
+            task_id: Changed task ID
+            owner_id: Owner of the changed task
+            data: Optional serialized task
+
+        Returns:
+            TaskEvent: Published event
+        """
+        task_event = TaskEvent(event_id, event_type, task_id, owner_id, data)
+        self._replay.append(task_event)
+
+        for subscription in list(self._subscribers):
+            if subscription.owner_id != owner_id:
+                continue
+            if not subscription.offer(task_event):
+                logger.warning(
+                    "Dropping slow task event subscriber for owner %s", owner_id
+                )
+                self._subscribers.discard(subscription)
+
+        return task_event
+
+
+task_event_bus = TaskEventBus(
+    queue_size=settings.SSE_SUBSCRIBER_QUEUE_SIZE,
+    replay_size=settings.SSE_REPLAY_BUFFER_SIZE,
+)
+
+
+async def stream_task_events(
+    owner_id: int, last_event_id: int | None = None
+) -> AsyncIterator[str]:
+    """
+    Yield one owner's task events as Server-Sent Events messages.
+
+    Sends a ``reset`` event first if the client asked to resume from an event
+    that is not in this process's replay buffer, and a comment line as keep-alive
+    whenever the stream is idle. Ends when the subscriber is dropped for being
+    too slow; clients reconnect with ``Last-Event-ID``.
+
+    Args:
+        owner_id: Owner whose task events are streamed
+        last_event_id: Last event the client saw, if reconnecting
+    """
+    subscription, complete = task_event_bus.subscribe(owner_id, last_event_id)
+    try:
+        yield f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"
+        if not complete:
+            # An empty ID makes the client reconnect without Last-Event-ID
+            last_id = task_event_bus.last_id
+            reset_id = "" if last_id is None else last_id
+            yield f"id: {reset_id}\nevent: reset\ndata: {{}}\n\n"
+
+        while not subscription.overflowed:
+            try:
+                task_event = await asyncio.wait_for(
+                    subscription.queue.get(), settings.SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield task_event.to_sse()
+    finally:
+        task_event_bus.unsubscribe(subscription)
+
+
+def _encode(
+    event_id: int, event_type: str, task_id: int, owner_id: int, data: dict | None
+) -> str:
+    """Encode an event as a NOTIFY payload, dropping the body if too large."""
+    message = {
+        "id": event_id,
+        "type": event_type,
+        "task_id": task_id,
+        "owner_id": owner_id,
+    }
+    payload = json.dumps({**message, "task": data}, separators=(",", ":"))
+    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({**message, "task": None}, separators=(",", ":"))
+    return payload
+
+
+async def publish_task_event(
+    db: AsyncSession,
+    event_id: int,
+    event_type: str,
+    task: Task,
+    include_data: bool = True,
+) -> None:
+    """
+    Emit a task event as part of the session's current transaction.
+
+    The event is only delivered if the transaction commits. Call this after
+    the change and its change log entry have been flushed, so that generated
+    values are present.
+
+    Args:
+        db: Database session performing the write
+        event_id: ID of the change log entry recording the change
+        event_type: Event name, e.g. ``task.created``
+        task: Changed task
+        include_data: Whether to embed the serialized task
+    """
+    data = (
+        TaskSchema.model_validate(task).model_dump(mode="json")
+        if include_data
+        else None
+    )
+    await emit_task_event(db, event_id, event_type, task.id, task.owner_id, data)
+
+
+async def emit_task_event(
+    db: AsyncSession,
+    event_id: int,
+    event_type: str,
+    task_id: int,
+    owner_id: int,
+    data: dict | None = None,
+) -> None:
+    """
+    Emit a raw task event as part of the session's current transaction.
+
+    Args:
+        db: Database session performing the write
+        event_id: ID of the change log entry recording the change
+        event_type: Event name
+        task_id: Changed task ID
+        owner_id: Owner of the changed task
+        data: Optional serialized task
+    """
+    if db.bind.dialect.name == "postgresql":
+        payload = _encode(event_id, event_type, task_id, owner_id, data)
+        await db.execute(select(func.pg_notify(settings.TASK_EVENTS_CHANNEL, payload)))
+    else:
+        db.info.setdefault(_PENDING_EVENTS_KEY, []).append(
+            (event_id, event_type, task_id, owner_id, data)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    """Publish events queued by a committed in-process transaction."""
+    for pending in session.info.pop(_PENDING_EVENTS_KEY, ()):
+        task_event_bus.publish(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session: Session, previous_transaction) -> None:
+    """Drop events queued by a rolled back transaction."""
+    session.info.pop(_PENDING_EVENTS_KEY, None)
+
+
+class TaskEventListener:
+    """Single per-process LISTEN connection feeding the event bus."""
+
+    def __init__(self, database_url: str, channel: str):
+        url = make_url(database_url).set(drivername="postgresql")
+        self._dsn = url.render_as_string(hide_password=False)
+        self._channel = channel
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start listening in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        task_event_bus.publish(
+            message["id"],
+            message["type"],
+            message["task_id"],
+            message["owner_id"],
+            message["task"],
+        )
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self._channel, self._on_notification)
+                # Events were missed while not listening; resuming across
+                # the gap would silently skip them
+                task_event_bus.clear_replay()
+                await closed.wait()
+                logger.warning("Task event LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event LISTEN connection failed")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(settings.SSE_LISTEN_RECONNECT_SECONDS)
@@ -0,0 +1,262 @@
+"""
+Group commit: coalesce task writes from concurrent requests.
+
+Each ``COMMIT`` waits for the database to flush its WAL to disk, so under
+write bursts throughput is bounded by fsync latency rather than by work.
+With ``GROUP_COMMIT_ENABLED``, ``TaskService.create_task`` and
+``complete_task`` hand their write to a ``WriteCoalescer`` instead, which
+waits up to ``GROUP_COMMIT_WINDOW_SECONDS`` (or until
+``GROUP_COMMIT_MAX_BATCH`` writes are queued), applies the batch with
+multi-row statements in one transaction and commits once.
+
+A request's future is only resolved after that commit returns, so a
+response is never sent for data that is not durable. If the batch fails
+before ``COMMIT``, each write is retried in its own transaction so one bad
+write cannot fail its neighbours. If ``COMMIT`` itself fails the batch may
+or may not have been applied, so the error goes to every caller instead of
+risking duplicate rows.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.services.events import publish_task_event
+from app.services.sync import SyncService
+from app.utils.exceptions import ForbiddenException, NotFoundException
+
+
+class CommitFailed(Exception):
+    """COMMIT of a batch failed; whether it was applied is unknown."""
+
+
+@dataclass(eq=False)
+class PendingWrite:
+    """A write waiting for the next group commit."""
+
+    kind: str
+    values: dict[str, Any]
+    user: User | None = None
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class WriteCoalescer:
+    """Batches task writes for one database into shared transactions."""
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        window: float,
+        max_batch: int,
+    ):
+        self._sessionmaker = sessionmaker
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: list[PendingWrite] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def create_task(self, values: dict[str, Any]) -> Task:
+        """
+        Insert a task in the next group commit.
+
+        Args:
+            values: Column values of the new task
+
+        Returns:
+            Task: Created task, once committed
+        """
+        return await self._submit(PendingWrite("create", values))
+
+    async def complete_task(self, task_id: int, user: User) -> Task:
+        """
+        Complete a task in the next group commit.
+
+        Args:
+            task_id: Task ID
+            user: Authenticated user
+
+        Returns:
+            Task: Completed task, once committed
+
+        Raises:
+            NotFoundException: If task not found
+            ForbiddenException: If user doesn't own the task
+        """
+        return await self._submit(PendingWrite("complete", {"id": task_id}, user))
+
+    async def drain(self) -> None:
+        """Commit queued writes and wait for in-flight batches."""
+        if self._pending:
+            self._flush_now()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _submit(self, write: PendingWrite) -> Task:
+        self._pending.append(write)
+        if len(self._pending) >= self._max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self._window, self._flush_now
+            )
+        # Shielded: a disconnecting client must not cancel its neighbours' batch
+        return await asyncio.shield(write.future)
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        flush = asyncio.create_task(self._flush(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[PendingWrite]) -> None:
+        try:
+            await self._apply(batch)
+        except CommitFailed as exc:
+            for write in batch:
+                _resolve(write, exc.__cause__)
+        except Exception as exc:
+            if len(batch) == 1:
+                _resolve(batch[0], exc)
+                return
+            for write in batch:
+                try:
+                    await self._apply([write])
+                except Exception as error:
+                    _resolve(write, error)
+
+    async def _apply(self, batch: list[PendingWrite]) -> None:
+        """Apply a batch in one transaction, then resolve its futures."""
+        outcomes: list[tuple[PendingWrite, Task | Exception]] = []
+        async with self._sessionmaker() as session:
+            changed: list[tuple[str, Task]] = []
+
+            creates = [write for write in batch if write.kind == "create"]
+            if creates:
+                result = await session.scalars(
+                    insert(Task).returning(Task, sort_by_parameter_order=True),
+                    [write.values for write in creates],
+                )
+                for write, task in zip(creates, result.all()):
+                    outcomes.append((write, task))
+                    changed.append(("task.created", task))
+
+            completes = [write for write in batch if write.kind == "complete"]
+            if completes:
+                items = await _complete_tasks(session, completes)
+                outcomes.extend(items)
+                completed = {
+                    id(task): task for _, task in items if isinstance(task, Task)
+                }
+                changed.extend(("task.completed", task) for task in completed.values())
+
+            changes = [
+                SyncService.record_change(session, task.id, task.owner_id)
+                for _, task in changed
+            ]
+            await session.flush()
+            for (event_type, task), change in zip(changed, changes):
+                await publish_task_event(session, change.id, event_type, task)
+            try:
+                await session.commit()
+            except Exception as exc:
+                raise CommitFailed() from exc
+
+        for write, outcome in outcomes:
+            _resolve(write, outcome)
+
+
+async def _complete_tasks(
+    session: AsyncSession, writes: list[PendingWrite]
+) -> list[tuple[PendingWrite, Task | Exception]]:
+    """Complete the tasks of a batch the callers may access."""
+    ids = {write.values["id"] for write in writes}
+    result = await session.execute(
+        select(Task.id, Task.owner_id).where(Task.id.in_(ids)).with_for_update()
+    )
+    owners = dict(result.tuples().all())
+
+    allowed = set()
+    outcomes: list[tuple[PendingWrite, Task | Exception]] = []
+    for write in writes:
+        task_id = write.values["id"]
+        if task_id not in owners:
+            outcomes.append((write, NotFoundException("Task not found")))
+        elif owners[task_id] != write.user.id and not write.user.is_superuser:
+            error = ForbiddenException("Not authorized to access this task")
+            outcomes.append((write, error))
+        else:
+            allowed.add(task_id)
+
+    if allowed:
+        result = await session.scalars(
+            update(Task)
+            .where(Task.id.in_(allowed))
+            .values(
+                is_completed=True,
+                completed_at=datetime.utcnow(),
+                status=TaskStatus.COMPLETED.value,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        tasks = {task.id: task for task in result.all()}
+        outcomes.extend(
+            (write, tasks[write.values["id"]])
+            for write in writes
+            if write.values["id"] in allowed
+        )
+    return outcomes
+
+
+def _resolve(write: PendingWrite, outcome: Task | Exception) -> None:
+    if write.future.done():
+        return
+    if isinstance(outcome, Exception):
+        write.future.set_exception(outcome)
+    else:
+        write.future.set_result(outcome)
+
+
+# One coalescer per database (per shard when sharding is enabled)
+_coalescers: dict[AsyncEngine, WriteCoalescer] = {}
+
+
+def get_write_coalescer(bind: AsyncEngine) -> WriteCoalescer:
+    """
+    Get the coalescer for a database, creating it on first use.
+
+    Args:
+        bind: Engine of the database to write to
+    """
+    coalescer = _coalescers.get(bind)
+    if coalescer is None:
+        sessionmaker = async_sessionmaker(
+            bind, class_=AsyncSession, expire_on_commit=False
+        )
+        coalescer = WriteCoalescer(
+            sessionmaker,
+            settings.GROUP_COMMIT_WINDOW_SECONDS,
+            settings.GROUP_COMMIT_MAX_BATCH,
+        )
+        _coalescers[bind] = coalescer
+    return coalescer
+
+
+async def drain_write_coalescers() -> None:
+    """Commit all queued writes; called on shutdown."""
+    await asyncio.gather(*(c.drain() for c in _coalescers.values()))
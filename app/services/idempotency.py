@@ -0,0 +1,182 @@
+"""
+Idempotency key service: claim keys and store the responses they produced.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.exceptions import ConflictException, UnprocessableEntityException
+
+
+class IdempotencyService:
+    """Service for idempotent replays of mutating requests."""
+
+    @staticmethod
+    async def claim(
+        db: AsyncSession, user_id: int, key: str, fingerprint: str
+    ) -> IdempotencyKey | None:
+        """
+        Claim a key for a new request, or get the response already stored.
+
+        The unique index on ``(user_id, key)`` decides which of several
+        concurrent requests runs. The others poll until it has stored its
+        response. A claim whose ``locked_until`` passed without a response
+        was abandoned (its worker died), and is taken over.
+
+        Args:
+            db: Database session
+            user_id: Caller's user ID
+            key: Idempotency-Key header value
+            fingerprint: Hash of the request method, path and body
+
+        Returns:
+            IdempotencyKey | None: Stored response to replay, or None if the
+            caller holds the key and must run the request
+
+        Raises:
+            UnprocessableEntityException: If the key was used for another request
+            ConflictException: If the first request is still running after
+                ``IDEMPOTENCY_WAIT_SECONDS``
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            now = datetime.utcnow()
+            locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_CLAIM_SECONDS)
+            db.add(
+                IdempotencyKey(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now
+                    + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                    locked_until=locked_until,
+                )
+            )
+            try:
+                await db.commit()
+                return None
+            except IntegrityError:
+                await db.rollback()
+
+            result = await db.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+                )
+            )
+            record = result.scalar_one_or_none()
+            await db.commit()
+            if record is None:
+                # Released by a failed first request: try to claim it again
+                continue
+            if record.expires_at <= now:
+                await IdempotencyService.release(db, user_id, key)
+                continue
+            if record.fingerprint != fingerprint:
+                raise UnprocessableEntityException(
+                    "Idempotency key was already used for a different request"
+                )
+            if record.status_code is not None:
+                return record
+            if record.locked_until is None or record.locked_until <= now:
+                # Only one of several retries wins the takeover
+                taken = await db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.id == record.id,
+                        IdempotencyKey.status_code.is_(None),
+                        IdempotencyKey.locked_until == record.locked_until,
+                    )
+                    .values(locked_until=locked_until)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                if taken.rowcount == 1:
+                    return None
+                continue
+            if time.monotonic() >= deadline:
+                raise ConflictException(
+                    "A request with this idempotency key is still in progress"
+                )
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+    @staticmethod
+    async def complete(
+        db: AsyncSession,
+        user_id: int,
+        key: str,
+        status_code: int,
+        content_type: str | None,
+        body: bytes,
+    ) -> None:
+        """
+        Store the response of a claimed key.
+
+        Args:
+            db: Database session
+            user_id: Caller's user ID
+            key: Claimed key
+            status_code: Response status
+            content_type: Response content type
+            body: Response body
+        """
+        result = await db.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+            )
+        )
+        record = result.scalar_one()
+        record.status_code = status_code
+        record.content_type = content_type
+        record.body = body
+        record.locked_until = None
+        await db.commit()
+
+    @staticmethod
+    async def release(db: AsyncSession, user_id: int, key: str) -> None:
+        """
+        Give up a claimed key so that a retry can run the request again.
+
+        Args:
+            db: Database session
+            user_id: Caller's user ID
+            key: Claimed key
+        """
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+            )
+        )
+        await db.commit()
+
+    @staticmethod
+    async def purge_expired(db: AsyncSession) -> int:
+        """
+        Delete expired keys in batches, each in its own short transaction.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of keys removed
+        """
+        query = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at < datetime.utcnow())
+            .limit(settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+        )
+        removed = 0
+        while True:
+            ids = (await db.execute(query)).scalars().all()
+            if not ids:
+                break
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            await db.commit()
+            removed += len(ids)
+        return removed
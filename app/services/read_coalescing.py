@@ -0,0 +1,165 @@
+"""
+Coalescing of identical concurrent task reads.
+
+A user with the app open on several devices sends the same ``GET /tasks``
+from each of them at once. Reads with the same user, operation and
+parameters that arrive while one is in flight share its database query and
+its serialized JSON instead of issuing their own.
+
+Keys include a per-user write generation that is bumped when a write to
+the user's tasks commits in this process, so a read that starts after a
+write never joins a query that began before it. The shared query runs on
+its own session, since the request that started it may end first.
+"""
+
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import sibling_session
+from app.models.task_change import TaskChange
+from app.models.user import User
+from app.schemas.task import Task as TaskSchema
+from app.services.task import TaskService
+from app.utils.metrics import Counter
+from app.utils.singleflight import SingleFlight
+from app.utils.tracing import span
+
+read_requests = Counter(
+    "taskflow_task_reads_total",
+    "Task read requests served through the coalescing layer.",
+    ("operation",),
+)
+coalesced_reads = Counter(
+    "taskflow_task_reads_coalesced_total",
+    "Task read requests answered by another request's in-flight query.",
+    ("operation",),
+)
+
+# Users whose write generation is tracked before the table is cleared
+MAX_TRACKED_WRITERS = 10000
+
+_flights: SingleFlight[bytes] = SingleFlight()
+# Generations come from one counter, so a value is never handed out twice.
+# Users without an entry are at the floor, which is raised to the latest
+# generation whenever entries are dropped: still newer than any read that
+# started before their last write.
+_write_generations: dict[int, int] = {}
+_generation_floor = 0
+_last_generation = 0
+
+
+def _generation(user_id: int) -> int:
+    """Current write generation of a user."""
+    return _write_generations.get(user_id, _generation_floor)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_owners(session: Session, flush_context) -> None:
+    # Every task write appends to the change log, which names the owner
+    owners = {obj.owner_id for obj in session.new if isinstance(obj, TaskChange)}
+    if owners:
+        session.info.setdefault("written_task_owners", set()).update(owners)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_write_generations(session: Session) -> None:
+    global _generation_floor, _last_generation
+    for owner_id in session.info.pop("written_task_owners", ()):
+        _last_generation += 1
+        _write_generations[owner_id] = _last_generation
+    if len(_write_generations) > MAX_TRACKED_WRITERS:
+        _write_generations.clear()
+        _generation_floor = _last_generation
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_written_owners(session: Session, previous_transaction) -> None:
+    if not session.in_transaction():
+        session.info.pop("written_task_owners", None)
+
+
+async def _shared(
+    operation: str, user: User, params: tuple, db: AsyncSession, fn
+) -> bytes:
+    """
+    Run ``fn`` once for all identical concurrent reads by ``user``.
+
+    ``fn`` takes the session to read with: the caller's own when reads are
+    not coalesced, otherwise a new one on the same database.
+    """
+    read_requests.inc(operation=operation)
+    if not settings.READ_COALESCING_ENABLED:
+        return await fn(db)
+
+    async def flight() -> bytes:
+        async with sibling_session(db) as session:
+            return await fn(session)
+
+    key = (
+        operation,
+        user.id,
+        user.is_superuser,
+        _generation(user.id),
+        params,
+    )
+    result, shared = await _flights.do(key, flight)
+    if shared:
+        coalesced_reads.inc(operation=operation)
+    return result
+
+
+async def get_tasks_json(db: AsyncSession, user: User, **params: Any) -> bytes:
+    """
+    ``TaskService.get_tasks`` (Core path) serialized to JSON, coalesced.
+
+    Args:
+        db: Database session
+        user: Authenticated user
+        **params: Keyword arguments for ``TaskService.get_tasks``
+
+    Returns:
+        bytes: JSON response body
+    """
+    if params.get("fields") is not None:
+        params["fields"] = tuple(params["fields"])
+
+    async def read(session: AsyncSession) -> bytes:
+        page = await TaskService.get_tasks(session, user, core=True, **params)
+        with span("serialize"):
+            return page.model_dump_json().encode()
+
+    return await _shared("list", user, tuple(sorted(params.items())), db, read)
+
+
+async def get_task_json(
+    db: AsyncSession, task_id: int, user: User, include_archived: bool = False
+) -> bytes:
+    """
+    ``TaskService.get_task`` (Core path) serialized to JSON, coalesced.
+
+    Args:
+        db: Database session
+        task_id: Task ID
+        user: Authenticated user
+        include_archived: Fall back to the archive
+
+    Returns:
+        bytes: JSON response body
+
+    Raises:
+        NotFoundException: If task not found
+        ForbiddenException: If user doesn't own the task
+    """
+
+    async def read(session: AsyncSession) -> bytes:
+        task = await TaskService.get_task(
+            session, task_id, user, core=True, include_archived=include_archived
+        )
+        with span("serialize"):
+            return TaskSchema.model_validate(task).model_dump_json().encode()
+
+    return await _shared("get", user, (task_id, include_archived), db, read)
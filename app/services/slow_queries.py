@@ -0,0 +1,228 @@
+"""
+Slow-query log with sampled plan capture.
+
+Every SQL statement slower than ``SLOW_QUERY_THRESHOLD_SECONDS`` is logged
+with redacted parameters, the service method that ran it and the route
+being served. For a ``SLOW_QUERY_EXPLAIN_SAMPLE_RATE`` fraction of them the
+plan is captured on a separate connection (``EXPLAIN (ANALYZE, BUFFERS)``
+on PostgreSQL, ``EXPLAIN QUERY PLAN`` on SQLite) and kept in a bounded
+buffer for the admin API. Plans show the values a statement ran with, so
+string literals are scrubbed from them like parameters are.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import sys
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.database import statement_elapsed
+from app.utils.log import request_scope
+from app.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+slow_queries = Counter(
+    "taskflow_slow_queries_total",
+    "SQL statements slower than the slow-query threshold.",
+)
+
+
+@dataclass
+class SlowQuery:
+    """A slow statement and, once captured, its plan."""
+
+    captured_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    service: str | None
+    route: str | None
+    request_id: str | None
+    plan: str | None = None
+
+
+# Quoted literals in plan text ('' escapes a quote), e.g. 'todo'::text
+_PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+# Row locking clauses: such SELECTs wait for and take locks when re-run
+_LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(?:UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE
+)
+
+# Most recent slow queries with captured plans, newest last
+captured_plans: deque[SlowQuery] = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+
+# Set while a plan is captured, so the EXPLAIN itself is not captured
+_capturing: ContextVar[bool] = ContextVar("capturing_plan", default=False)
+_pending_captures: set[asyncio.Task] = set()
+
+
+def redact(parameters: Any) -> Any:
+    """
+    Hide parameter values that may hold user data.
+
+    Numbers, booleans and NULLs (IDs, limits, flags) are kept; anything
+    else is replaced by its type name.
+    """
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (bool, int, float)):
+        return parameters
+    return f"<{type(parameters).__name__}>"
+
+
+def scrub_plan(plan: str) -> str:
+    """
+    Hide the literals of a query plan.
+
+    Quoted literals (strings, timestamps, arrays) are replaced, as
+    ``redact`` does for parameters; bare numbers are kept.
+    """
+    return _PLAN_LITERAL.sub("'<redacted>'", plan)
+
+
+def _is_plain_select(statement: str) -> bool:
+    """Check if a statement is a SELECT that takes no row locks."""
+    return statement.lstrip().upper().startswith(
+        "SELECT"
+    ) and not _LOCKING_CLAUSE.search(statement)
+
+
+def _calling_service() -> str | None:
+    """
+    Name the innermost ``app.services`` function on the stack.
+
+    Statements run in a greenlet whose stack ends at SQLAlchemy's async
+    bridge; the awaiting coroutines are found on the parent greenlet's.
+    """
+    frame = sys._getframe(1)
+    current = getcurrent()
+    while current is not None:
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith("app.services.") and module != __name__:
+                return frame.f_code.co_qualname
+            frame = frame.f_back
+        current = current.parent
+        frame = current.gr_frame if current is not None else None
+    return None
+
+
+def _current_route() -> tuple[str | None, str | None]:
+    """Route template and request ID of the request being served."""
+    scope = request_scope.get()
+    if scope is None:
+        return None, None
+    route = getattr(scope.get("route"), "path", None) or scope.get("path")
+    return route, scope.get("state", {}).get("request_id")
+
+
+async def capture_plan(bind: AsyncEngine, query: SlowQuery, parameters: Any) -> None:
+    """
+    Run the plan of a slow statement on its own connection and keep it.
+
+    The statement is re-run in a read-only transaction that is rolled
+    back, with a statement timeout on PostgreSQL. Literals are scrubbed
+    from the plan before it is kept.
+
+    Args:
+        bind: Engine the statement ran on
+        query: Slow query to attach the plan to
+        parameters: Original (unredacted) DBAPI parameters
+    """
+    _capturing.set(True)
+    try:
+        if bind.dialect.name == "postgresql":
+            timeout_ms = int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS * 1000)
+            async with bind.execution_options(
+                postgresql_readonly=True
+            ).connect() as conn:
+                await conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {timeout_ms}"
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {query.statement}", parameters
+                )
+                query.plan = scrub_plan("\n".join(row[0] for row in result))
+                await conn.rollback()
+        else:
+            async with bind.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {query.statement}", parameters
+                )
+                query.plan = scrub_plan("\n".join(str(row[-1]) for row in result))
+                await conn.rollback()
+    except Exception:
+        logger.warning("Could not capture query plan", exc_info=True)
+        return
+    captured_plans.append(query)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_slow_query(
+    conn: Connection, cursor, statement: str, parameters, context, executemany
+) -> None:
+    """Log statements over the threshold and sample some for plan capture."""
+    elapsed = statement_elapsed(context)
+    if (
+        elapsed is None
+        or elapsed < settings.SLOW_QUERY_THRESHOLD_SECONDS
+        or not settings.SLOW_QUERY_LOG_ENABLED
+        or _capturing.get()
+    ):
+        return
+
+    route, request_id = _current_route()
+    query = SlowQuery(
+        captured_at=datetime.now(timezone.utc),
+        duration_ms=round(elapsed * 1000, 2),
+        statement=statement,
+        parameters=(f"<{len(parameters)} rows>" if executemany else redact(parameters)),
+        service=_calling_service(),
+        route=route,
+        request_id=request_id,
+    )
+    slow_queries.inc()
+    logger.warning(
+        "Slow query (%.0f ms) in %s",
+        query.duration_ms,
+        query.service or "unknown caller",
+        extra={
+            "duration_ms": query.duration_ms,
+            "statement": statement,
+            "parameters": query.parameters,
+            "service": query.service,
+            "route": route,
+        },
+    )
+
+    # Only single SELECTs without row locks are re-run: EXPLAIN ANALYZE
+    # executes the statement
+    if (
+        executemany
+        or not _is_plain_select(statement)
+        or random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        or len(_pending_captures) >= settings.SLOW_QUERY_MAX_PENDING_CAPTURES
+    ):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(capture_plan(AsyncEngine(conn.engine), query, parameters))
+    _pending_captures.add(task)
+    task.add_done_callback(_pending_captures.discard)
@@ -0,0 +1,267 @@
+"""
+Delta sync service: task changes since a sync token.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import BigInteger, Text, cast, delete, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import ColumnElement
+
+from app.config import settings
+from app.models.task import Task
+from app.models.task_change import TaskChange
+from app.models.user import User
+from app.schemas.sync import TaskChanges
+from app.utils.exceptions import BadRequestException
+
+
+def encode_sync_token(xid: int, seq: int) -> str:
+    """
+    Build a sync token for a position in the change log.
+
+    The issue time is embedded so that tokens older than the tombstone
+    retention period can be recognised without server-side state.
+
+    Args:
+        xid: Writing transaction of the last entry seen (0 without one)
+        seq: Sequence number of the last entry seen
+    """
+    return f"{xid}.{seq}.{int(time.time())}"
+
+
+def decode_sync_token(token: str) -> tuple[int, int, int] | None:
+    """
+    Parse a sync token.
+
+    Tokens without exactly three parts, such as those issued before entries
+    were ordered by transaction, have no position in that order.
+
+    Returns:
+        tuple | None: (transaction, sequence number, issue time as a Unix
+        timestamp), or None if the client must download its full task list
+
+    Raises:
+        BadRequestException: If the token is malformed
+    """
+    try:
+        parts = [int(part) for part in token.split(".")]
+    except ValueError:
+        raise BadRequestException("Invalid sync token")
+    if min(parts) < 0:
+        raise BadRequestException("Invalid sync token")
+    if len(parts) != 3:
+        return None
+    xid, seq, issued_at = parts
+    return xid, seq, issued_at
+
+
+async def _commit_horizon(db: AsyncSession) -> int | None:
+    """
+    Oldest transaction still running, on PostgreSQL.
+
+    Every transaction with a lower ID has finished, so no change log entry
+    below the horizon can appear any more. Change log IDs come from a
+    sequence and are handed out before commit, so reading past an entry
+    whose transaction is still running would skip it for good once it
+    commits. Other databases return None; they serialize writers, so IDs
+    follow commit order.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    result = await db.execute(
+        text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+    )
+    return result.scalar_one()
+
+
+class SyncService:
+    """Service for delta sync of tasks."""
+
+    @staticmethod
+    def writing_transaction(db: AsyncSession) -> ColumnElement[int] | None:
+        """
+        SQL for the ID of the current transaction, on PostgreSQL.
+
+        Stored in ``TaskChange.xid`` by every change log insert. It is set
+        explicitly rather than as a column default, so that databases built
+        by migrations get it too. Other databases return None.
+        """
+        if db.bind.dialect.name != "postgresql":
+            return None
+        return cast(cast(func.pg_current_xact_id(), Text), BigInteger)
+
+    @staticmethod
+    def record_change(
+        db: AsyncSession, task_id: int, owner_id: int, deleted: bool = False
+    ) -> TaskChange:
+        """
+        Append a change log entry as part of the current transaction.
+
+        The entry gets its ID, which is also the change's event ID, when the
+        session is flushed.
+
+        Args:
+            db: Database session performing the write
+            task_id: Changed task ID
+            owner_id: Owner of the changed task
+            deleted: Whether the task was deleted (tombstone)
+
+        Returns:
+            TaskChange: The pending entry
+        """
+        change = TaskChange(
+            task_id=task_id,
+            owner_id=owner_id,
+            deleted=deleted,
+            xid=SyncService.writing_transaction(db),
+        )
+        db.add(change)
+        return change
+
+    @staticmethod
+    async def get_changes(
+        db: AsyncSession, user: User, since: str | None, limit: int
+    ) -> TaskChanges:
+        """
+        Get tasks created, updated or deleted after a sync token.
+
+        Reads the change log through ``ix_task_changes_owner_seq`` (or
+        ``ix_task_changes_owner_xid_seq`` on PostgreSQL), so the cost depends
+        on the number of changes, not the number of tasks. On PostgreSQL
+        only entries of finished transactions are read, in transaction
+        order, so a change committing late is never skipped; it is just
+        synced a little later. Without a token, with one older than the
+        tombstone retention period or with one not in the current format,
+        ``reset`` is set and the client must download its full task list
+        before syncing from ``next_token``.
+
+        Args:
+            db: Database session
+            user: Authenticated user
+            since: Sync token from a previous response
+            limit: Maximum number of change log entries to read
+
+        Returns:
+            TaskChanges: Changed tasks, deleted task IDs and the next token
+
+        Raises:
+            BadRequestException: If the token is malformed
+        """
+        xid, seq, stale = 0, 0, False
+        if since is not None:
+            position = decode_sync_token(since)
+            if position is None:
+                stale = True
+            else:
+                xid, seq, issued_at = position
+                retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+                stale = time.time() - issued_at > retention.total_seconds()
+        horizon = await _commit_horizon(db)
+
+        if since is None or stale:
+            if horizon is not None:
+                # The full download sees every transaction below the horizon
+                next_token = encode_sync_token(horizon, 0)
+            else:
+                head = await db.execute(
+                    select(func.max(TaskChange.id)).where(
+                        TaskChange.owner_id == user.id
+                    )
+                )
+                next_token = encode_sync_token(0, head.scalar() or 0)
+            return TaskChanges(
+                tasks=[], deleted=[], next_token=next_token, has_more=False, reset=True
+            )
+
+        query = select(
+            TaskChange.xid, TaskChange.id, TaskChange.task_id, TaskChange.deleted
+        ).where(TaskChange.owner_id == user.id)
+        if horizon is not None:
+            query = query.where(
+                tuple_(TaskChange.xid, TaskChange.id) > tuple_(xid, seq),
+                TaskChange.xid < horizon,
+            ).order_by(TaskChange.xid, TaskChange.id)
+        else:
+            query = query.where(TaskChange.id > seq).order_by(TaskChange.id)
+        result = await db.execute(query.limit(limit + 1))
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Later entries for the same task supersede earlier ones
+        latest: dict[int, bool] = {}
+        for _, _, task_id, deleted in rows:
+            latest[task_id] = deleted
+
+        upserted = [task_id for task_id, deleted in latest.items() if not deleted]
+        tasks: list[Task] = []
+        if upserted:
+            task_result = await db.execute(
+                select(Task).where(Task.id.in_(upserted), Task.owner_id == user.id)
+            )
+            tasks = list(task_result.scalars().all())
+        # Tasks missing here were deleted since; their tombstone may sort
+        # before this page's entry (transaction order) or come later
+        found = {task.id for task in tasks}
+        deleted = [
+            task_id
+            for task_id, is_deleted in latest.items()
+            if is_deleted or task_id not in found
+        ]
+
+        if rows:
+            xid, seq = rows[-1][0] or 0, rows[-1][1]
+        return TaskChanges(
+            tasks=tasks,
+            deleted=deleted,
+            next_token=encode_sync_token(xid, seq),
+            has_more=has_more,
+        )
+
+    @staticmethod
+    async def compact_changes(db: AsyncSession) -> int:
+        """
+        Compact the change log.
+
+        Removes entries superseded by a later entry for the same task, and
+        tombstones older than the retention period. Work is done in batches
+        so each transaction stays short.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of entries removed
+        """
+        batch_size = settings.SYNC_COMPACTION_BATCH_SIZE
+        cutoff = datetime.utcnow() - timedelta(
+            days=settings.SYNC_TOMBSTONE_RETENTION_DAYS
+        )
+        newer = aliased(TaskChange)
+        candidates = (
+            select(TaskChange.id)
+            .where(
+                select(newer.id)
+                .where(newer.task_id == TaskChange.task_id, newer.id > TaskChange.id)
+                .exists()
+            )
+            .limit(batch_size),
+            select(TaskChange.id)
+            .where(TaskChange.deleted.is_(True), TaskChange.changed_at < cutoff)
+            .limit(batch_size),
+        )
+
+        removed = 0
+        for query in candidates:
+            while True:
+                ids = (await db.execute(query)).scalars().all()
+                if not ids:
+                    break
+                await db.execute(delete(TaskChange).where(TaskChange.id.in_(ids)))
+                await db.commit()
+                removed += len(ids)
+
+        return removed
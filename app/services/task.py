@@ -2,25 +2,154 @@
 Task service for CRUD operations on tasks.
 """
 
-from datetime import datetime
-
-from sqlalchemy import func, select
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    Integer,
+    Result,
+    Select,
+    bindparam,
+    cast,
+    func,
+    null,
+    select,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
-from app.models.task import Task, TaskStatus
+from app.config import settings
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.task_archive import TaskArchive
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskList, TaskUpdate
-from app.utils.exceptions import ForbiddenException, NotFoundException
+from app.schemas.task import (
+    DEFAULT_TASK_LIST_FIELDS,
+    TASK_FIELDS,
+    TaskCreate,
+    TaskUpdate,
+    get_task_list_schema,
+)
+from app.services.events import emit_task_event, publish_task_event
+from app.services.group_commit import get_write_coalescer
+from app.services.sync import SyncService
+from app.utils.exceptions import (
+    BadRequestException,
+    ConflictException,
+    ForbiddenException,
+    NotFoundException,
+)
+from app.utils.tracing import trace_methods
+
+# Order in which the work queue hands out tasks
+CLAIM_PRIORITY_ORDER = (TaskPriority.HIGH, TaskPriority.MEDIUM, TaskPriority.LOW)
+
+# Hot lookups, built once with bound parameters. Reusing a statement object
+# skips building it and generating its cache key (which is memoized on the
+# object) on every request; only the parameter values change.
+TASK_BY_ID = select(Task).where(Task.id == bindparam("task_id"))
+OWNED_TASK_BY_ID = TASK_BY_ID.where(Task.owner_id == bindparam("owner_id"))
+TASK_RECORD_BY_ID = select(*Task.__table__.columns).where(
+    Task.id == bindparam("task_id")
+)
+OWNED_TASK_RECORD_BY_ID = TASK_RECORD_BY_ID.where(
+    Task.owner_id == bindparam("owner_id")
+)
+
+
+def _lease_expiry(lease_seconds: int | None) -> datetime:
+    """Compute a lease expiry, validating the requested duration."""
+    seconds = lease_seconds or settings.TASK_LEASE_SECONDS
+    if seconds > settings.TASK_LEASE_MAX_SECONDS:
+        raise BadRequestException(
+            f"Lease cannot exceed {settings.TASK_LEASE_MAX_SECONDS} seconds"
+        )
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+@lru_cache(maxsize=512)
+def _list_statements(
+    fields: frozenset[str],
+    status: bool,
+    priority: bool,
+    core: bool,
+    include_archived: bool,
+) -> tuple[Select, Select]:
+    """
+    Count and page queries of a task list, built once per shape.
+
+    Shapes differ by the selected fields, the filters in use and the read
+    path; see ``TaskService._list_filters`` for the bound values, plus
+    ``skip`` and ``limit``.
+    """
+    filters = TaskService._list_filters(Task, status, priority)
+    archive_filters = TaskService._list_filters(TaskArchive, status, priority)
+
+    if include_archived:
+        ids = union_all(
+            select(Task.id).where(*filters),
+            select(TaskArchive.id).where(*archive_filters),
+        )
+        count_query = select(func.count()).select_from(ids.subquery())
+    else:
+        count_query = select(func.count()).select_from(Task).where(*filters)
+
+    # Load only the selected columns, then apply pagination and order
+    if include_archived:
+        # Both halves need the sort key and identical column order
+        names = sorted(fields | {"created_at"})
+        combined = union_all(
+            select(*(Task.__table__.c[name] for name in names)).where(*filters),
+            select(*TaskService._archive_columns(names)).where(*archive_filters),
+        ).subquery()
+        query = select(combined).order_by(
+            combined.c.created_at.desc(), combined.c.id.desc()
+        )
+    elif core:
+        query = select(*(Task.__table__.c[name] for name in sorted(fields)))
+        query = query.where(*filters).order_by(Task.created_at.desc())
+    else:
+        query = select(Task).options(
+            load_only(*(getattr(Task, name) for name in fields), raiseload=True)
+        )
+        query = query.where(*filters).order_by(Task.created_at.desc())
+    query = query.offset(bindparam("skip", type_=Integer)).limit(
+        bindparam("limit", type_=Integer)
+    )
+    return count_query, query
 
 
+@trace_methods
 class TaskService:
     """Service for handling task operations."""
 
+    @staticmethod
+    async def _task_changed(
+        db: AsyncSession, event_type: str, task: Task, deleted: bool = False
+    ) -> None:
+        """
+        Record a task write in the sync log and the change feed.
+
+        Must be called inside the writing transaction, after flush.
+        """
+        change = SyncService.record_change(db, task.id, task.owner_id, deleted=deleted)
+        await db.flush()
+        await publish_task_event(
+            db, change.id, event_type, task, include_data=not deleted
+        )
+
     @staticmethod
     async def create_task(db: AsyncSession, task_data: TaskCreate, user: User) -> Task:
         """
         Create a new task for the authenticated user.
 
+        With ``GROUP_COMMIT_ENABLED`` the insert is committed together with
+        concurrent writes (see ``app.services.group_commit``).
+
         Args:
             db: Database session
             task_data: Task creation data
@@ -29,23 +158,33 @@ class TaskService:
         Returns:
             Task: Created task
         """
-        db_task = Task(
-            title=task_data.title,
-            description=task_data.description,
-            priority=task_data.priority.value,
-            status=task_data.status.value,
-            due_date=task_data.due_date,
-            owner_id=user.id,
-        )
-
+        values = {
+            "title": task_data.title,
+            "description": task_data.description,
+            "priority": task_data.priority.value,
+            "status": task_data.status.value,
+            "due_date": task_data.due_date,
+            "owner_id": user.id,
+        }
+        if settings.GROUP_COMMIT_ENABLED:
+            return await get_write_coalescer(db.bind).create_task(values)
+
+        db_task = Task(**values)
         db.add(db_task)
+        await db.flush()
+        await TaskService._task_changed(db, "task.created", db_task)
         await db.commit()
-        await db.refresh(db_task)
 
         return db_task
 
     @staticmethod
-    async def get_task(db: AsyncSession, task_id: int, user: User) -> Task:
+    async def get_task(
+        db: AsyncSession,
+        task_id: int,
+        user: User,
+        core: bool = False,
+        include_archived: bool = False,
+    ) -> Task | dict[str, Any]:
         """
         Get a specific task by ID.
 
@@ -53,25 +192,58 @@ class TaskService:
             db: Database session
             task_id: Task ID
             user: Authenticated user
+            core: Return a plain record instead of an ORM instance
+            include_archived: Fall back to the archive (returned as a record)
 
         Returns:
-            Task: Requested task
+            Task | dict: Requested task
 
         Raises:
             NotFoundException: If task not found
             ForbiddenException: If user doesn't own the task
         """
-        result = await db.execute(select(Task).where(Task.id == task_id))
-        task = result.scalar_one_or_none()
+        # Scoping by owner lets a partitioned table prune to one partition;
+        # the unscoped lookup only runs to tell a 403 from a 404.
+        params = {"task_id": task_id}
+        if not user.is_superuser:
+            params["owner_id"] = user.id
+        task = await TaskService._find_task(db, params, core)
+        if not task and not user.is_superuser:
+            task = await TaskService._find_task(db, {"task_id": task_id}, core)
+        owner_id = None
+        if task:
+            owner_id = task["owner_id"] if core else task.owner_id
+
+        if not task and include_archived:
+            query = select(
+                *TaskService._archive_columns(Task.__table__.columns.keys())
+            ).where(TaskArchive.id == task_id)
+            records = TaskService._records(await db.execute(query))
+            task = records[0] if records else None
+            owner_id = task["owner_id"] if task else None
 
         if not task:
             raise NotFoundException("Task not found")
 
-        if task.owner_id != user.id and not user.is_superuser:
+        if owner_id != user.id and not user.is_superuser:
             raise ForbiddenException("Not authorized to access this task")
 
         return task
 
+    @staticmethod
+    async def _find_task(
+        db: AsyncSession, params: dict[str, int], core: bool
+    ) -> Task | dict[str, Any] | None:
+        """Look up a single task by ID (and owner, if given)."""
+        owned = "owner_id" in params
+        if core:
+            query = OWNED_TASK_RECORD_BY_ID if owned else TASK_RECORD_BY_ID
+            records = TaskService._records(await db.execute(query, params))
+            return records[0] if records else None
+        query = OWNED_TASK_BY_ID if owned else TASK_BY_ID
+        result = await db.execute(query, params)
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_tasks(
         db: AsyncSession,
@@ -80,10 +252,25 @@ class TaskService:
         limit: int = 20,
         status: str | None = None,
         priority: str | None = None,
-    ) -> TaskList:
+        fields: Iterable[str] | None = None,
+        core: bool = False,
+        include_archived: bool = False,
+    ) -> BaseModel:
         """
         Get paginated list of tasks for the authenticated user.
 
+        Only the selected fields are loaded from the database and
+        serialized. By default every field except ``description`` is
+        returned.
+
+        With ``core`` the page is fetched with a Core select and returned as
+        plain records: no ORM instances, attribute instrumentation or identity
+        map entries are created, and the schemas validate dicts much faster
+        than attribute access. Use it for read-only callers.
+
+        With ``include_archived`` archived tasks are listed too; the page is
+        then always read through Core.
+
         Args:
             db: Database session
             user: Authenticated user
@@ -91,36 +278,43 @@ class TaskService:
             limit: Maximum number of records to return
             status: Optional status filter
             priority: Optional priority filter
+            fields: Optional task fields to return (``id`` is always included)
+            core: Read rows through Core instead of hydrating ORM instances
+            include_archived: Also list tasks from the archive
 
         Returns:
-            TaskList: Paginated task list
-        """
-        # Build query
-        query = select(Task).where(Task.owner_id == user.id)
+            BaseModel: Paginated task list (``TaskList`` restricted to the
+            selected fields)
 
-        # Apply filters
+        Raises:
+            BadRequestException: If an unknown field is requested
+        """
+        selected = TaskService._select_fields(fields)
+        count_query, query = _list_statements(
+            selected, bool(status), bool(priority), core, include_archived
+        )
+        params = {"owner_id": user.id, "skip": skip, "limit": limit}
         if status:
-            query = query.where(Task.status == status)
+            params["status"] = status
         if priority:
-            query = query.where(Task.priority == priority)
+            params["priority"] = priority
 
         # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
+        total_result = await db.execute(count_query, params)
         total = total_result.scalar()
 
-        # Apply pagination and order
-        query = query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
-
         # Execute query
-        result = await db.execute(query)
-        tasks = result.scalars().all()
+        result = await db.execute(query, params)
+        if core or include_archived:
+            tasks = TaskService._records(result)
+        else:
+            tasks = result.scalars().all()
 
         # Calculate pagination info
         page = (skip // limit) + 1 if limit > 0 else 1
         total_pages = (total + limit - 1) // limit if limit > 0 else 1
 
-        return TaskList(
+        return get_task_list_schema(selected)(
             tasks=list(tasks),
             total=total,
             page=page,
@@ -128,6 +322,54 @@ class TaskService:
             total_pages=total_pages,
         )
 
+    @staticmethod
+    def _list_filters(
+        model: type[Task] | type[TaskArchive], status: bool, priority: bool
+    ) -> list:
+        """
+        Build the WHERE clauses of a task list query for a table.
+
+        Values are bound at execution: ``owner_id``, plus ``status`` and
+        ``priority`` when filtering on them.
+        """
+        filters = [model.owner_id == bindparam("owner_id")]
+        if status:
+            filters.append(model.status == bindparam("status"))
+        if priority:
+            filters.append(model.priority == bindparam("priority"))
+        return filters
+
+    @staticmethod
+    def _archive_columns(names: Iterable[str]) -> list:
+        """Select task columns from the archive, as NULL where it has none."""
+        archive = TaskArchive.__table__.c
+        return [
+            archive[name]
+            if name in archive
+            else cast(null(), Task.__table__.c[name].type).label(name)
+            for name in names
+        ]
+
+    @staticmethod
+    def _records(result: Result) -> list[dict[str, Any]]:
+        """Turn Core result rows into plain dicts keyed by column name."""
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result]
+
+    @staticmethod
+    def _select_fields(fields: Iterable[str] | None) -> frozenset[str]:
+        """Validate a requested field set for task lists."""
+        if fields is None:
+            return DEFAULT_TASK_LIST_FIELDS
+
+        selected = frozenset(fields) | {"id"}
+        unknown = selected - TASK_FIELDS
+        if unknown:
+            raise BadRequestException(
+                f"Unknown task fields: {', '.join(sorted(unknown))}"
+            )
+        return selected
+
     @staticmethod
     async def update_task(
         db: AsyncSession, task_id: int, task_data: TaskUpdate, user: User
@@ -160,8 +402,9 @@ class TaskService:
                 else:
                     setattr(task, field, value)
 
+        await db.flush()
+        await TaskService._task_changed(db, "task.updated", task)
         await db.commit()
-        await db.refresh(task)
 
         return task
 
@@ -180,6 +423,7 @@ class TaskService:
             ForbiddenException: If user doesn't own the task
         """
         task = await TaskService.get_task(db, task_id, user)
+        await TaskService._task_changed(db, "task.deleted", task, deleted=True)
         await db.delete(task)
         await db.commit()
 
@@ -188,6 +432,8 @@ class TaskService:
         """
         Mark a task as completed.
 
+        With ``GROUP_COMMIT_ENABLED`` the update is group committed.
+
         Args:
             db: Database session
             task_id: Task ID
@@ -200,13 +446,207 @@ class TaskService:
             NotFoundException: If task not found
             ForbiddenException: If user doesn't own the task
         """
+        if settings.GROUP_COMMIT_ENABLED:
+            return await get_write_coalescer(db.bind).complete_task(task_id, user)
+
         task = await TaskService.get_task(db, task_id, user)
 
         task.is_completed = True
         task.completed_at = datetime.utcnow()
         task.status = TaskStatus.COMPLETED.value
+        task.lease_owner = None
+        task.lease_expires_at = None
 
+        await db.flush()
+        await TaskService._task_changed(db, "task.completed", task)
         await db.commit()
-        await db.refresh(task)
 
         return task
+
+    @staticmethod
+    async def claim_task(
+        db: AsyncSession, user: User, worker_id: str, lease_seconds: int | None = None
+    ) -> Task | None:
+        """
+        Claim the next queued task for a worker.
+
+        Picks the highest-priority, oldest ``todo`` task, moves it to
+        ``in_progress`` and leases it to the worker. Rows locked by concurrent
+        claims are skipped (``FOR UPDATE SKIP LOCKED``) so workers never queue
+        up behind each other. Each priority is probed separately so every
+        lookup is a plain range scan on ``ix_tasks_queue``.
+
+        Args:
+            db: Database session
+            user: Authenticated user owning the queue
+            worker_id: Identifier of the claiming worker
+            lease_seconds: Optional lease duration (defaults to settings)
+
+        Returns:
+            Task | None: Claimed task, or None if the queue is empty
+
+        Raises:
+            BadRequestException: If the lease duration is too long
+        """
+        expires_at = _lease_expiry(lease_seconds)
+
+        task = None
+        for priority in CLAIM_PRIORITY_ORDER:
+            query = (
+                select(Task)
+                .where(
+                    Task.owner_id == user.id,
+                    Task.status == TaskStatus.TODO.value,
+                    Task.priority == priority.value,
+                )
+                .order_by(Task.created_at, Task.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(query)
+            task = result.scalar_one_or_none()
+            if task is not None:
+                break
+
+        if task is None:
+            return None
+
+        task.status = TaskStatus.IN_PROGRESS.value
+        task.lease_owner = worker_id
+        task.lease_expires_at = expires_at
+
+        await db.flush()
+        await TaskService._task_changed(db, "task.claimed", task)
+        await db.commit()
+
+        return task
+
+    @staticmethod
+    async def _get_leased_task(
+        db: AsyncSession, task_id: int, user: User, worker_id: str
+    ) -> Task:
+        """
+        Get a task whose lease is currently held by the given worker.
+
+        Raises:
+            NotFoundException: If task not found
+            ForbiddenException: If user doesn't own the task
+            ConflictException: If the worker does not hold a live lease
+        """
+        task = await TaskService.get_task(db, task_id, user)
+
+        if (
+            task.lease_owner != worker_id
+            or task.lease_expires_at is None
+            or task.lease_expires_at <= datetime.utcnow()
+        ):
+            raise ConflictException("Lease is not held by this worker")
+
+        return task
+
+    @staticmethod
+    async def renew_lease(
+        db: AsyncSession,
+        task_id: int,
+        user: User,
+        worker_id: str,
+        lease_seconds: int | None = None,
+    ) -> Task:
+        """
+        Extend the lease on a claimed task (worker heartbeat).
+
+        Args:
+            db: Database session
+            task_id: Task ID
+            user: Authenticated user
+            worker_id: Worker holding the lease
+            lease_seconds: Optional new lease duration (defaults to settings)
+
+        Returns:
+            Task: Task with the extended lease
+
+        Raises:
+            NotFoundException: If task not found
+            ForbiddenException: If user doesn't own the task
+            ConflictException: If the worker does not hold a live lease
+        """
+        expires_at = _lease_expiry(lease_seconds)
+        task = await TaskService._get_leased_task(db, task_id, user, worker_id)
+
+        task.lease_expires_at = expires_at
+
+        await db.commit()
+
+        return task
+
+    @staticmethod
+    async def release_lease(
+        db: AsyncSession, task_id: int, user: User, worker_id: str
+    ) -> Task:
+        """
+        Give up a lease and return the task to the queue.
+
+        Args:
+            db: Database session
+            task_id: Task ID
+            user: Authenticated user
+            worker_id: Worker holding the lease
+
+        Returns:
+            Task: Task back in ``todo`` status
+
+        Raises:
+            NotFoundException: If task not found
+            ForbiddenException: If user doesn't own the task
+            ConflictException: If the worker does not hold a live lease
+        """
+        task = await TaskService._get_leased_task(db, task_id, user, worker_id)
+
+        task.status = TaskStatus.TODO.value
+        task.lease_owner = None
+        task.lease_expires_at = None
+
+        await db.flush()
+        await TaskService._task_changed(db, "task.released", task)
+        await db.commit()
+
+        return task
+
+    @staticmethod
+    async def release_expired_leases(db: AsyncSession) -> int:
+        """
+        Return tasks with expired leases to the queue.
+
+        Args:
+            db: Database session
+
+        Returns:
+            int: Number of tasks returned to the queue
+        """
+        result = await db.execute(
+            update(Task)
+            .where(
+                Task.lease_expires_at < datetime.utcnow(),
+                Task.status == TaskStatus.IN_PROGRESS.value,
+            )
+            .values(
+                status=TaskStatus.TODO.value,
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+            .returning(Task.id, Task.owner_id)
+            .execution_options(synchronize_session=False)
+        )
+        released = result.all()
+        changes = [
+            SyncService.record_change(db, task_id, owner_id)
+            for task_id, owner_id in released
+        ]
+        await db.flush()
+        for change in changes:
+            await emit_task_event(
+                db, change.id, "task.released", change.task_id, change.owner_id
+            )
+        await db.commit()
+
+        return len(released)
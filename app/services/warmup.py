@@ -0,0 +1,128 @@
+"""
+Startup warm-up, so the first requests after a deploy are not the slow ones.
+
+Connections, statement compilation (and, on PostgreSQL, server-side
+prepared statements), dynamically built response schemas, the bcrypt
+backend and the JWT library are all set up lazily on first use;
+``warm_up()`` does that work before the instance reports ready on ``/ready``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app import database
+from app.config import settings
+from app.dependencies import USER_BY_ID
+from app.models.user import User
+from app.schemas.task import DEFAULT_TASK_LIST_FIELDS
+from app.schemas.task import Task as TaskSchema
+from app.schemas.task import get_task_list_schema
+from app.services.task import TaskService
+from app.utils.exceptions import NotFoundException
+from app.utils.security import create_access_token, decode_access_token, get_pwd_context
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_hot_statements(connection: AsyncConnection) -> None:
+    """Run the statements of the hottest endpoints once on a connection."""
+    # Stands in for a real caller; matches no rows
+    nobody = User(id=0, is_superuser=False)
+    async with AsyncSession(bind=connection) as db:
+        await db.execute(USER_BY_ID, {"user_id": nobody.id})
+        await TaskService.get_tasks(db, nobody, core=True)
+        for core in (True, False):
+            try:
+                await TaskService.get_task(db, 0, nobody, core=core)
+            except NotFoundException:
+                pass
+        await db.rollback()
+
+
+async def warm_up_engine(bind: AsyncEngine, connections: int) -> None:
+    """
+    Fill an engine's pool and prepare the hot statements on each connection.
+
+    The connections are held open together, so the pool keeps that many
+    when they are returned.
+
+    Args:
+        bind: Engine to warm up
+        connections: Number of connections to open
+    """
+    opened = await asyncio.gather(
+        *(bind.connect().start() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    try:
+        for connection in opened:
+            if isinstance(connection, BaseException):
+                raise connection
+        # Compiled statements are cached per engine, but PostgreSQL prepares
+        # them per connection
+        await asyncio.gather(*(_run_hot_statements(c) for c in opened))
+    finally:
+        for connection in opened:
+            if isinstance(connection, AsyncConnection):
+                await connection.close()
+
+
+def warm_up_serializers() -> None:
+    """Build and exercise the response schemas of the task endpoints."""
+    now = datetime.utcnow()
+    sample = {
+        "id": 0,
+        "title": "warm-up",
+        "description": None,
+        "priority": "medium",
+        "status": "todo",
+        "due_date": None,
+        "is_completed": False,
+        "completed_at": None,
+        "created_at": now,
+        "updated_at": now,
+        "owner_id": 0,
+    }
+    TaskSchema.model_validate(sample).model_dump_json()
+    get_task_list_schema(DEFAULT_TASK_LIST_FIELDS)(
+        tasks=[sample], total=1, page=1, page_size=1, total_pages=1
+    ).model_dump_json()
+
+
+def warm_up_password_hashing() -> None:
+    """Load the bcrypt backend, which passlib otherwise does on first login."""
+    get_pwd_context().handler().get_backend()
+
+
+def warm_up_tokens() -> None:
+    """Import the JWT library, which would otherwise block the first request."""
+    decode_access_token(create_access_token(subject=0))
+
+
+async def warm_up() -> None:
+    """
+    Warm up everything, within ``WARMUP_TIMEOUT_SECONDS``.
+
+    Failures are logged, not raised: warm-up only saves time, and a
+    database that is not reachable yet should not keep the instance from
+    ever starting.
+    """
+    connections = min(settings.WARMUP_POOL_CONNECTIONS, settings.DB_POOL_SIZE)
+    binds = list(dict.fromkeys([database.engine, *database.data_engines()]))
+    started = asyncio.get_running_loop().time()
+    try:
+        warm_up_serializers()
+        await asyncio.to_thread(warm_up_password_hashing)
+        await asyncio.to_thread(warm_up_tokens)
+        await asyncio.wait_for(
+            asyncio.gather(*(warm_up_engine(bind, connections) for bind in binds)),
+            settings.WARMUP_TIMEOUT_SECONDS,
+        )
+    except Exception:
+        logger.exception("Warm-up failed; serving without it")
+        return
+    elapsed = asyncio.get_running_loop().time() - started
+    logger.info("Warm-up finished in %.2fs", elapsed)
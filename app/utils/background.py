@@ -0,0 +1,33 @@
+"""
+Helpers for periodic background jobs run inside the application process.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(
+    name: str, interval: float, job: Callable[[], Awaitable[object]]
+) -> None:
+    """
+    Run a job every ``interval`` seconds until cancelled.
+
+    Failures are logged and do not stop the loop, so a transient database
+    error only skips one round.
+
+    Args:
+        name: Job name used in log messages
+        interval: Seconds to wait between runs
+        job: Coroutine function to run
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Background job %s failed", name)
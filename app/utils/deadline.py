@@ -0,0 +1,53 @@
+"""
+Per-request deadlines shared by the HTTP layer and the database session.
+"""
+
+import time
+from contextvars import ContextVar
+
+from sqlalchemy.exc import DBAPIError
+
+# SQLSTATE of query_canceled, raised for statement_timeout and cancel requests
+QUERY_CANCELED = "57014"
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered.
+
+    Also carries cancellation, so work running outside the request's task
+    (such as a SQLite query in its worker thread) can notice that the
+    client went away.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Check if the deadline passed or the request was cancelled."""
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def cancel(self) -> None:
+        """Give up on the request."""
+        self.cancelled = True
+
+
+current_deadline: ContextVar[Deadline | None] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def is_deadline_error(exc: DBAPIError) -> bool:
+    """Check if a database error means a query was stopped by its deadline."""
+    orig = exc.orig
+    for error in (orig, getattr(orig, "__cause__", None)):
+        if getattr(error, "sqlstate", None) == QUERY_CANCELED:
+            return True
+    # SQLite reports queries aborted by the progress handler as interrupted
+    return "interrupted" in str(orig)
@@ -42,3 +42,34 @@ class ConflictException(HTTPException):
 
     def __init__(self, detail: str = "Resource already exists"):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class UnprocessableEntityException(HTTPException):
+    """Exception raised when a well-formed request cannot be processed."""
+
+    def __init__(self, detail: str = "Unprocessable entity"):
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail
+        )
+
+
+class TooManyRequestsException(HTTPException):
+    """Exception raised when a client exceeds its rate limit."""
+
+    def __init__(
+        self,
+        detail: str = "Too many requests",
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers=headers,
+        )
+
+
+class DeadlineExceededException(HTTPException):
+    """Exception raised when a request runs past its deadline."""
+
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
@@ -0,0 +1,136 @@
+"""
+Structured logging: one JSON object per line, written off the event loop.
+
+``configure_logging()`` puts a ``QueueHandler`` on the root logger. It only
+merges the message arguments and attaches the current request's ID and
+user, then queues the record. A ``QueueListener`` thread formats records as
+JSON and writes them out, so neither formatting nor a slow stdout ever
+blocks the event loop.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, TextIO
+
+from starlette.types import Scope
+
+from app.config import settings
+
+# ASGI scope of the request being handled, see AccessLogMiddleware
+request_scope: ContextVar[Scope | None] = ContextVar("request_scope", default=None)
+
+# Attributes of every LogRecord; any other attribute was passed in ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+# Request state copied onto the records logged while handling a request
+_REQUEST_FIELDS = ("request_id", "user_id", "trace_id")
+
+# uvicorn's loggers; the access log is replaced by AccessLogMiddleware
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.asgi")
+
+_listener: QueueListener | None = None
+_listener_pid: int | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestQueueHandler(QueueHandler):
+    """Queue records with the current request's fields, leaving formatting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The record stays in this process, so the formatter can run on the
+        # listener thread; only the arguments are merged here, in case they
+        # change after the call
+        record.msg = record.getMessage()
+        record.args = None
+        scope = request_scope.get()
+        if scope is not None:
+            state = scope.get("state", {})
+            for name in _REQUEST_FIELDS:
+                if name in state and not hasattr(record, name):
+                    setattr(record, name, state[name])
+        return record
+
+
+def _stream_handler(stream: TextIO) -> logging.Handler:
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging(level: str | None = None, stream: TextIO | None = None) -> None:
+    """
+    Send all logging through the JSON writer thread.
+
+    Safe to call again: within a process it only updates the level, while
+    in a forked child (whose parent's writer thread did not survive the
+    fork) it starts a new writer.
+
+    Args:
+        level: Root log level (defaults to ``settings.LOG_LEVEL``)
+        stream: Where lines are written (defaults to stdout)
+    """
+    global _listener, _listener_pid
+    root = logging.getLogger()
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+    if _listener_pid == os.getpid():
+        return
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.handlers[:] = [RequestQueueHandler(records)]
+    for name in _UVICORN_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = True
+    access = logging.getLogger("uvicorn.access")
+    access.handlers.clear()
+    access.propagate = False
+
+    _listener = QueueListener(records, _stream_handler(stream or sys.stdout))
+    _listener.start()
+    _listener_pid = os.getpid()
+
+
+def stop_logging() -> None:
+    """
+    Write out queued records and stop the writer thread.
+
+    Records logged afterwards are written directly by the calling thread.
+    """
+    global _listener, _listener_pid
+    if _listener is None or _listener_pid != os.getpid():
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.handlers[:] = [_stream_handler(_listener.handlers[0].stream)]
+    _listener = _listener_pid = None
@@ -0,0 +1,158 @@
+"""
+Detection of code blocking the event loop.
+
+A heartbeat task on the loop sleeps for ``LOOP_MONITOR_INTERVAL_SECONDS``
+and records how late it wakes up (the loop lag). A watchdog thread checks
+the heartbeat every half ``LOOP_BLOCK_THRESHOLD_SECONDS``; when it is more
+than the threshold overdue the loop is stuck in synchronous code, so the
+watchdog captures the loop thread's stack and the route of the request on
+it. Blocks shorter than one and a half thresholds may end before that and
+are logged without a stack. Once the loop runs again the block is logged
+and counted with its full duration.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import FrameType
+
+from app.config import settings
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+loop_lag = Histogram(
+    "taskflow_event_loop_lag_seconds",
+    "How late the event loop heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+loop_blocks = Counter(
+    "taskflow_event_loop_blocks_total",
+    "Times the event loop was blocked for longer than the threshold.",
+    ("route",),
+)
+
+
+@dataclass
+class LoopBlock:
+    """A stretch of time the event loop spent in synchronous code."""
+
+    detected_at: datetime
+    duration_ms: float
+    route: str | None
+    stack: str | None
+
+
+def _request_route(frame: FrameType | None) -> str | None:
+    """Route of the innermost ASGI call on a stack (``scope`` locals)."""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return getattr(scope.get("route"), "path", None) or scope.get("path")
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    """
+    Heartbeat on an event loop plus a watchdog thread capturing stalls.
+
+    Args:
+        threshold: Seconds of lag that count as blocking
+        interval: Seconds between heartbeats
+        history: Number of recent blocks kept
+    """
+
+    def __init__(self, threshold: float, interval: float, history: int = 50):
+        self.threshold = threshold
+        self.interval = interval
+        self.blocks: deque[LoopBlock] = deque(maxlen=history)
+        self._loop_thread_id: int | None = None
+        self._beat_due = 0.0
+        # Stack and route captured by the watchdog during the current stall
+        self._captured: tuple[str, str | None] | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat_due = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._heartbeat = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat and the watchdog thread."""
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._beat_due)
+            self._beat_due = time.monotonic() + self.interval
+            loop_lag.observe(lag)
+            if lag >= self.threshold:
+                self._record(lag)
+
+    def _record(self, lag: float) -> None:
+        stack, route = self._captured or (None, None)
+        self._captured = None
+        block = LoopBlock(
+            detected_at=datetime.now(timezone.utc),
+            duration_ms=round(lag * 1000, 2),
+            route=route,
+            stack=stack,
+        )
+        self.blocks.append(block)
+        loop_blocks.inc(route=route or "")
+        logger.warning(
+            "Event loop blocked for %.0f ms in %s",
+            block.duration_ms,
+            route or "no request",
+            extra={"duration_ms": block.duration_ms, "route": route, "stack": stack},
+        )
+
+    def _watch(self) -> None:
+        # Twice per threshold: cheap, and catches most blocks mid-way
+        poll = self.threshold / 2
+        while not self._stopped.wait(poll):
+            overdue = time.monotonic() - self._beat_due
+            if overdue < self.threshold or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._captured = (
+                "".join(traceback.format_stack(frame)),
+                _request_route(frame),
+            )
+
+
+# Monitor of this worker's event loop, see start_loop_monitor()
+monitor: LoopMonitor | None = None
+
+
+def start_loop_monitor() -> LoopMonitor:
+    """Monitor the running event loop with the configured thresholds."""
+    global monitor
+    monitor = LoopMonitor(
+        settings.LOOP_BLOCK_THRESHOLD_SECONDS, settings.LOOP_MONITOR_INTERVAL_SECONDS
+    )
+    monitor.start()
+    return monitor
@@ -0,0 +1,183 @@
+"""
+Memory diagnostics for finding leaks in a running worker.
+
+``tracemalloc`` is started and stopped on demand, since it slows every
+allocation down while it runs. Snapshots are kept by ID (a few per worker,
+as each holds every traced allocation) and compared to see which source
+lines allocated the memory that stayed.
+"""
+
+import gc
+import itertools
+import threading
+import tracemalloc
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.database import Base
+from app.utils.exceptions import ConflictException, NotFoundException
+
+# Allocations made by the tracing machinery itself
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass(eq=False)
+class MemorySnapshot:
+    """A tracemalloc snapshot taken on request."""
+
+    id: int
+    taken_at: datetime
+    traced_bytes: int
+    snapshot: tracemalloc.Snapshot
+
+
+class SnapshotStore:
+    """
+    The most recent snapshots, by ID.
+
+    Snapshots are taken in a worker thread (see ``take``), so access to the
+    store is locked.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._snapshots: OrderedDict[int, MemorySnapshot] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def take(self) -> MemorySnapshot:
+        """
+        Snapshot the traced allocations.
+
+        Copies and filters every trace, so call it in a worker thread.
+
+        Raises:
+            ConflictException: If tracemalloc is not running
+        """
+        if not tracemalloc.is_tracing():
+            raise ConflictException("tracemalloc is not running")
+        snapshot = MemorySnapshot(
+            id=next(self._ids),
+            taken_at=datetime.now(timezone.utc),
+            traced_bytes=tracemalloc.get_traced_memory()[0],
+            snapshot=tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES),
+        )
+        with self._lock:
+            self._snapshots[snapshot.id] = snapshot
+            while len(self._snapshots) > self.size:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, snapshot_id: int) -> MemorySnapshot:
+        """
+        Look up a snapshot.
+
+        Raises:
+            NotFoundException: If there is no such snapshot (any more)
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            raise NotFoundException(f"Snapshot {snapshot_id} not found")
+        return snapshot
+
+    def list(self) -> list[MemorySnapshot]:
+        """Stored snapshots, oldest first."""
+        with self._lock:
+            return list(self._snapshots.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+
+snapshots = SnapshotStore(settings.MEMORY_SNAPSHOT_LIMIT)
+
+
+def start_tracing(frames: int) -> None:
+    """Start tracing allocations, keeping ``frames`` frames of each."""
+    if tracemalloc.is_tracing():
+        raise ConflictException("tracemalloc is already running")
+    tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    """Stop tracing and drop the snapshots, which tracing made meaningful."""
+    tracemalloc.stop()
+    snapshots.clear()
+
+
+def tracing_status() -> dict:
+    """Whether allocations are traced, and how much memory that covers."""
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+    }
+
+
+def compare(
+    base: MemorySnapshot, target: MemorySnapshot, group_by: str, limit: int
+) -> list[dict]:
+    """
+    Allocation differences between two snapshots, largest growth first.
+
+    Args:
+        base: Earlier snapshot
+        target: Later snapshot
+        group_by: ``lineno`` (file and line) or ``filename``
+        limit: Number of entries
+
+    Returns:
+        list[dict]: Location with size and count, and their change
+    """
+    statistics = target.snapshot.compare_to(base.snapshot, group_by)
+    return [
+        {
+            "location": (
+                frame.filename
+                if group_by == "filename"
+                else f"{frame.filename}:{frame.lineno}"
+            ),
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in statistics[:limit]
+        for frame in (stat.traceback[0],)
+    ]
+
+
+def object_counts() -> dict:
+    """
+    Garbage collector state and live ORM instances.
+
+    Counting instances walks every object the collector tracks, so it
+    takes a while on a large heap.
+    """
+    models = {mapper.class_: 0 for mapper in Base.registry.mappers}
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if cls in models:
+            models[cls] += 1
+    return {
+        "gc_counts": list(gc.get_count()),
+        "gc_thresholds": list(gc.get_threshold()),
+        "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+        "gc_frozen": gc.get_freeze_count(),
+        "orm_instances": {
+            cls.__name__: count
+            for cls, count in sorted(models.items(), key=lambda item: item[0].__name__)
+        },
+    }
@@ -0,0 +1,180 @@
+"""
+In-process metrics exposed in the Prometheus text format at ``/metrics``.
+"""
+
+import bisect
+import threading
+from collections.abc import Callable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """A named family of values, one per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: str) -> float:
+        """Current value for a set of labels."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[tuple[tuple[str, ...], float]]:
+        """All label values with their current value."""
+        with self._lock:
+            return list(self._values.items())
+
+    def series(self) -> list[tuple[str, dict[str, str], float]]:
+        """Rendered samples as (name suffix, labels, value)."""
+        return [
+            ("", dict(zip(self.labelnames, values)), value)
+            for values, value in self.samples()
+        ]
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down, set directly or read on scrape."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+    def samples(self) -> list[tuple[tuple[str, ...], float]]:
+        if self._callback is not None:
+            return [((), float(self._callback()))]
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...],
+        labelnames: tuple[str, ...] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: observations per bucket (last is +Inf), then sum
+        self._observations: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._observations.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[index] += 1
+            self._observations[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        """Number of observations for a set of labels."""
+        counts, _ = self._observations.get(self._key(labels), ((), 0.0))
+        return sum(counts)
+
+    def series(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            observations = [
+                (values, list(counts), total)
+                for values, (counts, total) in self._observations.items()
+            ]
+        series = []
+        for values, counts, total in observations:
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                series.append(("_bucket", {**labels, "le": le}, cumulative))
+            series.append(("_sum", labels, total))
+            series.append(("_count", labels, cumulative))
+        return series
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        """Add a metric; names must be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.series():
+                rendered = ",".join(
+                    f'{name}="{_escape(label)}"' for name, label in labels.items()
+                )
+                labelset = f"{{{rendered}}}" if rendered else ""
+                lines.append(f"{metric.name}{suffix}{labelset} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Global registry rendered at /metrics
+registry = Registry()
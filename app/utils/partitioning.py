@@ -0,0 +1,539 @@
+"""
+Declarative partitioning of the task tables on PostgreSQL.
+
+Two layouts are supported:
+
+- ``range``: monthly partitions on ``created_at``. An existing table is
+  converted online by attaching it, unchanged, as the partition holding all
+  rows up to the end of the current month; new partitions are created
+  ahead of time from the next month on.
+- ``hash``: ``TASKS_HASH_PARTITIONS`` partitions on ``owner_id``, which lets
+  every owner-scoped ``TaskService`` query prune to a single partition.
+  Existing rows must be redistributed, so conversion copies them into a new
+  table in batches while a trigger mirrors concurrent writes, then swaps
+  the tables in one short transaction.
+
+Conversions are lists of ``MigrationStep`` run by ``run_steps`` on a
+synchronous connection in autocommit mode, so they fit in an Alembic
+migration::
+
+    from app.models import Task
+    from app.utils.partitioning import range_conversion_steps, run_steps
+
+    def upgrade() -> None:
+        with op.get_context().autocommit_block():
+            run_steps(op.get_bind(), range_conversion_steps(Task.__table__))
+
+The same operations are available from the command line::
+
+    python -m app.utils.partitioning plan --strategy range
+    python -m app.utils.partitioning convert --strategy hash
+    python -m app.utils.partitioning ensure
+    python -m app.utils.partitioning verify --owner-id 1
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import Connection, Table, create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+
+PARTITION_STRATEGIES = ("range", "hash")
+
+# Tables that may be range partitioned and need future partitions
+PARTITIONED_TABLES = ("tasks", "tasks_archive")
+
+# Child tables created by this module: monthly, hash and converted originals
+_PARTITION_NAME = re.compile(r"_(p\d{6}|h\d+|legacy)$")
+
+
+@dataclass(frozen=True)
+class MigrationStep:
+    """
+    One step of an online conversion.
+
+    Transactional steps run their statements in a single transaction with a
+    lock timeout, so a step waiting behind long-running queries fails fast
+    instead of queueing every other query behind it; the others run in
+    autocommit mode (needed for ``CREATE INDEX CONCURRENTLY``). A backfill
+    step runs its single statement once per ``batch_size`` range of ids of
+    ``backfill_from``, each batch in its own transaction.
+    """
+
+    description: str
+    statements: tuple[str, ...]
+    transactional: bool = True
+    backfill_from: str | None = None
+    batch_size: int = 0
+
+
+def is_partition_table(name: str) -> bool:
+    """Check whether a table name belongs to a partition made by this module."""
+    return bool(_PARTITION_NAME.search(name))
+
+
+def add_months(day: date, months: int) -> date:
+    """Return the first day of the month ``months`` after ``day``'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def range_partition_name(table: str, month: date) -> str:
+    """Name of the monthly partition of ``table`` starting at ``month``."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def range_partition_ddl(table: str, month: date) -> str:
+    """DDL creating the monthly partition of ``table`` starting at ``month``."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {range_partition_name(table, month)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+    )
+
+
+def _primary_key(table: Table, column: str) -> str:
+    """Primary key of a partitioned table, which must include the key column."""
+    columns = [c.name for c in table.primary_key.columns]
+    return ", ".join(columns + [column] if column not in columns else columns)
+
+
+def _index_ddl(
+    table: Table, target: str, suffix: str = "", only: bool = False
+) -> list[str]:
+    """CREATE INDEX statements for the model's indexes on another table."""
+    statements = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        columns = ", ".join(column.name for column in index.columns)
+        unique = "UNIQUE " if index.unique else ""
+        on = f"ONLY {target}" if only else target
+        statements.append(
+            f"CREATE {unique}INDEX {index.name}{suffix} ON {on} ({columns})"
+        )
+    return statements
+
+
+def _foreign_key_ddl(table: Table, target: str) -> list[str]:
+    """ALTER TABLE statements recreating the model's foreign keys on another table."""
+    statements = []
+    for fk in sorted(table.foreign_keys, key=lambda fk: fk.parent.name):
+        ondelete = f" ON DELETE {fk.ondelete}" if fk.ondelete else ""
+        statements.append(
+            f"ALTER TABLE {target} ADD CONSTRAINT {target}_{fk.parent.name}_fkey "
+            f"FOREIGN KEY ({fk.parent.name}) REFERENCES "
+            f"{fk.column.table.name} ({fk.column.name}){ondelete}"
+        )
+    return statements
+
+
+def range_conversion_steps(
+    table: Table,
+    column: str = "created_at",
+    months_ahead: int | None = None,
+    today: date | None = None,
+) -> list[MigrationStep]:
+    """
+    Plan an online conversion of ``table`` to monthly range partitions.
+
+    The existing table is renamed ``<table>_legacy`` and attached, unchanged,
+    as the partition for everything before the next month, so rows written
+    while the conversion runs still satisfy its bound; monthly partitions
+    start from there. The unique index backing the new primary key is built
+    concurrently and a validated CHECK constraint lets ``ATTACH PARTITION``
+    skip its scan, so writes are only blocked for the short swap
+    transaction. The conversion must finish within the month it starts in:
+    from the next month on, new rows would break the bound.
+
+    Args:
+        table: Table to convert (e.g. ``Task.__table__``)
+        column: Timestamp column to partition on
+        months_ahead: Future months to pre-create (defaults to settings)
+        today: Reference date (defaults to today)
+
+    Returns:
+        list[MigrationStep]: Steps for ``run_steps``
+    """
+    name = table.name
+    legacy = f"{name}_legacy"
+    boundary = add_months(today or date.today(), 1)
+    months_ahead = (
+        settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    )
+    key = _primary_key(table, column)
+    indexes = sorted(table.indexes, key=lambda index: index.name)
+
+    return [
+        MigrationStep(
+            "Build the new primary key index on the existing table",
+            (
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {legacy}_pkey "
+                f"ON {name} ({key})",
+            ),
+            transactional=False,
+        ),
+        MigrationStep(
+            "Bound the existing rows without scanning them",
+            (
+                f"ALTER TABLE {name} ADD CONSTRAINT {legacy}_bound "
+                f"CHECK ({column} IS NOT NULL AND {column} < '{boundary}') NOT VALID",
+            ),
+        ),
+        MigrationStep(
+            "Validate the bound while allowing writes",
+            (f"ALTER TABLE {name} VALIDATE CONSTRAINT {legacy}_bound",),
+            transactional=False,
+        ),
+        MigrationStep(
+            "Swap in the partitioned table and attach the existing one",
+            (
+                f"ALTER TABLE {name} RENAME TO {legacy}",
+                f"ALTER TABLE {legacy} DROP CONSTRAINT {name}_pkey",
+                *(f"ALTER INDEX {i.name} RENAME TO {i.name}_legacy" for i in indexes),
+                f"CREATE TABLE {name} (LIKE {legacy} INCLUDING DEFAULTS "
+                f"INCLUDING STORAGE) PARTITION BY RANGE ({column})",
+                f"ALTER TABLE {name} ADD CONSTRAINT {name}_pkey PRIMARY KEY ({key})",
+                *_index_ddl(table, name, only=True),
+                f"ALTER TABLE {name} ATTACH PARTITION {legacy} "
+                f"FOR VALUES FROM (MINVALUE) TO ('{boundary}')",
+                *(
+                    f"ALTER INDEX {i.name} ATTACH PARTITION {i.name}_legacy"
+                    for i in indexes
+                ),
+                # Attached partitions reuse equivalent foreign keys unvalidated
+                *_foreign_key_ddl(table, name),
+                f"ALTER SEQUENCE IF EXISTS {name}_id_seq OWNED BY {name}.id",
+                *(
+                    range_partition_ddl(name, add_months(boundary, offset))
+                    for offset in range(max(months_ahead, 1))
+                ),
+            ),
+        ),
+    ]
+
+
+def hash_conversion_steps(
+    table: Table,
+    column: str = "owner_id",
+    modulus: int | None = None,
+    batch_size: int = 5000,
+) -> list[MigrationStep]:
+    """
+    Plan an online conversion of ``table`` to hash partitions.
+
+    Rows must move between partitions, so a new partitioned table is filled
+    in ``id`` batches while a trigger mirrors concurrent writes into it.
+    The swap transaction removes rows deleted while their batch was being
+    copied, then renames the tables.
+
+    Args:
+        table: Table to convert (e.g. ``Task.__table__``)
+        column: Column to hash (typically ``owner_id``)
+        modulus: Number of partitions (defaults to settings)
+        batch_size: Rows copied per backfill batch
+
+    Returns:
+        list[MigrationStep]: Steps for ``run_steps``
+    """
+    name = table.name
+    new = f"{name}_hashed"
+    legacy = f"{name}_legacy"
+    modulus = modulus or settings.TASKS_HASH_PARTITIONS
+    key = _primary_key(table, column)
+    key_columns = [part.strip() for part in key.split(",")]
+    indexes = sorted(table.indexes, key=lambda index: index.name)
+    columns = ", ".join(c.name for c in table.columns)
+    values = ", ".join(f"NEW.{c.name}" for c in table.columns)
+    updates = ", ".join(f"{c.name} = EXCLUDED.{c.name}" for c in table.columns)
+    old_key = " AND ".join(f"{c} = OLD.{c}" for c in key_columns)
+    same_key = " AND ".join(f"o.{c} = n.{c}" for c in key_columns)
+
+    mirror_function = f"""
+CREATE OR REPLACE FUNCTION {new}_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {new} WHERE {old_key};
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {new} ({columns}) VALUES ({values})
+        ON CONFLICT ({key}) DO UPDATE SET {updates};
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql"""
+
+    return [
+        MigrationStep(
+            "Create the hash-partitioned table and mirror writes into it",
+            (
+                f"CREATE TABLE {new} (LIKE {name} INCLUDING DEFAULTS "
+                f"INCLUDING STORAGE) PARTITION BY HASH ({column})",
+                f"ALTER TABLE {new} ADD CONSTRAINT {new}_pkey PRIMARY KEY ({key})",
+                *(
+                    f"CREATE TABLE {name}_h{remainder} PARTITION OF {new} "
+                    f"FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})"
+                    for remainder in range(modulus)
+                ),
+                *_index_ddl(table, new, suffix="_hashed"),
+                # Checked per row from here on, so the swap needs no scan
+                *_foreign_key_ddl(table, new),
+                mirror_function.strip(),
+                f"CREATE TRIGGER {new}_mirror AFTER INSERT OR UPDATE OR DELETE "
+                f"ON {name} FOR EACH ROW EXECUTE FUNCTION {new}_mirror()",
+            ),
+        ),
+        MigrationStep(
+            "Copy existing rows in batches",
+            (
+                f"INSERT INTO {new} ({columns}) SELECT {columns} FROM {name} "
+                f"WHERE id > :low AND id <= :high ON CONFLICT ({key}) DO NOTHING",
+            ),
+            transactional=False,
+            backfill_from=name,
+            batch_size=batch_size,
+        ),
+        MigrationStep(
+            "Swap the tables",
+            (
+                f"LOCK TABLE {name} IN SHARE ROW EXCLUSIVE MODE",
+                f"DELETE FROM {new} n WHERE NOT EXISTS "
+                f"(SELECT 1 FROM {name} o WHERE {same_key})",
+                f"DROP TRIGGER {new}_mirror ON {name}",
+                f"DROP FUNCTION {new}_mirror()",
+                f"ALTER TABLE {name} RENAME TO {legacy}",
+                f"ALTER INDEX {name}_pkey RENAME TO {legacy}_pkey",
+                *(f"ALTER INDEX {i.name} RENAME TO {i.name}_legacy" for i in indexes),
+                f"ALTER TABLE {new} RENAME TO {name}",
+                f"ALTER INDEX {new}_pkey RENAME TO {name}_pkey",
+                *(f"ALTER INDEX {i.name}_hashed RENAME TO {i.name}" for i in indexes),
+                f"ALTER SEQUENCE IF EXISTS {name}_id_seq OWNED BY {name}.id",
+            ),
+        ),
+    ]
+
+
+def run_steps(connection: Connection, steps: list[MigrationStep]) -> None:
+    """
+    Run conversion steps on a connection in autocommit mode.
+
+    Args:
+        connection: Synchronous connection with ``AUTOCOMMIT`` isolation
+        steps: Steps from ``range_conversion_steps``/``hash_conversion_steps``
+    """
+    for step in steps:
+        if step.backfill_from is not None:
+            _backfill(connection, step)
+        elif step.transactional:
+            connection.exec_driver_sql("BEGIN")
+            try:
+                connection.exec_driver_sql(
+                    f"SET LOCAL lock_timeout = '{settings.PARTITION_LOCK_TIMEOUT}'"
+                )
+                for statement in step.statements:
+                    connection.exec_driver_sql(statement)
+            except Exception:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+            connection.exec_driver_sql("COMMIT")
+        else:
+            for statement in step.statements:
+                connection.exec_driver_sql(statement)
+
+
+def _backfill(connection: Connection, step: MigrationStep) -> None:
+    """Run a backfill statement over consecutive id ranges."""
+    (statement,) = step.statements
+    high = connection.execute(
+        text(f"SELECT coalesce(max(id), 0) FROM {step.backfill_from}")
+    ).scalar()
+    for low in range(0, high, step.batch_size):
+        connection.execute(text(statement), {"low": low, "high": low + step.batch_size})
+
+
+def ensure_future_partitions(
+    connection: Connection,
+    table: str,
+    months_ahead: int | None = None,
+    today: date | None = None,
+) -> list[str]:
+    """
+    Create the monthly partitions of ``table`` for the coming months.
+
+    Does nothing if ``table`` is not range partitioned. Months still covered
+    by a converted table's ``<table>_legacy`` partition are skipped. The
+    caller commits.
+
+    Args:
+        connection: Synchronous connection
+        table: Range-partitioned table name
+        months_ahead: Months to create beyond the current one
+        today: Reference date (defaults to today)
+
+    Returns:
+        list[str]: Names of the partitions that now exist for those months
+    """
+    strategy = connection.execute(
+        text(
+            "SELECT p.partstrat::text FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+        ),
+        {"table": table},
+    ).scalar()
+    if strategy != "r":
+        return []
+
+    months_ahead = (
+        settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    )
+    current = add_months(today or date.today(), 0)
+    legacy_bound = _legacy_upper_bound(connection, table)
+    names = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if legacy_bound is not None and month < legacy_bound:
+            continue
+        connection.exec_driver_sql(range_partition_ddl(table, month))
+        names.append(range_partition_name(table, month))
+    return names
+
+
+def _legacy_upper_bound(connection: Connection, table: str) -> date | None:
+    """Upper bound of the ``<table>_legacy`` range partition, if attached."""
+    bound = connection.execute(
+        text(
+            "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND c.relname = :legacy"
+        ),
+        {"table": table, "legacy": f"{table}_legacy"},
+    ).scalar()
+    match = bound and re.search(r"TO \('(\d{4}-\d{2}-\d{2})", bound)
+    return date.fromisoformat(match.group(1)) if match else None
+
+
+def ensure_all_future_partitions(connection: Connection) -> None:
+    """Create upcoming monthly partitions for every range-partitioned table."""
+    for table in PARTITIONED_TABLES:
+        ensure_future_partitions(connection, table)
+
+
+def _scanned_relations(plan: dict | list) -> set[str]:
+    """Collect the relations read by an ``EXPLAIN (FORMAT JSON)`` plan."""
+    found: set[str] = set()
+    if isinstance(plan, list):
+        for item in plan:
+            found |= _scanned_relations(item)
+    elif isinstance(plan, dict):
+        if "Relation Name" in plan:
+            found.add(plan["Relation Name"])
+        for value in plan.values():
+            if isinstance(value, (dict, list)):
+                found |= _scanned_relations(value)
+    return found
+
+
+async def verify_pruning(engine: AsyncEngine, owner_id: int) -> dict[str, set[str]]:
+    """
+    Report which partitions the hot ``TaskService`` reads touch.
+
+    Runs ``get_tasks`` and ``get_task`` for an owner, captures the SQL they
+    send and EXPLAINs each statement with the same parameters.
+
+    Args:
+        engine: Async engine for the partitioned database
+        owner_id: Owner to run the queries as
+
+    Returns:
+        dict: Statement text mapped to the relations it scans
+    """
+    from app.models.user import User
+    from app.services.task import TaskService
+    from app.utils.exceptions import NotFoundException
+
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    user = User(id=owner_id, is_superuser=False)
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(engine) as session:
+            await TaskService.get_tasks(session, user, core=True)
+            try:
+                await TaskService.get_task(session, 0, user, core=True)
+            except NotFoundException:
+                pass
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    report = {}
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            report[statement] = _scanned_relations(plan)
+    return report
+
+
+def main() -> None:
+    """Command-line entry point."""
+    from app.models.task import Task
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    for command in ("plan", "convert"):
+        sub = subcommands.add_parser(command, help=f"{command} a table conversion")
+        sub.add_argument("--strategy", choices=PARTITION_STRATEGIES, required=True)
+    subcommands.add_parser("ensure", help="create upcoming monthly partitions")
+    verify = subcommands.add_parser("verify", help="show partitions scanned")
+    verify.add_argument("--owner-id", type=int, required=True)
+    args = parser.parse_args()
+
+    if args.command in ("plan", "convert"):
+        build = (
+            range_conversion_steps
+            if args.strategy == "range"
+            else hash_conversion_steps
+        )
+        steps = build(Task.__table__)
+        if args.command == "plan":
+            for number, step in enumerate(steps, 1):
+                print(f"-- {number}. {step.description}")
+                for statement in step.statements:
+                    print(f"{statement};")
+            return
+
+    if args.command == "verify":
+        from app.database import engine
+
+        report = asyncio.run(verify_pruning(engine, args.owner_id))
+        for statement, relations in report.items():
+            print(f"{', '.join(sorted(relations))}\n    {statement.splitlines()[0]}")
+        return
+
+    sync_engine = create_engine(settings.DATABASE_URL_SYNC)
+    if args.command == "convert":
+        with sync_engine.connect() as connection:
+            autocommit = connection.execution_options(isolation_level="AUTOCOMMIT")
+            run_steps(autocommit, steps)
+    else:
+        with sync_engine.begin() as connection:
+            for table in PARTITIONED_TABLES:
+                print(table, ensure_future_partitions(connection, table))
+    sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
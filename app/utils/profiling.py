@@ -0,0 +1,135 @@
+"""
+On-demand CPU profiling of single requests.
+
+A superuser sends ``X-Profile: 1`` and the request (from authentication to
+the start of the response) runs under ``cProfile``. The profile is kept in
+a small per-worker store and served by the admin API, as a text report or
+as a ``.prof`` file for tools such as snakeviz.
+
+cProfile hooks the event loop thread, so concurrent requests on the same
+worker show up in the profile too. Only one profile runs per worker at a
+time, and superusers get a strict rate limit on top.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from app.config import settings
+from app.utils.exceptions import TooManyRequestsException
+from app.utils.rate_limit import rate_limiter
+
+
+@dataclass(eq=False)
+class ProfileReport:
+    """A finished request profile."""
+
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    route: str
+    user_id: int
+    duration_ms: float
+    profiler: cProfile.Profile = field(repr=False)
+
+    def text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """Top functions as a ``pstats`` report."""
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def pstats_file(self) -> bytes:
+        """The profile in the format written by ``cProfile`` (``.prof``)."""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+class ProfileStore:
+    """The most recent profiles, by ID."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._reports: OrderedDict[str, ProfileReport] = OrderedDict()
+
+    def add(self, report: ProfileReport) -> None:
+        self._reports[report.id] = report
+        while len(self._reports) > self.size:
+            self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> ProfileReport | None:
+        return self._reports.get(profile_id)
+
+    def list(self) -> list[ProfileReport]:
+        """Stored profiles, newest first."""
+        return list(reversed(self._reports.values()))
+
+
+profiles = ProfileStore(settings.PROFILE_STORE_SIZE)
+
+# The profiler running on this worker, if any; cProfile profiles the thread
+_active: cProfile.Profile | None = None
+
+
+async def start_profile(request: Request, user_id: int) -> None:
+    """
+    Run the rest of a request under the profiler.
+
+    Args:
+        request: Request that asked to be profiled
+        user_id: Superuser making the request
+
+    Raises:
+        TooManyRequestsException: If the user's profiling budget is spent
+            or another request is being profiled
+    """
+    global _active
+    await rate_limiter.check(request, "profile", f"user:{user_id}", record=False)
+    if _active is not None:
+        raise TooManyRequestsException(
+            "Another request is being profiled", headers={"Retry-After": "1"}
+        )
+    _active = cProfile.Profile()
+    request.state.profiler = _active
+    request.state.profile_started = time.perf_counter()
+    _active.enable()
+
+
+def finish_profile(scope: dict) -> str | None:
+    """
+    Stop the request's profiler, if it has one, and store its report.
+
+    Args:
+        scope: ASGI scope of the request
+
+    Returns:
+        str | None: ID of the stored profile
+    """
+    global _active
+    state = scope.get("state", {})
+    profiler = state.pop("profiler", None)
+    if profiler is None:
+        return None
+    profiler.disable()
+    _active = None
+    report = ProfileReport(
+        id=uuid.uuid4().hex,
+        created_at=datetime.now(timezone.utc),
+        method=scope["method"],
+        path=scope["path"],
+        route=getattr(scope.get("route"), "path", scope["path"]),
+        user_id=state["user_id"],
+        duration_ms=round((time.perf_counter() - state["profile_started"]) * 1000, 2),
+        profiler=profiler,
+    )
+    profiles.add(report)
+    return report.id
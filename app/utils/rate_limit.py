@@ -0,0 +1,197 @@
+"""
+Token-bucket rate limiting with a pluggable bucket store.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from starlette.requests import Request
+
+from app.config import settings
+from app.utils.exceptions import TooManyRequestsException
+from app.utils.metrics import Counter
+
+limited_requests = Counter(
+    "taskflow_rate_limited_total",
+    "Requests rejected with 429 by the rate limiter.",
+    ("limit",),
+)
+
+
+@dataclass(frozen=True)
+class BucketLimit:
+    """Refill rate and capacity of a family of buckets."""
+
+    rate: float  # tokens per second
+    capacity: int
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of taking a token from a bucket."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the bucket is full again
+    retry_after: float  # seconds until a token is available (0 if allowed)
+
+    def headers(self) -> dict[str, str]:
+        """Rate-limit response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(math.ceil(self.retry_after))
+        return headers
+
+
+class RateLimitStore(ABC):
+    """
+    Storage of token buckets.
+
+    The in-process store is exact for a single worker; a shared store (for
+    example Redis running the same refill arithmetic in a script) gives one
+    limit across workers.
+    """
+
+    @abstractmethod
+    async def take(
+        self, key: str, limit: BucketLimit, cost: float = 1.0
+    ) -> RateLimitResult:
+        """
+        Take ``cost`` tokens from the bucket ``key`` if it has them.
+
+        Args:
+            key: Bucket identity, e.g. ``api:user:42``
+            limit: Refill rate and capacity
+            cost: Tokens the request costs
+
+        Returns:
+            RateLimitResult: Whether the request is allowed, and bucket state
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Forget all buckets."""
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Buckets kept in a dict of ``(tokens, updated_at)`` tuples.
+
+    Buckets refill lazily when used, so idle ones cost no work. A bucket
+    idle long enough to be full again is the same as no bucket at all, so
+    the least recently used buckets are evicted once they are full.
+    """
+
+    def __init__(self, sweep_every: int = 1024):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._sweep_every = sweep_every
+        self._operations = 0
+        # Longest time any bucket needs to refill completely
+        self._max_refill = 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(
+        self, key: str, limit: BucketLimit, cost: float = 1.0
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        # Re-inserted at the end: the dict stays ordered by last use
+        self._buckets[key] = (tokens, now)
+
+        self._max_refill = max(self._max_refill, limit.capacity / limit.rate)
+        self._operations += 1
+        if self._operations % self._sweep_every == 0:
+            self._evict_idle(now)
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit.capacity,
+            remaining=int(tokens),
+            reset_after=(limit.capacity - tokens) / limit.rate,
+            retry_after=0.0 if allowed else (cost - tokens) / limit.rate,
+        )
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop buckets unused for long enough to be full again."""
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at < self._max_refill:
+                break
+            del self._buckets[key]
+
+
+class RateLimiter:
+    """Named bucket limits applied to requests."""
+
+    def __init__(self, store: RateLimitStore, limits: dict[str, BucketLimit]):
+        self.store = store
+        self.limits = limits
+
+    async def check(
+        self, request: Request, name: str, key: str, record: bool = True
+    ) -> RateLimitResult:
+        """
+        Take a token for a request, raising if none is left.
+
+        The result is kept on ``request.state`` so that the rate-limit
+        headers are added to the response, whatever it is.
+
+        Args:
+            request: Current request
+            name: Limit to apply, e.g. ``api`` or ``auth``
+            key: Who is limited, e.g. ``user:42`` or ``ip:203.0.113.7``
+            record: Keep the result for the response headers; pass False
+                for secondary limits so the request's main limit is shown
+
+        Returns:
+            RateLimitResult: Bucket state after taking the token
+
+        Raises:
+            TooManyRequestsException: If the bucket is empty
+        """
+        result = await self.store.take(f"{name}:{key}", self.limits[name])
+        if record:
+            request.state.rate_limit = result
+        if not result.allowed:
+            limited_requests.inc(limit=name)
+            raise TooManyRequestsException(
+                "Rate limit exceeded", headers=result.headers()
+            )
+        return result
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client (proxy headers are resolved by the server)."""
+    return request.client.host if request.client else "unknown"
+
+
+rate_limiter = RateLimiter(
+    InMemoryRateLimitStore(),
+    {
+        "api": BucketLimit(
+            settings.RATE_LIMIT_API_PER_MINUTE / 60, settings.RATE_LIMIT_API_BURST
+        ),
+        "auth": BucketLimit(
+            settings.RATE_LIMIT_AUTH_PER_MINUTE / 60, settings.RATE_LIMIT_AUTH_BURST
+        ),
+        "profile": BucketLimit(
+            settings.RATE_LIMIT_PROFILE_PER_MINUTE / 60,
+            settings.RATE_LIMIT_PROFILE_BURST,
+        ),
+    },
+)
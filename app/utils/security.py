@@ -1,16 +1,28 @@
 """
 Security utilities for password hashing and JWT token generation.
+
+passlib and jose (with its crypto backends) are imported on first use, so
+importing this module stays cheap for tools that never touch a password or
+token.
 """
 
 from datetime import datetime, timedelta
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from app.config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+    from starlette.requests import Request
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context() -> "CryptContext":
+    """Password hashing context, created on first use."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,7 +36,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -37,11 +49,13 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(
-    subject: str | int, expires_delta: timedelta | None = None
+    subject: str | int,
+    expires_delta: timedelta | None = None,
+    shard: int | None = None,
 ) -> str:
     """
     Create a JWT access token.
@@ -49,10 +63,13 @@ def create_access_token(
     Args:
         subject: User ID or username to encode in token
         expires_delta: Optional custom expiration time
+        shard: Shard holding the user's data, if sharding is enabled
 
     Returns:
         str: Encoded JWT token
     """
+    from jose import jwt
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -61,6 +78,8 @@ def create_access_token(
         )
 
     to_encode = {"exp": expire, "sub": str(subject)}
+    if shard is not None:
+        to_encode["shard"] = shard
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
@@ -82,8 +101,40 @@ def decode_access_token(token: str) -> dict:
     Raises:
         JWTError: If token is invalid or expired
     """
+    from jose import jwt
+
     return jwt.decode(
         token,
         settings.SECRET_KEY,
         algorithms=[settings.ALGORITHM],
     )
+
+
+def request_claims(request: "Request") -> dict | None:
+    """
+    Verified payload of a request's bearer token, decoded once per request.
+
+    The result is kept in ``request.state``, which every ``Request`` built
+    on the same ASGI scope shares, so middleware, shard routing and
+    authentication all reuse it.
+
+    Args:
+        request: Current request
+
+    Returns:
+        dict | None: Token payload, or None without a valid bearer token
+    """
+    if hasattr(request.state, "token_claims"):
+        return request.state.token_claims
+
+    from jose import JWTError
+
+    claims = None
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_access_token(token)
+        except JWTError:
+            pass
+    request.state.token_claims = claims
+    return claims
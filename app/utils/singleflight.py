@@ -0,0 +1,59 @@
+"""
+Single-flight execution: concurrent identical calls share one result.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Run at most one call per key at a time.
+
+    Callers arriving while a call with the same key is in flight wait for
+    it and receive its result (or exception) instead of starting their own.
+    Nothing is cached: once the call finishes the next caller starts anew.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check if a call with this key is running."""
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Run ``fn`` for ``key`` or join the call already in flight.
+
+        The call runs as its own task, so a caller that is cancelled (for
+        instance because its client disconnected) does not cancel the
+        others waiting on it.
+
+        Args:
+            key: Identity of the call; must capture everything the result
+                depends on
+            fn: Coroutine function producing the result
+
+        Returns:
+            tuple: (result, whether it came from another caller's call)
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            return await asyncio.shield(call), True
+
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+
+        def finished(done: asyncio.Future[T]) -> None:
+            if self._calls.get(key) is done:
+                del self._calls[key]
+            if not done.cancelled():
+                # Retrieved here so an unawaited failure is not logged
+                done.exception()
+
+        call.add_done_callback(finished)
+        return await asyncio.shield(call), False
@@ -0,0 +1,487 @@
+"""
+Lightweight request tracing with W3C trace context.
+
+``TracingMiddleware`` starts a trace per request, continuing the caller's
+trace when the request carries a ``traceparent`` header. Sampling is
+decided once, at the head of the trace: unsampled requests create no spans
+at all, so instrumented code only pays for a context variable lookup.
+Spans are opened with ``span()``, ``traced`` and ``trace_methods``, and for
+every SQL statement by cursor execute events. When a request's root span
+ends, its trace is handed to the configured ``SpanExporter``.
+"""
+
+import importlib
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+from app.utils.exceptions import NotFoundException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# version-trace_id-parent_id-flags; versions after 00 may append fields
+_TRACEPARENT = re.compile(
+    r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?"
+)
+_SAMPLED_FLAG = 0x01
+
+# Longest SQL text kept on a statement's span
+_MAX_STATEMENT_LENGTH = 2048
+
+
+@dataclass(frozen=True)
+class TraceContext:
+    """The caller's position in a trace, from a ``traceparent`` header."""
+
+    trace_id: str
+    parent_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: str) -> TraceContext | None:
+    """
+    Parse a W3C ``traceparent`` header.
+
+    Args:
+        value: Header value, e.g. ``00-<trace id>-<parent span id>-01``
+
+    Returns:
+        TraceContext | None: The caller's trace, or None if the header is invalid
+    """
+    match = _TRACEPARENT.fullmatch(value.strip())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags, extra = match.groups()
+    if version == "ff" or (version == "00" and extra is not None):
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return TraceContext(trace_id, parent_id, bool(int(flags, 16) & _SAMPLED_FLAG))
+
+
+def _new_id(bits: int) -> str:
+    """Random non-zero trace or span ID, as lowercase hex."""
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+@dataclass(eq=False)
+class Span:
+    """A timed operation within a sampled trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    start_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    duration_ms: float | None = None
+    error: str | None = None
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+    # Finished spans of the trace, shared by all its spans
+    _finished: list["Span"] = field(default_factory=list, repr=False)
+    # Set on a request's root span, which exports the trace when it ends
+    _tracer: "Tracer | None" = field(default=None, repr=False)
+
+    @property
+    def traceparent(self) -> str:
+        """``traceparent`` header continuing the trace from this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def child(self, name: str, **attributes: Any) -> "Span":
+        """Start a span nested in this one."""
+        return Span(
+            name,
+            self.trace_id,
+            _new_id(64),
+            self.span_id,
+            attributes,
+            _finished=self._finished,
+        )
+
+    def end(self) -> None:
+        """Record the span's duration, and export the trace if it is the root."""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        self._finished.append(self)
+        if self._tracer is not None:
+            self._tracer.export(list(self._finished))
+
+    def to_dict(self) -> dict[str, Any]:
+        """The span as a JSON-serializable dict."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time.isoformat(),
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# Innermost open span of the sampled trace being handled, if any
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    """The innermost open span, or None outside a sampled trace."""
+    return _current_span.get()
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    """Make ``span`` the current span while the block runs, then end it."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = type(exc).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """
+    Time the enclosed block as a child of the current span.
+
+    Outside a sampled trace nothing is recorded and None is yielded.
+
+    Args:
+        name: Span name
+        **attributes: Span attributes
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(parent.child(name, **attributes)) as child:
+        yield child
+
+
+def traced(name: str | None = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorate a function to run in a span of its own when traced.
+
+    Args:
+        name: Span name, by default the function's qualified name
+    """
+
+    def decorate(function: Callable[..., T]) -> Callable[..., T]:
+        span_name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+
+            @wraps(function)
+            async def traced_coroutine(*args: Any, **kwargs: Any) -> Any:
+                parent = _current_span.get()
+                if parent is None:
+                    return await function(*args, **kwargs)
+                with _activate(parent.child(span_name)):
+                    return await function(*args, **kwargs)
+
+            return traced_coroutine
+
+        @wraps(function)
+        def traced_function(*args: Any, **kwargs: Any) -> Any:
+            parent = _current_span.get()
+            if parent is None:
+                return function(*args, **kwargs)
+            with _activate(parent.child(span_name)):
+                return function(*args, **kwargs)
+
+        return traced_function
+
+    return decorate
+
+
+def trace_methods(cls: type[T]) -> type[T]:
+    """
+    Trace every coroutine static method of a service class.
+
+    Synchronous helpers do no I/O and are left out, keeping traces readable.
+    """
+    for attribute, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and inspect.iscoroutinefunction(
+            value.__func__
+        ):
+            setattr(cls, attribute, staticmethod(traced()(value.__func__)))
+    return cls
+
+
+class SpanExporter(ABC):
+    """
+    Destination of finished traces.
+
+    ``export`` is called on the event loop when a request's root span ends,
+    so it must not block; exporters doing I/O hand the spans to a thread.
+    """
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """
+        Export the spans of a request's trace.
+
+        Args:
+            spans: Finished spans in the order they ended, the root last
+        """
+
+    def shutdown(self) -> None:
+        """Flush spans not exported yet and release resources."""
+
+
+class InMemorySpanExporter(SpanExporter):
+    """The most recent traces, by trace ID, for the admin API."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._traces: OrderedDict[str, list[Span]] = OrderedDict()
+
+    def export(self, spans: list[Span]) -> None:
+        # A trace may pass through this worker more than once
+        trace_id = spans[-1].trace_id
+        self._traces.setdefault(trace_id, []).extend(spans)
+        self._traces.move_to_end(trace_id)
+        while len(self._traces) > self.size:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> list[Span]:
+        """
+        Look up the spans of a trace.
+
+        Raises:
+            NotFoundException: If the trace is not kept (any more)
+        """
+        try:
+            return self._traces[trace_id]
+        except KeyError:
+            raise NotFoundException(f"Trace {trace_id} not found") from None
+
+    def list(self) -> list[list[Span]]:
+        """Stored traces, most recently exported first."""
+        return list(reversed(self._traces.values()))
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Spans appended to a file as JSON lines by a writer thread.
+
+    Each trace is written with a single ``write``, so workers sharing the
+    file do not interleave lines. Every worker process starts its own
+    thread on its first export.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue[list[Span] | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        self._writer_pid: int | None = None
+
+    def export(self, spans: list[Span]) -> None:
+        if self._writer_pid != os.getpid():
+            # First export, or the first in a forked worker
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(
+                target=self._write, args=(self._queue,), name="span-writer", daemon=True
+            )
+            self._writer.start()
+            self._writer_pid = os.getpid()
+        self._queue.put(spans)
+
+    def shutdown(self) -> None:
+        if self._writer is None or self._writer_pid != os.getpid():
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+        self._writer_pid = None
+
+    def _write(self, spans_queue: queue.SimpleQueue) -> None:
+        with open(self.path, "ab", buffering=0) as file:
+            while (spans := spans_queue.get()) is not None:
+                lines = "".join(
+                    json.dumps(span.to_dict(), default=str) + "\n" for span in spans
+                )
+                file.write(lines.encode())
+
+
+class Tracer:
+    """
+    Head sampling of request traces, and their export.
+
+    The ``traceparent`` header is read before authentication, so anyone
+    can ask for a trace. A caller's decision not to sample is followed;
+    traces it samples are kept up to ``parent_sampled_per_second`` (token
+    bucket), and beyond that are sampled like new ones.
+
+    Args:
+        exporter: Where finished traces go
+        sample_rate: Fraction of new traces sampled
+        parent_sampled_per_second: Ceiling on traces sampled by the caller,
+            None for no ceiling
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float,
+        parent_sampled_per_second: float | None = None,
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.parent_sampled_per_second = parent_sampled_per_second
+        self._parent_tokens = float("inf")
+        self._parent_updated = time.monotonic()
+        self._parent_lock = threading.Lock()
+
+    def _take_parent_sampled(self) -> bool:
+        """Take a token for a trace sampled by the caller, if one is left."""
+        rate = self.parent_sampled_per_second
+        if rate is None:
+            return True
+        with self._parent_lock:
+            now = time.monotonic()
+            self._parent_tokens = min(
+                max(1.0, rate),
+                self._parent_tokens + (now - self._parent_updated) * rate,
+            )
+            self._parent_updated = now
+            if self._parent_tokens < 1:
+                return False
+            self._parent_tokens -= 1
+            return True
+
+    @contextmanager
+    def trace(
+        self, name: str, parent: TraceContext | None = None, **attributes: Any
+    ) -> Iterator[Span | None]:
+        """
+        Run the enclosed block in a new root span, if the trace is sampled.
+
+        Args:
+            name: Root span name
+            parent: The caller's trace context, to continue its trace
+            **attributes: Span attributes
+
+        Yields:
+            Span | None: The root span, or None if the trace is not sampled
+        """
+        if parent is not None and not parent.sampled:
+            sampled = False
+        elif parent is not None and self._take_parent_sampled():
+            sampled = True
+        else:
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            yield None
+            return
+
+        root = Span(
+            name,
+            parent.trace_id if parent else _new_id(128),
+            _new_id(64),
+            parent.parent_id if parent else None,
+            attributes,
+            _tracer=self,
+        )
+        with _activate(root):
+            yield root
+
+    def export(self, spans: list[Span]) -> None:
+        """Hand a finished trace to the exporter, which must not fail requests."""
+        try:
+            self.exporter.export(spans)
+        except Exception:
+            logger.exception("Exporting trace %s failed", spans[-1].trace_id)
+
+
+def create_exporter(name: str) -> SpanExporter:
+    """
+    Build the exporter named by ``TRACING_EXPORTER``.
+
+    Args:
+        name: ``memory``, ``file``, or the ``module:Class`` path of a
+            SpanExporter taking no arguments
+
+    Returns:
+        SpanExporter: The exporter
+    """
+    if name == "memory":
+        return InMemorySpanExporter(settings.TRACING_BUFFER_SIZE)
+    if name == "file":
+        return FileSpanExporter(settings.TRACING_FILE_PATH)
+    module, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown tracing exporter {name!r}")
+    return getattr(importlib.import_module(module), attribute)()
+
+
+tracer = Tracer(
+    create_exporter(settings.TRACING_EXPORTER),
+    settings.TRACING_SAMPLE_RATE,
+    settings.TRACING_PARENT_SAMPLED_PER_SECOND,
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_span(
+    conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    """Open a span for a statement run inside a sampled trace."""
+    parent = _current_span.get()
+    if parent is None or context is None:
+        return
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = parent.child(
+        operation,
+        **{
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:_MAX_STATEMENT_LENGTH],
+            "db.executemany": executemany,
+        },
+    )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement_span(
+    conn: Connection, cursor, statement, parameters, context, executemany
+) -> None:
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_statement_span(exception_context) -> None:
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.error = type(exception_context.original_exception).__name__
+        span.end()
@@ -0,0 +1,65 @@
+"""
+Benchmark cold start: the time a fresh interpreter needs to import the app.
+
+Each stage runs in its own interpreter, so nothing is cached between
+measurements; the median of several runs is reported:
+
+    python -m benchmarks.bench_startup
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROUNDS = 5
+
+# Code timed in a fresh interpreter; prints seconds elapsed
+STAGES = (
+    ("import app.config", "import app.config"),
+    ("import app.database", "import app.database"),
+    ("import app.main", "import app.main"),
+    ("create_app()", "from app.main import create_app; create_app()"),
+)
+
+ENVIRONMENT = {
+    "DATABASE_URL": "postgresql+asyncpg://bench@localhost/bench",
+    "DATABASE_URL_SYNC": "postgresql://bench@localhost/bench",
+    "SECRET_KEY": "bench",
+}
+
+
+def time_in_fresh_interpreter(code: str) -> float:
+    """
+    Run code in a new interpreter and time it there.
+
+    Returns:
+        float: Seconds the code took, interpreter startup excluded
+    """
+    script = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        f"{code}\n"
+        "print(time.perf_counter() - started)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**ENVIRONMENT, **os.environ},
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    print(f"{'stage':<24}{'median ms':>12}{'min ms':>10}")
+    for name, code in STAGES:
+        runs = [time_in_fresh_interpreter(code) for _ in range(ROUNDS)]
+        print(
+            f"{name:<24}{statistics.median(runs) * 1000:>12.0f}{min(runs) * 1000:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
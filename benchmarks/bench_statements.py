@@ -0,0 +1,86 @@
+"""
+Benchmark building the hot task queries per request versus reusing them.
+
+Before executing a statement SQLAlchemy derives its cache key to look up
+the compiled SQL. A statement rebuilt for every request pays for building
+the construct and for deriving the key; a prebuilt one, parameterized with
+``bindparam``, memoizes its key and pays for neither:
+
+    python -m benchmarks.bench_statements
+"""
+
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+os.environ.setdefault("DATABASE_URL_SYNC", "postgresql://bench@localhost/bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from sqlalchemy import Select, func, select  # noqa: E402
+from sqlalchemy.orm import load_only  # noqa: E402
+
+from app.models.task import Task  # noqa: E402
+from app.schemas.task import DEFAULT_TASK_LIST_FIELDS  # noqa: E402
+from app.services.task import OWNED_TASK_BY_ID, _list_statements  # noqa: E402
+
+ROUNDS = 20_000
+FIELDS = DEFAULT_TASK_LIST_FIELDS
+
+
+def rebuilt_get_task(task_id: int, owner_id: int) -> list[Select]:
+    """Build the get-task query with its values inlined."""
+    return [select(Task).where(Task.id == task_id, Task.owner_id == owner_id)]
+
+
+def prebuilt_get_task(task_id: int, owner_id: int) -> list[Select]:
+    """Reuse the module-level get-task query."""
+    return [OWNED_TASK_BY_ID]
+
+
+def rebuilt_list(owner_id: int, status: str) -> list[Select]:
+    """Build the list count and page queries with their values inlined."""
+    filters = [Task.owner_id == owner_id, Task.status == status]
+    count_query = select(func.count()).select_from(Task).where(*filters)
+    query = (
+        select(Task)
+        .options(load_only(*(getattr(Task, name) for name in FIELDS), raiseload=True))
+        .where(*filters)
+        .order_by(Task.created_at.desc())
+        .offset(0)
+        .limit(20)
+    )
+    return [count_query, query]
+
+
+def prebuilt_list(owner_id: int, status: str) -> list[Select]:
+    """Fetch the cached list count and page queries."""
+    return list(_list_statements(FIELDS, True, False, False, False))
+
+
+def measure(build, *args) -> float:
+    """
+    Time building the statements of a request and deriving their cache keys.
+
+    Returns:
+        float: Microseconds per request
+    """
+    started = time.perf_counter()
+    for i in range(ROUNDS):
+        for statement in build(i, *args):
+            statement._generate_cache_key()
+    return (time.perf_counter() - started) / ROUNDS * 1e6
+
+
+def main() -> None:
+    print(f"{'query':<12}{'rebuilt us':>12}{'prebuilt us':>13}{'speedup':>9}")
+    for name, rebuilt, prebuilt, args in (
+        ("get_task", rebuilt_get_task, prebuilt_get_task, (1,)),
+        ("get_tasks", rebuilt_list, prebuilt_list, ("todo",)),
+    ):
+        before = measure(rebuilt, *args)
+        after = measure(prebuilt, *args)
+        print(f"{name:<12}{before:>12.1f}{after:>13.2f}{before / after:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Tests for adaptive admission control.
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middleware import admission
+from app.middleware.admission import AdaptiveLimit, AdmissionControlMiddleware
+
+
+def make_limit(initial: int = 10) -> AdaptiveLimit:
+    return AdaptiveLimit(
+        initial,
+        minimum=2,
+        maximum=100,
+        backoff_ratio=0.5,
+        latency_target=1.0,
+        pool_wait_target=0.05,
+    )
+
+
+class TestAdaptiveLimit:
+    """Tests for the AIMD limit."""
+
+    def test_overload_cuts_limit_once_per_burst(self):
+        """Test slow requests from the same burst cut the limit only once."""
+        limit = make_limit(10)
+        for _ in range(3):
+            limit.try_acquire(1.0)
+
+        for _ in range(3):
+            limit.release(started=0.0, latency=0.1, pool_wait=0.5)
+
+        assert limit.limit == 5
+        assert limit.in_flight == 0
+
+    def test_busy_and_healthy_raises_limit(self):
+        """Test the limit grows while it is in use and requests are fast."""
+        limit = make_limit(4)
+        for _ in range(4):
+            limit.try_acquire(1.0)
+
+        limit.release(started=0.0, latency=0.01, pool_wait=0.0)
+
+        assert limit.limit == pytest.approx(4.25)
+
+    def test_lower_priority_classes_are_shed_first(self):
+        """Test a class with a smaller share is refused while others pass."""
+        limit = make_limit(4)
+        assert limit.try_acquire(1.0)
+        assert limit.try_acquire(1.0)
+
+        assert not limit.try_acquire(0.5)
+        assert limit.try_acquire(1.0)
+
+
+class TestRouteClass:
+    """Tests for request classification."""
+
+    @pytest.mark.parametrize(
+        "method, path, query, expected",
+        [
+            ("GET", "/health", b"", None),
+            ("GET", "/api/v1/tasks/events", b"", None),
+            ("GET", "/api/v1/tasks", b"page=2", "read"),
+            ("GET", "/api/v1/tasks", b"page_size=100", "expensive"),
+            ("GET", "/api/v1/tasks", b"include_archived=true", "expensive"),
+            ("POST", "/api/v1/tasks", b"", "write"),
+            ("POST", "/api/v1/auth/login", b"", "expensive"),
+        ],
+    )
+    def test_route_class(self, method, path, query, expected):
+        """Test requests are mapped to their admission class."""
+        scope = {"method": method, "path": path, "query_string": query}
+        assert admission.route_class(scope) == expected
+
+
+class TestAdmissionControlMiddleware:
+    """Tests for shedding requests."""
+
+    @pytest.mark.asyncio
+    async def test_excess_requests_get_503(self):
+        """Test requests beyond the limit are shed with Retry-After."""
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return PlainTextResponse("done")
+
+        async def health(request):
+            return PlainTextResponse("ok")
+
+        app = Starlette(routes=[Route("/slow", slow), Route("/health", health)])
+        limited = AdmissionControlMiddleware(app, limit=make_limit(2))
+
+        async with AsyncClient(app=limited, base_url="http://test") as client:
+            admitted = [asyncio.create_task(client.get("/slow")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            shed = await client.get("/slow")
+            health_check = await client.get("/health")
+            release.set()
+            responses = await asyncio.gather(*admitted)
+
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        assert health_check.status_code == 200
+        assert [r.status_code for r in responses] == [200, 200]
@@ -0,0 +1,165 @@
+"""
+Tests for request-scoped database sessions.
+"""
+
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app import database
+from app.database import Base, _sessionmaker
+from app.main import app
+from app.models.user import User
+from app.utils.security import create_access_token
+
+
+class RoundTrips:
+    """Statements, commits and rollbacks sent to the database."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.statements: list[str] = []
+        self.commits = 0
+        self.rollbacks = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._statement)
+        event.listen(sync_engine, "commit", self._commit)
+        event.listen(sync_engine, "rollback", self._rollback)
+
+    def _statement(self, conn, cursor, statement, *args) -> None:
+        self.statements.append(statement.split(None, 1)[0].upper())
+
+    def _commit(self, conn) -> None:
+        self.commits += 1
+
+    def _rollback(self, conn) -> None:
+        self.rollbacks += 1
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.commits = self.rollbacks = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.statements) + self.commits + self.rollbacks
+
+
+@pytest.fixture
+async def engine(tmp_path: Path) -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/sessions.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session_client(
+    engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[AsyncClient, None]:
+    """Client whose requests use the real get_db against a file database."""
+    monkeypatch.setattr(database, "AsyncSessionLocal", _sessionmaker(engine))
+    monkeypatch.setattr(
+        database, "ReadOnlySessionLocal", _sessionmaker(engine, read_only=True)
+    )
+    async with database.AsyncSessionLocal() as session:
+        user = User(email="rt@example.com", username="rt", hashed_password="x")
+        session.add(user)
+        await session.commit()
+
+    app.dependency_overrides.clear()
+    headers = {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+    async with AsyncClient(app=app, base_url="http://test", headers=headers) as client:
+        yield client
+
+
+async def create_task(client: AsyncClient) -> int:
+    response = await client.post("/api/v1/tasks", json={"title": "Round trips"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+class TestRoundTrips:
+    """Tests counting database round trips per endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_create_commits_once_without_reload(
+        self, engine: AsyncEngine, session_client: AsyncClient
+    ):
+        """Test a create is user lookup, inserts and one commit."""
+        trips = RoundTrips(engine)
+
+        await create_task(session_client)
+
+        assert trips.statements == ["SELECT", "INSERT", "INSERT"]
+        assert trips.commits == 1
+        assert trips.total == 4
+
+    @pytest.mark.asyncio
+    async def test_update_commits_once_without_reload(
+        self, engine: AsyncEngine, session_client: AsyncClient
+    ):
+        """Test the service's commit is not followed by a refresh and commit."""
+        task_id = await create_task(session_client)
+        trips = RoundTrips(engine)
+
+        response = await session_client.put(
+            f"/api/v1/tasks/{task_id}", json={"title": "Renamed"}
+        )
+
+        assert response.json()["title"] == "Renamed"
+        assert trips.statements == ["SELECT", "SELECT", "UPDATE", "INSERT"]
+        assert trips.commits == 1
+        assert trips.total == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "path, selects",
+        [("/api/v1/tasks/{task_id}", 2), ("/api/v1/tasks", 3)],
+    )
+    async def test_reads_do_not_commit(
+        self,
+        engine: AsyncEngine,
+        session_client: AsyncClient,
+        path: str,
+        selects: int,
+    ):
+        """Test reads end their read-only transaction without a commit."""
+        task_id = await create_task(session_client)
+        trips = RoundTrips(engine)
+
+        response = await session_client.get(path.format(task_id=task_id))
+
+        assert response.status_code == 200
+        assert trips.statements == ["SELECT"] * selects
+        assert trips.commits == 0
+        # One reset per session: the shared read has its own (read_coalescing)
+        assert trips.rollbacks == 2
+        assert trips.total == selects + 2
+
+    @pytest.mark.asyncio
+    async def test_unused_session_is_free(
+        self, engine: AsyncEngine, session_client: AsyncClient
+    ):
+        """Test a request rejected before any query never touches the database."""
+        trips = RoundTrips(engine)
+
+        response = await session_client.get(
+            "/api/v1/tasks", headers={"Authorization": "Bearer invalid"}
+        )
+
+        assert response.status_code == 401
+        assert trips.total == 0
+
+
+class TestReadOnlySessions:
+    """Tests for picking read-only sessions."""
+
+    def test_get_requests_get_read_only_sessions(self):
+        """Test session factories mark read-only sessions."""
+        session = database.session_for_shard(None, read_only=True)
+        assert session.info["read_only"] is True
+        assert database.session_for_shard(None).info["read_only"] is False
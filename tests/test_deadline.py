@@ -0,0 +1,197 @@
+"""
+Tests for request deadlines.
+"""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.database import _scoped, _sessionmaker
+from app.middleware.deadline import DeadlineMiddleware, request_timeout
+from app.utils.deadline import Deadline, current_deadline, is_deadline_error
+from tests.conftest import TEST_POSTGRES_URL
+
+# Counts to half a billion: runs for minutes unless interrupted
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+    "SELECT count(*) FROM (SELECT x FROM c LIMIT 500000000)"
+)
+
+
+@pytest.fixture
+async def pooled_engine(tmp_path):
+    """A file database with a single pooled connection."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'deadline.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    yield engine
+    await engine.dispose()
+
+
+class TestRequestTimeout:
+    """Tests for picking a request's timeout."""
+
+    def test_route_class_default(self):
+        """Test the route class default applies without a header."""
+        scope = {"type": "http", "headers": []}
+        assert request_timeout(scope, "read") == 5.0
+        assert request_timeout(scope, "expensive") == 30.0
+
+    def test_header_is_capped(self):
+        """Test clients can shorten the timeout but not extend it."""
+        short = {"type": "http", "headers": [(b"x-request-timeout", b"0.5")]}
+        long = {"type": "http", "headers": [(b"x-request-timeout", b"3600")]}
+        invalid = {"type": "http", "headers": [(b"x-request-timeout", b"soon")]}
+
+        assert request_timeout(short, "write") == 0.5
+        assert request_timeout(long, "write") == 10.0
+        assert request_timeout(invalid, "write") == 10.0
+
+
+class TestSessionDeadline:
+    """Tests for deadlines applied to database sessions."""
+
+    @pytest.mark.asyncio
+    async def test_slow_query_stops_at_deadline(self, pooled_engine):
+        """Test a query past the deadline fails fast and frees its connection."""
+        token = current_deadline.set(Deadline(0.2))
+        started = time.monotonic()
+        try:
+            with pytest.raises(DBAPIError) as exc_info:
+                async with _scoped(_sessionmaker(pooled_engine)()) as session:
+                    await session.execute(SLOW_QUERY)
+        finally:
+            current_deadline.reset(token)
+
+        assert is_deadline_error(exc_info.value)
+        assert time.monotonic() - started < 2
+        assert pooled_engine.pool.checkedout() == 0
+
+        # The handler is removed for sessions without a deadline
+        async with _sessionmaker(pooled_engine)() as session:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_request_returns_connection(self, pooled_engine):
+        """Test cancelling a request stops its query in SQLite's thread too."""
+        deadline = Deadline(60)
+
+        async def request():
+            current_deadline.set(deadline)
+            async with _scoped(_sessionmaker(pooled_engine)()) as session:
+                await session.execute(SLOW_QUERY)
+
+        running = asyncio.create_task(request())
+        await asyncio.sleep(0.2)
+        deadline.cancel()
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+
+        started = time.monotonic()
+        async with _sessionmaker(pooled_engine)() as session:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_statement_timeout_is_only_set_when_tighter(self, postgres_engine):
+        """Test deadlines looser than the connection's timeout send no SET."""
+        engine = create_async_engine(
+            TEST_POSTGRES_URL,
+            connect_args={"server_settings": {"statement_timeout": "2000"}},
+        )
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            for timeout in (10, 10, 1):
+                token = current_deadline.set(Deadline(timeout))
+                try:
+                    async with _scoped(_sessionmaker(engine)()) as session:
+                        await session.execute(text("SELECT 1"))
+                finally:
+                    current_deadline.reset(token)
+        finally:
+            await engine.dispose()
+
+        assert [s for s in statements if "statement_timeout" in s] == [
+            "SELECT setting::int FROM pg_settings WHERE name = 'statement_timeout'",
+            statements[-2],
+        ]
+        assert statements[-2].startswith("SET LOCAL statement_timeout = 9")
+
+
+class TestDeadlineMiddleware:
+    """Tests for enforcing deadlines on requests."""
+
+    @pytest.mark.asyncio
+    async def test_slow_request_gets_504(self):
+        """Test a request still running at its deadline is answered with 504."""
+
+        async def slow(request):
+            await asyncio.sleep(10)
+            return PlainTextResponse("done")
+
+        app = DeadlineMiddleware(Starlette(routes=[Route("/slow", slow)]))
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            started = time.monotonic()
+            response = await client.get("/slow", headers={"X-Request-Timeout": "0.1"})
+
+        assert response.status_code == 504
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_endpoint(self):
+        """Test the endpoint is cancelled once the client goes away."""
+        cancelled = asyncio.Event()
+
+        async def slow(request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return PlainTextResponse("done")
+
+        app = DeadlineMiddleware(Starlette(routes=[Route("/slow", slow)]))
+        messages = [
+            {"type": "http.request", "body": b"", "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+        sent = []
+
+        async def receive():
+            if len(messages) == 1:
+                await asyncio.sleep(0.1)
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/slow",
+            "query_string": b"",
+            "headers": [],
+        }
+        await asyncio.wait_for(app(scope, receive, send), 1)
+
+        assert cancelled.is_set()
+        assert sent == []
@@ -0,0 +1,144 @@
+"""
+Tests for the task change feed.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task
+from app.models.task_change import TaskChange
+from app.models.user import User
+from app.services.events import TaskEventBus, publish_task_event, task_event_bus
+
+
+class TestTaskEventBus:
+    """Tests for in-process event fan-out."""
+
+    def test_events_are_filtered_by_owner(self):
+        """Test subscribers only receive their own tasks' events."""
+        bus = TaskEventBus(queue_size=10, replay_size=10)
+        mine, _ = bus.subscribe(owner_id=1)
+        theirs, _ = bus.subscribe(owner_id=2)
+
+        bus.publish(1, "task.created", task_id=5, owner_id=1)
+
+        assert mine.queue.qsize() == 1
+        assert theirs.queue.qsize() == 0
+
+    def test_slow_subscriber_is_dropped(self):
+        """Test a subscriber with a full queue is disconnected."""
+        bus = TaskEventBus(queue_size=2, replay_size=10)
+        subscription, _ = bus.subscribe(owner_id=1)
+
+        for task_id in range(3):
+            bus.publish(task_id, "task.updated", task_id=task_id, owner_id=1)
+
+        assert subscription.overflowed is True
+        assert bus.subscriber_count == 0
+
+    def test_resume_from_last_event_id(self):
+        """Test reconnecting replays missed events."""
+        bus = TaskEventBus(queue_size=10, replay_size=10)
+        first = bus.publish(10, "task.created", task_id=1, owner_id=1)
+        bus.publish(12, "task.created", task_id=2, owner_id=2)
+        bus.publish(11, "task.updated", task_id=1, owner_id=1)
+
+        subscription, complete = bus.subscribe(owner_id=1, last_event_id=first.id)
+
+        assert complete is True
+        assert subscription.queue.qsize() == 1
+        assert subscription.queue.get_nowait().type == "task.updated"
+
+    def test_resume_beyond_replay_buffer(self):
+        """Test resuming from an evicted event is reported as incomplete."""
+        bus = TaskEventBus(queue_size=10, replay_size=2)
+        for task_id in range(5):
+            bus.publish(task_id + 1, "task.created", task_id=task_id, owner_id=1)
+
+        _, complete = bus.subscribe(owner_id=1, last_event_id=1)
+
+        assert complete is False
+
+    def test_resume_on_another_process(self):
+        """Test event IDs from one process resume on another with the same events."""
+        buses = [TaskEventBus(queue_size=10, replay_size=10) for _ in range(2)]
+        for bus in buses:
+            # Notifications arrive in commit order, not change log ID order
+            bus.publish(7, "task.created", task_id=1, owner_id=1)
+            bus.publish(5, "task.updated", task_id=2, owner_id=1)
+
+        subscription, complete = buses[1].subscribe(owner_id=1, last_event_id=7)
+
+        assert complete is True
+        assert subscription.queue.get_nowait().id == 5
+
+    def test_resume_from_unknown_event(self):
+        """Test an ID this process never saw is reported as incomplete."""
+        bus = TaskEventBus(queue_size=10, replay_size=10)
+        bus.publish(7, "task.created", task_id=1, owner_id=1)
+
+        subscription, complete = bus.subscribe(owner_id=1, last_event_id=3)
+
+        assert complete is False
+        assert subscription.queue.empty()
+
+
+class TestTaskServiceEvents:
+    """Tests for events emitted by task writes."""
+
+    @pytest.mark.asyncio
+    async def test_writes_publish_events(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        test_user: User,
+        db_session: AsyncSession,
+    ):
+        """Test create, complete and delete reach subscribers after commit."""
+        subscription, _ = task_event_bus.subscribe(owner_id=test_user.id)
+        try:
+            response = await client.post(
+                "/api/v1/tasks", json={"title": "Watched"}, headers=auth_headers
+            )
+            task_id = response.json()["id"]
+            await client.patch(
+                f"/api/v1/tasks/{task_id}/complete", headers=auth_headers
+            )
+            await client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+
+            events = [subscription.queue.get_nowait() for _ in range(3)]
+        finally:
+            task_event_bus.unsubscribe(subscription)
+
+        assert [e.type for e in events] == [
+            "task.created",
+            "task.completed",
+            "task.deleted",
+        ]
+        assert all(e.task_id == task_id for e in events)
+        assert events[0].data["title"] == "Watched"
+        assert events[2].data is None
+        changes = await db_session.execute(
+            select(TaskChange.id).where(TaskChange.task_id == task_id)
+        )
+        assert [e.id for e in events] == list(changes.scalars())
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_writes_publish_nothing(
+        self, db_session: AsyncSession, test_user: User
+    ):
+        """Test events from a rolled back transaction are discarded."""
+        subscription, _ = task_event_bus.subscribe(owner_id=test_user.id)
+        try:
+            task = Task(title="Never committed", owner_id=test_user.id)
+            db_session.add(task)
+            await db_session.flush()
+            await publish_task_event(db_session, 1, "task.created", task)
+            await db_session.rollback()
+            await db_session.commit()
+        finally:
+            task_event_bus.unsubscribe(subscription)
+
+        assert subscription.queue.empty()
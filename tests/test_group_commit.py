@@ -0,0 +1,150 @@
+"""
+Tests for group commit of task writes.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.task import Task, TaskStatus
+from app.models.task_change import TaskChange
+from app.models.user import User
+from app.services.group_commit import WriteCoalescer
+from app.utils.exceptions import ForbiddenException, NotFoundException
+
+
+@pytest.fixture
+async def sessionmaker(
+    tmp_path: Path,
+) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """Session factory on a file database the coalescer can open sessions on."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/writes.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def users(sessionmaker: async_sessionmaker[AsyncSession]) -> list[User]:
+    """Two users owning tasks."""
+    async with sessionmaker() as session:
+        users = [
+            User(email=f"u{n}@example.com", username=f"u{n}", hashed_password="x")
+            for n in range(2)
+        ]
+        session.add_all(users)
+        await session.commit()
+        return users
+
+
+class TestGroupCommit:
+    """Tests for WriteCoalescer."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_creates_share_one_commit(
+        self, sessionmaker: async_sessionmaker[AsyncSession], users: list[User]
+    ):
+        """Test concurrent writes are committed together and each gets its row."""
+        coalescer = WriteCoalescer(sessionmaker, window=0.05, max_batch=64)
+        commits = []
+        sync_engine = sessionmaker.kw["bind"].sync_engine
+        event.listen(sync_engine, "commit", lambda conn: commits.append(conn))
+
+        tasks = await asyncio.gather(
+            *(
+                coalescer.create_task({"title": f"Task {n}", "owner_id": users[0].id})
+                for n in range(10)
+            )
+        )
+
+        assert len(commits) == 1
+        assert [task.title for task in tasks] == [f"Task {n}" for n in range(10)]
+        assert len({task.id for task in tasks}) == 10
+        async with sessionmaker() as session:
+            changes = await session.scalar(select(func.count(TaskChange.id)))
+        assert changes == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_flushes_at_max_size(
+        self, sessionmaker: async_sessionmaker[AsyncSession], users: list[User]
+    ):
+        """Test a full batch is committed without waiting for the window."""
+        coalescer = WriteCoalescer(sessionmaker, window=60, max_batch=3)
+
+        tasks = await asyncio.wait_for(
+            asyncio.gather(
+                *(
+                    coalescer.create_task({"title": "Quick", "owner_id": users[0].id})
+                    for _ in range(3)
+                )
+            ),
+            timeout=5,
+        )
+
+        assert len(tasks) == 3
+
+    @pytest.mark.asyncio
+    async def test_errors_are_per_request(
+        self, sessionmaker: async_sessionmaker[AsyncSession], users: list[User]
+    ):
+        """Test a failing or forbidden write does not fail the rest of its batch."""
+        coalescer = WriteCoalescer(sessionmaker, window=0.05, max_batch=64)
+        mine, theirs = await asyncio.gather(
+            coalescer.create_task({"title": "Mine", "owner_id": users[0].id}),
+            coalescer.create_task({"title": "Theirs", "owner_id": users[1].id}),
+        )
+
+        results = await asyncio.gather(
+            coalescer.complete_task(mine.id, users[0]),
+            coalescer.complete_task(theirs.id, users[0]),
+            coalescer.complete_task(9999, users[0]),
+            coalescer.create_task({"title": None, "owner_id": users[0].id}),
+            coalescer.create_task({"title": "Fine", "owner_id": users[0].id}),
+            return_exceptions=True,
+        )
+
+        assert results[0].status == TaskStatus.COMPLETED.value
+        assert results[0].is_completed is True
+        assert isinstance(results[1], ForbiddenException)
+        assert isinstance(results[2], NotFoundException)
+        assert isinstance(results[3], Exception)
+        assert results[4].title == "Fine"
+        async with sessionmaker() as session:
+            titles = (await session.execute(select(Task.title))).scalars().all()
+        assert sorted(titles) == ["Fine", "Mine", "Theirs"]
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_is_not_retried(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        users: list[User],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Test a batch whose COMMIT fails is not replayed write by write."""
+        coalescer = WriteCoalescer(sessionmaker, window=0.05, max_batch=64)
+        commit = AsyncSession.commit
+
+        async def commit_then_fail(session: AsyncSession) -> None:
+            # The commit went through but its acknowledgement was lost
+            await commit(session)
+            raise ConnectionError("connection lost during COMMIT")
+
+        monkeypatch.setattr(AsyncSession, "commit", commit_then_fail)
+        results = await asyncio.gather(
+            *(
+                coalescer.create_task({"title": f"Task {n}", "owner_id": users[0].id})
+                for n in range(3)
+            ),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+        async with sessionmaker() as session:
+            tasks = await session.scalar(select(func.count(Task.id)))
+        assert tasks == 3
@@ -0,0 +1,197 @@
+"""
+Tests for Idempotency-Key support.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.config import settings
+from app.database import Base
+from app.models.idempotency_key import IdempotencyKey
+from app.models.task import Task
+from app.services.idempotency import IdempotencyService
+from app.utils.exceptions import ConflictException
+from app.utils.rate_limit import BucketLimit, rate_limiter
+
+
+@pytest.fixture
+async def key_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    """Keep idempotency keys in a file database for the middleware to open."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/keys.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    monkeypatch.setattr(database, "AsyncSessionLocal", sessionmaker)
+    yield sessionmaker
+    await engine.dispose()
+
+
+async def count_tasks(db_session: AsyncSession) -> int:
+    return await db_session.scalar(select(func.count(Task.id)))
+
+
+class TestIdempotencyKeys:
+    """Tests for replaying mutating task requests."""
+
+    @pytest.mark.asyncio
+    async def test_retry_replays_stored_response(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        key_store: async_sessionmaker,
+    ):
+        """Test a retried create returns the first response without a new task."""
+        headers = {**auth_headers, "Idempotency-Key": "create-1"}
+
+        first = await client.post(
+            "/api/v1/tasks", json={"title": "Once"}, headers=headers
+        )
+        retry = await client.post(
+            "/api/v1/tasks", json={"title": "Once"}, headers=headers
+        )
+
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert await count_tasks(db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_key_reused_for_other_request(
+        self, client: AsyncClient, auth_headers: dict, key_store: async_sessionmaker
+    ):
+        """Test a key cannot be reused with a different body."""
+        headers = {**auth_headers, "Idempotency-Key": "create-2"}
+        await client.post("/api/v1/tasks", json={"title": "A"}, headers=headers)
+
+        response = await client.post(
+            "/api/v1/tasks", json={"title": "B"}, headers=headers
+        )
+
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_write_once(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        key_store: async_sessionmaker,
+    ):
+        """Test duplicates sent together wait for the first request."""
+        headers = {**auth_headers, "Idempotency-Key": "create-3"}
+
+        responses = await asyncio.gather(
+            *(
+                client.post("/api/v1/tasks", json={"title": "Racy"}, headers=headers)
+                for _ in range(3)
+            )
+        )
+
+        assert {r.json()["id"] for r in responses} == {responses[0].json()["id"]}
+        assert await count_tasks(db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_request_can_be_retried(
+        self, client: AsyncClient, auth_headers: dict, key_store: async_sessionmaker
+    ):
+        """Test client errors are stored but the key still identifies the request."""
+        headers = {**auth_headers, "Idempotency-Key": "delete-1"}
+
+        first = await client.delete("/api/v1/tasks/999", headers=headers)
+        retry = await client.delete("/api/v1/tasks/999", headers=headers)
+
+        assert first.status_code == retry.status_code == 404
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_can_be_retried(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        key_store: async_sessionmaker,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Test a 429 is not replayed once the bucket has refilled."""
+        monkeypatch.setitem(rate_limiter.limits, "api", BucketLimit(0.001, 1))
+        headers = {**auth_headers, "Idempotency-Key": "create-4"}
+        await client.get("/api/v1/tasks", headers=auth_headers)
+
+        limited = await client.post(
+            "/api/v1/tasks", json={"title": "Later"}, headers=headers
+        )
+        await rate_limiter.store.clear()
+        retry = await client.post(
+            "/api/v1/tasks", json={"title": "Later"}, headers=headers
+        )
+
+        assert limited.status_code == 429
+        assert retry.status_code == 201
+        assert "Idempotent-Replayed" not in retry.headers
+        assert await count_tasks(db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_abandoned_claim_is_taken_over(
+        self, key_store: async_sessionmaker, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test a claim left by a dead worker only blocks until its lease ends."""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.0)
+        now = datetime.utcnow()
+        async with key_store() as session:
+            session.add_all(
+                IdempotencyKey(
+                    user_id=1,
+                    key=key,
+                    fingerprint="f",
+                    expires_at=now + timedelta(days=1),
+                    locked_until=now + timedelta(seconds=seconds),
+                )
+                for key, seconds in (("running", 60), ("abandoned", -1))
+            )
+            await session.commit()
+
+            with pytest.raises(ConflictException):
+                await IdempotencyService.claim(session, 1, "running", "f")
+            claimed = await IdempotencyService.claim(session, 1, "abandoned", "f")
+            record = await session.scalar(
+                select(IdempotencyKey).where(IdempotencyKey.key == "abandoned")
+            )
+
+        assert claimed is None
+        assert record.locked_until > now
+
+    @pytest.mark.asyncio
+    async def test_purge_expired_keys(self, key_store: async_sessionmaker):
+        """Test expired keys are removed and live ones kept."""
+        async with key_store() as session:
+            now = datetime.utcnow()
+            session.add_all(
+                IdempotencyKey(
+                    user_id=1,
+                    key=f"k{n}",
+                    fingerprint="f",
+                    expires_at=now + timedelta(hours=-1 if n < 3 else 1),
+                )
+                for n in range(4)
+            )
+            await session.commit()
+
+            removed = await IdempotencyService.purge_expired(session)
+            remaining = await session.scalar(select(func.count(IdempotencyKey.id)))
+
+        assert removed == 3
+        assert remaining == 1
@@ -0,0 +1,112 @@
+"""
+Tests for structured logging and the access log.
+"""
+
+import io
+import json
+import logging
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.middleware.access_log import SuccessSampler
+from app.utils.log import configure_logging, request_scope, stop_logging
+
+
+@pytest.fixture
+def restore_logging():
+    """Put back the logging setup (including pytest's handlers) after a test."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class TestJsonLogging:
+    """Tests for the queued JSON log pipeline."""
+
+    def test_lines_are_json_written_off_the_calling_thread(self, restore_logging):
+        """Test records become JSON lines written by the listener thread."""
+        writers = []
+
+        class Stream(io.StringIO):
+            def write(self, text: str) -> int:
+                writers.append(threading.current_thread())
+                return super().write(text)
+
+        stream = Stream()
+        configure_logging("INFO", stream=stream)
+        token = request_scope.set({"state": {"request_id": "req-1", "user_id": 7}})
+        try:
+            logging.getLogger("app.test").info("hello %s", "world", extra={"n": 1})
+            logging.getLogger("app.test").debug("hidden")
+        finally:
+            request_scope.reset(token)
+        stop_logging()
+
+        [line] = stream.getvalue().splitlines()
+        entry = json.loads(line)
+        assert entry["message"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["n"] == 1
+        assert entry["request_id"] == "req-1"
+        assert entry["user_id"] == 7
+        assert threading.main_thread() not in writers
+
+
+class TestSuccessSampler:
+    """Tests for sampling successful requests under load."""
+
+    def test_logs_everything_below_threshold(self):
+        """Test every request is logged while the rate is low."""
+        sampler = SuccessSampler(rate_threshold=1000, sample_rate=0.1)
+
+        assert all(sampler.sample() == 1.0 for _ in range(100))
+
+    def test_samples_above_threshold(self):
+        """Test the sample rate applies once the rate exceeds the threshold."""
+        sampler = SuccessSampler(rate_threshold=10, sample_rate=0.1)
+        for _ in range(100):
+            sampler.sample()
+        # A second has passed with 100 requests
+        sampler._window_started -= 1.0
+
+        assert sampler.sample() == 0.1
+
+
+class TestAccessLog:
+    """Tests for the access log middleware."""
+
+    async def test_request_is_logged_with_context(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        test_user,
+        caplog: pytest.LogCaptureFixture,
+    ):
+        """Test the line carries request ID, user, route, latency and DB time."""
+        with caplog.at_level(logging.INFO, logger="taskflow.access"):
+            response = await client.get(
+                "/api/v1/tasks/12345",
+                headers={**auth_headers, "X-Request-ID": "trace-42"},
+            )
+
+        assert response.headers["X-Request-ID"] == "trace-42"
+        [record] = [r for r in caplog.records if r.name == "taskflow.access"]
+        assert record.request_id == "trace-42"
+        assert record.user_id == test_user.id
+        assert record.route == "/api/v1/tasks/{task_id}"
+        assert record.status == 404
+        assert record.latency_ms > 0
+        assert record.db_statements >= 1
+        assert record.db_ms > 0
+
+    async def test_invalid_request_id_is_replaced(self, client: AsyncClient):
+        """Test unusable incoming request IDs get a generated one."""
+        response = await client.get("/health", headers={"X-Request-ID": "a b"})
+
+        assert response.headers["X-Request-ID"] != "a b"
+        assert len(response.headers["X-Request-ID"]) == 32
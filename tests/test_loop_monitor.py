@@ -0,0 +1,76 @@
+"""
+Tests for the event loop blocking detector.
+"""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.utils.loop_monitor import LoopMonitor, loop_lag
+from app.utils.metrics import Histogram, registry
+
+
+async def blocking(request):
+    time.sleep(0.2)
+    return PlainTextResponse("done")
+
+
+async def awaiting(request):
+    await asyncio.sleep(0.2)
+    return PlainTextResponse("done")
+
+
+app = Starlette(routes=[Route("/blocking/{n}", blocking), Route("/awaiting", awaiting)])
+
+
+class TestLoopMonitor:
+    """Tests for measuring loop lag and capturing blocking stacks."""
+
+    @pytest.mark.blocks_loop
+    async def test_blocking_request_is_captured(self):
+        """Test a blocking handler is recorded with its route and stack."""
+        monitor = LoopMonitor(threshold=0.05, interval=0.01)
+        monitor.start()
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/blocking/1")
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        [block] = monitor.blocks
+        assert block.duration_ms >= 150
+        assert block.route == "/blocking/1"
+        assert "in blocking" in block.stack
+        assert loop_lag.count() > 0
+
+    async def test_awaiting_request_is_not_captured(self):
+        """Test handlers that yield to the loop are not reported."""
+        monitor = LoopMonitor(threshold=0.05, interval=0.01)
+        monitor.start()
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/awaiting")
+        await monitor.stop()
+
+        assert list(monitor.blocks) == []
+
+
+class TestHistogram:
+    """Tests for rendering histograms."""
+
+    def test_buckets_are_cumulative(self):
+        """Test bucket counts, sum and count in the exposition format."""
+        histogram = Histogram("test_lag_seconds", "Lag.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert 'test_lag_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_lag_seconds_bucket{le="1"} 2' in lines
+        assert 'test_lag_seconds_bucket{le="+Inf"} 3' in lines
+        assert "test_lag_seconds_sum 5.55" in lines
+        assert "test_lag_seconds_count 3" in lines
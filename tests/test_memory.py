@@ -0,0 +1,86 @@
+"""
+Tests for the memory diagnostics admin endpoints.
+"""
+
+import tracemalloc
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.user import User
+from app.utils import memory
+
+
+@pytest.fixture
+def stop_tracing() -> None:
+    """Leave tracemalloc stopped and no snapshots after a test."""
+    yield
+    memory.stop_tracing()
+
+
+# Allocations held between the two snapshots of a test
+_retained: list[bytearray] = []
+
+
+class TestMemoryEndpoints:
+    """Tests for tracemalloc control, snapshot diffs and object counts."""
+
+    async def test_requires_superuser(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ):
+        """Test regular users cannot start tracing."""
+        response = await client.post("/api/v1/admin/memory/start", headers=auth_headers)
+
+        assert response.status_code == 403
+        assert not tracemalloc.is_tracing()
+
+    async def test_diff_shows_retained_allocations(
+        self,
+        client: AsyncClient,
+        superuser: User,
+        auth_headers: dict[str, str],
+        stop_tracing,
+    ):
+        """Test the diff between snapshots points at the allocating line."""
+        started = await client.post("/api/v1/admin/memory/start", headers=auth_headers)
+        base = await client.post("/api/v1/admin/memory/snapshots", headers=auth_headers)
+        _retained.extend(bytearray(1024) for _ in range(1000))
+        target = await client.post(
+            "/api/v1/admin/memory/snapshots", headers=auth_headers
+        )
+        diff = await client.get(
+            "/api/v1/admin/memory/diff",
+            params={"base": base.json()["id"], "target": target.json()["id"]},
+            headers=auth_headers,
+        )
+        _retained.clear()
+
+        assert started.json()["tracing"] is True
+        assert base.status_code == target.status_code == 201
+        top = diff.json()[0]
+        assert top["location"].startswith(__file__)
+        assert top["size_diff_bytes"] >= 1000 * 1024
+        assert top["count_diff"] >= 1000
+
+    async def test_snapshot_needs_tracing(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test snapshots are refused while tracemalloc is stopped."""
+        response = await client.post(
+            "/api/v1/admin/memory/snapshots", headers=auth_headers
+        )
+
+        assert response.status_code == 409
+
+    async def test_object_counts_include_orm_instances(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test live Task and User instances and gc generations are reported."""
+        response = await client.get(
+            "/api/v1/admin/memory/objects", headers=auth_headers
+        )
+
+        body = response.json()
+        assert len(body["gc_counts"]) == 3
+        assert body["orm_instances"]["User"] >= 1
+        assert "Task" in body["orm_instances"]
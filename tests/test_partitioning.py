@@ -0,0 +1,148 @@
+"""
+Tests for the partitioning tooling.
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.models.task import Task
+from app.models.user import User
+from app.utils.partitioning import (
+    _scanned_relations,
+    add_months,
+    ensure_future_partitions,
+    hash_conversion_steps,
+    is_partition_table,
+    range_conversion_steps,
+    range_partition_ddl,
+    range_partition_name,
+    run_steps,
+)
+
+
+class TestPartitionNames:
+    """Tests for partition naming and bounds."""
+
+    def test_add_months_wraps_years(self):
+        """Test month arithmetic returns the first of the month."""
+        assert add_months(date(2024, 11, 17), 0) == date(2024, 11, 1)
+        assert add_months(date(2024, 11, 17), 2) == date(2025, 1, 1)
+
+    def test_range_partition_ddl(self):
+        """Test a monthly partition covers exactly one month."""
+        ddl = range_partition_ddl("tasks", date(2024, 12, 1))
+
+        assert "tasks_p202412 PARTITION OF tasks" in ddl
+        assert "FROM ('2024-12-01') TO ('2025-01-01')" in ddl
+
+    def test_partition_tables_are_recognised(self):
+        """Test autogenerate skips partitions but not regular tables."""
+        assert is_partition_table("tasks_p202412")
+        assert is_partition_table("tasks_h3")
+        assert is_partition_table("tasks_legacy")
+        assert not is_partition_table("tasks")
+        assert not is_partition_table("tasks_archive")
+
+
+class TestConversionSteps:
+    """Tests for the online conversion plans."""
+
+    def test_range_conversion_attaches_existing_table(self):
+        """Test only the swap step takes locks and the old rows are attached."""
+        steps = range_conversion_steps(
+            Task.__table__, months_ahead=1, today=date(2024, 6, 15)
+        )
+        swap = "\n".join(steps[-1].statements)
+
+        assert "CONCURRENTLY" in steps[0].statements[0]
+        assert steps[0].transactional is False
+        assert "NOT VALID" in steps[1].statements[0]
+        assert "PARTITION BY RANGE (created_at)" in swap
+        assert "PRIMARY KEY (id, created_at)" in swap
+        assert "ATTACH PARTITION tasks_legacy FOR VALUES FROM (MINVALUE)" in swap
+        assert (
+            "ALTER INDEX ix_tasks_queue ATTACH PARTITION ix_tasks_queue_legacy" in swap
+        )
+        assert "created_at < '2024-07-01'" in steps[1].statements[0]
+        assert "FROM (MINVALUE) TO ('2024-07-01')" in swap
+        assert "tasks_p202407" in swap and "tasks_p202406" not in swap
+        assert "%" not in swap
+
+    async def test_range_conversion_accepts_writes_between_steps(
+        self, postgres_engine: AsyncEngine
+    ):
+        """Test tasks created during the conversion land in the new table."""
+        today = datetime.utcnow().date()
+        steps = range_conversion_steps(Task.__table__, months_ahead=2, today=today)
+        async with AsyncSession(postgres_engine) as session:
+            user = User(
+                email="convert@example.com",
+                username="convert",
+                hashed_password="x",
+            )
+            session.add(user)
+            await session.flush()
+            owner_id = user.id
+            await session.commit()
+
+        async with postgres_engine.connect() as conn:
+            autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for number, step in enumerate(steps):
+                async with AsyncSession(postgres_engine) as session:
+                    session.add(Task(title=f"Task {number}", owner_id=owner_id))
+                    await session.commit()
+                await autocommit.run_sync(run_steps, [step])
+            created = await autocommit.run_sync(
+                ensure_future_partitions, "tasks", 2, today
+            )
+
+        async with AsyncSession(postgres_engine) as session:
+            session.add(Task(title="After", owner_id=owner_id))
+            await session.commit()
+            rows = await session.execute(
+                select(text("tableoid::regclass::text"), Task.title).order_by(Task.id)
+            )
+
+        assert rows.all() == [
+            *(("tasks_legacy", f"Task {number}") for number in range(len(steps))),
+            ("tasks_legacy", "After"),
+        ]
+        assert created == [
+            range_partition_name("tasks", add_months(today, offset))
+            for offset in (1, 2)
+        ]
+
+    def test_hash_conversion_backfills_in_batches(self):
+        """Test rows are copied in id ranges and the tables swapped at the end."""
+        steps = hash_conversion_steps(Task.__table__, modulus=4, batch_size=100)
+        create, backfill, swap = steps
+
+        assert "PARTITION BY HASH (owner_id)" in create.statements[0]
+        assert sum("REMAINDER" in s for s in create.statements) == 4
+        assert backfill.backfill_from == "tasks"
+        assert backfill.batch_size == 100
+        assert ":low" in backfill.statements[0]
+        assert swap.statements[-1].endswith("OWNED BY tasks.id")
+        assert "ALTER TABLE tasks_hashed RENAME TO tasks" in swap.statements
+
+
+class TestPruningReport:
+    """Tests for reading EXPLAIN output."""
+
+    def test_scanned_relations(self):
+        """Test relations are collected from nested plan nodes."""
+        plan = [
+            {
+                "Plan": {
+                    "Node Type": "Append",
+                    "Plans": [
+                        {"Node Type": "Index Scan", "Relation Name": "tasks_h3"},
+                        {"Node Type": "Seq Scan", "Relation Name": "tasks_h3"},
+                    ],
+                }
+            }
+        ]
+
+        assert _scanned_relations(plan) == {"tasks_h3"}
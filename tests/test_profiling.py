@@ -0,0 +1,105 @@
+"""
+Tests for on-demand request profiling.
+"""
+
+import marshal
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.models.user import User
+from app.utils.profiling import profiles
+
+
+@pytest.fixture(autouse=True)
+def clear_profiles() -> None:
+    profiles._reports.clear()
+    yield
+    profiles._reports.clear()
+
+
+PROFILE = {"X-Profile": "1"}
+
+
+class TestProfiling:
+    """Tests for profiling requests sent with X-Profile."""
+
+    async def test_regular_users_are_not_profiled(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ):
+        """Test the header is ignored for users who are not superusers."""
+        response = await client.get(
+            "/api/v1/tasks", headers={**auth_headers, **PROFILE}
+        )
+
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert profiles.list() == []
+
+    async def test_superuser_request_is_profiled(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test a profiled request returns an ID to fetch its report with."""
+        response = await client.get(
+            "/api/v1/tasks", headers={**auth_headers, **PROFILE}
+        )
+        profile_id = response.headers["X-Profile-Id"]
+
+        listed = await client.get("/api/v1/admin/profiles", headers=auth_headers)
+        text = await client.get(
+            f"/api/v1/admin/profiles/{profile_id}", headers=auth_headers
+        )
+        raw = await client.get(
+            f"/api/v1/admin/profiles/{profile_id}?format=pstats", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        [summary] = listed.json()
+        assert summary["id"] == profile_id
+        assert summary["route"] == "/api/v1/tasks"
+        assert summary["user_id"] == superuser.id
+        assert "get_tasks" in text.text
+        assert any(name == "get_tasks" for (_, _, name) in marshal.loads(raw.content))
+
+    async def test_unprofiled_requests_are_untouched(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test requests without the header are not profiled."""
+        response = await client.get("/api/v1/tasks", headers=auth_headers)
+
+        assert "X-Profile-Id" not in response.headers
+        assert profiles.list() == []
+
+    async def test_profiling_is_rate_limited(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test superusers can only profile a few requests a minute."""
+        statuses = [
+            (
+                await client.get("/api/v1/tasks", headers={**auth_headers, **PROFILE})
+            ).status_code
+            for _ in range(3)
+        ]
+
+        assert statuses == [200, 200, 429]
+        assert len(profiles.list()) == 2
+
+    async def test_profiled_request_reports_the_api_limit(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test the profiling budget does not replace the API rate-limit headers."""
+        response = await client.get(
+            "/api/v1/tasks", headers={**auth_headers, **PROFILE}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == str(settings.RATE_LIMIT_API_BURST)
+
+    async def test_unknown_profile_is_404(
+        self, client: AsyncClient, superuser: User, auth_headers: dict[str, str]
+    ):
+        """Test fetching a profile that is not stored."""
+        response = await client.get("/api/v1/admin/profiles/nope", headers=auth_headers)
+
+        assert response.status_code == 404
@@ -0,0 +1,88 @@
+"""
+Tests for token-bucket rate limiting.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from app.utils.rate_limit import BucketLimit, InMemoryRateLimitStore, rate_limiter
+
+
+class TestInMemoryRateLimitStore:
+    """Tests for the in-process bucket store."""
+
+    @pytest.mark.asyncio
+    async def test_bucket_empties_and_reports_retry(self):
+        """Test a bucket allows its capacity, then asks the client to wait."""
+        store = InMemoryRateLimitStore()
+        limit = BucketLimit(rate=1.0, capacity=2)
+
+        results = [await store.take("k", limit) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        assert results[1].remaining == 0
+        assert results[2].headers()["Retry-After"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_buckets_refill_lazily(self, monkeypatch: pytest.MonkeyPatch):
+        """Test tokens come back with time, without any background work."""
+        store = InMemoryRateLimitStore()
+        limit = BucketLimit(rate=2.0, capacity=2)
+        clock = [100.0]
+        monkeypatch.setattr("app.utils.rate_limit.time.monotonic", lambda: clock[0])
+
+        await store.take("k", limit)
+        await store.take("k", limit)
+        clock[0] += 0.5
+
+        result = await store.take("k", limit)
+
+        assert result.allowed is True
+        assert result.remaining == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_full_buckets_are_evicted(self, monkeypatch: pytest.MonkeyPatch):
+        """Test buckets unused long enough to be full are dropped."""
+        store = InMemoryRateLimitStore(sweep_every=2)
+        limit = BucketLimit(rate=1.0, capacity=5)
+        clock = [0.0]
+        monkeypatch.setattr("app.utils.rate_limit.time.monotonic", lambda: clock[0])
+
+        await store.take("idle", limit)
+        clock[0] += 10
+        await store.take("busy", limit)
+
+        assert len(store) == 1
+
+
+class TestRateLimitedEndpoints:
+    """Tests for limits applied to API requests."""
+
+    @pytest.mark.asyncio
+    async def test_headers_on_every_response(
+        self, client: AsyncClient, auth_headers: dict
+    ):
+        """Test authenticated responses carry the user's bucket state."""
+        response = await client.get("/api/v1/tasks", headers=auth_headers)
+        missing = await client.get("/api/v1/tasks/999", headers=auth_headers)
+
+        assert response.headers["RateLimit-Limit"] == "100"
+        assert int(response.headers["RateLimit-Remaining"]) < 100
+        assert missing.status_code == 404
+        assert "RateLimit-Remaining" in missing.headers
+
+    @pytest.mark.asyncio
+    async def test_login_is_limited_per_ip(self, client: AsyncClient, test_user):
+        """Test repeated logins from one address get 429 with Retry-After."""
+        statuses = []
+        for _ in range(rate_limiter.limits["auth"].capacity + 1):
+            response = await client.post(
+                "/api/v1/auth/login",
+                json={"username": "testuser", "password": "wrong-password"},
+            )
+            statuses.append(response.status_code)
+
+        assert statuses[:-1] == [401] * rate_limiter.limits["auth"].capacity
+        assert statuses[-1] == 429
+        assert "Retry-After" in response.headers
+        assert response.headers["RateLimit-Remaining"] == "0"
@@ -0,0 +1,227 @@
+"""
+Tests for coalescing identical concurrent reads.
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task
+from app.models.task_change import TaskChange
+from app.models.user import User
+from app.services import read_coalescing
+from app.services.task import TaskService
+from app.utils.deadline import Deadline
+from app.utils.singleflight import SingleFlight
+from tests.conftest import TestAsyncSessionLocal, test_engine
+
+
+@pytest.fixture
+async def test_task(db_session: AsyncSession, test_user: User) -> Task:
+    """A task owned by the test user."""
+    task = Task(title="Shared read", owner_id=test_user.id)
+    db_session.add(task)
+    await db_session.commit()
+    return task
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self):
+        """Test callers with the same key share a single call."""
+        flight: SingleFlight[int] = SingleFlight()
+        runs = 0
+
+        async def work() -> int:
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+        assert runs == 1
+        assert [value for value, _ in results] == [42] * 5
+        assert [shared for _, shared in results].count(False) == 1
+        assert not flight.in_flight("key")
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        """Test a failing call raises in all callers and is not cached."""
+        flight: SingleFlight[int] = SingleFlight()
+
+        async def fail() -> int:
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert not flight.in_flight("key")
+
+
+class TestReadCoalescing:
+    """Tests for coalesced task reads."""
+
+    @pytest.mark.asyncio
+    async def test_identical_list_reads_share_queries(
+        self, db_session: AsyncSession, test_user: User, test_task: Task
+    ):
+        """Test concurrent identical list reads run the queries once."""
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        before = read_coalescing.coalesced_reads.value(operation="list")
+        event.listen(test_engine.sync_engine, "before_cursor_execute", count)
+        try:
+            bodies = await asyncio.gather(
+                *(
+                    read_coalescing.get_tasks_json(db_session, test_user, limit=20)
+                    for _ in range(3)
+                )
+            )
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", count)
+
+        assert len(set(bodies)) == 1
+        assert len(statements) == 2  # one page query and one count
+        assert read_coalescing.coalesced_reads.value(operation="list") == before + 2
+
+    @pytest.mark.asyncio
+    async def test_reads_are_keyed_per_user(
+        self, db_session: AsyncSession, test_user: User, test_task: Task
+    ):
+        """Test another user's identical read is not shared."""
+        other = User(email="o@example.com", username="other", hashed_password="x")
+        db_session.add(other)
+        await db_session.commit()
+
+        mine, theirs = await asyncio.gather(
+            read_coalescing.get_tasks_json(db_session, test_user, limit=20),
+            read_coalescing.get_tasks_json(db_session, other, limit=20),
+        )
+
+        assert b'"total":1' in mine
+        assert b'"total":0' in theirs
+
+    @pytest.mark.asyncio
+    async def test_committed_write_starts_a_new_generation(
+        self, client: AsyncClient, auth_headers: dict, test_user: User
+    ):
+        """Test a task write moves its owner's reads to a new key."""
+        generation = read_coalescing._generation(test_user.id)
+
+        await client.post("/api/v1/tasks", json={"title": "New"}, headers=auth_headers)
+
+        assert read_coalescing._generation(test_user.id) > generation
+
+    @pytest.mark.asyncio
+    async def test_dropped_generations_stay_newer(
+        self, monkeypatch: pytest.MonkeyPatch, test_user: User
+    ):
+        """Test clearing the generation table never brings back an old key."""
+        monkeypatch.setattr(read_coalescing, "MAX_TRACKED_WRITERS", 1)
+        monkeypatch.setattr(read_coalescing, "_write_generations", {})
+        monkeypatch.setattr(read_coalescing, "_generation_floor", 0)
+        before = read_coalescing._generation(test_user.id)
+
+        async with TestAsyncSessionLocal() as session:
+            for owner_id in (test_user.id, test_user.id + 1):
+                session.add(TaskChange(task_id=1, owner_id=owner_id))
+            await session.commit()
+
+        assert read_coalescing._write_generations == {}
+        assert read_coalescing._generation(test_user.id) > before
+
+    @pytest.mark.asyncio
+    async def test_shared_read_has_its_own_session(
+        self,
+        db_session: AsyncSession,
+        test_user: User,
+        test_task: Task,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Test a cancelled first caller's session is not used by the others."""
+        sessions = []
+        started = asyncio.Event()
+        release = asyncio.Event()
+        get_tasks = TaskService.get_tasks
+
+        async def slow_get_tasks(session: AsyncSession, *args, **kwargs):
+            sessions.append(session)
+            started.set()
+            await release.wait()
+            return await get_tasks(session, *args, **kwargs)
+
+        monkeypatch.setattr(TaskService, "get_tasks", slow_get_tasks)
+        first_session = TestAsyncSessionLocal()
+        first = asyncio.create_task(
+            read_coalescing.get_tasks_json(first_session, test_user, limit=20)
+        )
+        await started.wait()
+        second = asyncio.create_task(
+            read_coalescing.get_tasks_json(db_session, test_user, limit=20)
+        )
+        await asyncio.sleep(0)
+        first.cancel()
+        await first_session.close()
+        release.set()
+
+        assert b'"total":1' in await second
+        assert sessions[0] not in (first_session, db_session)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_caller_does_not_stop_the_query(
+        self,
+        db_session: AsyncSession,
+        test_user: User,
+        test_task: Task,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Test the shared query does not run under the first caller's deadline."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+        get_tasks = TaskService.get_tasks
+
+        async def slow_get_tasks(session: AsyncSession, *args, **kwargs):
+            started.set()
+            await release.wait()
+            return await get_tasks(session, *args, **kwargs)
+
+        monkeypatch.setattr(TaskService, "get_tasks", slow_get_tasks)
+        deadline = Deadline(30)
+        first_session = TestAsyncSessionLocal(info={"deadline": deadline})
+        first = asyncio.create_task(
+            read_coalescing.get_tasks_json(first_session, test_user, limit=20)
+        )
+        await started.wait()
+        second = asyncio.create_task(
+            read_coalescing.get_tasks_json(db_session, test_user, limit=20)
+        )
+        await asyncio.sleep(0)
+        # What the deadline middleware does when the client goes away
+        deadline.cancel()
+        first.cancel()
+        await first_session.close()
+        release.set()
+
+        assert b'"total":1' in await second
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client: AsyncClient, auth_headers: dict):
+        """Test read counters are exposed at /metrics."""
+        await client.get("/api/v1/tasks", headers=auth_headers)
+
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert 'taskflow_task_reads_total{operation="list"}' in response.text
@@ -0,0 +1,29 @@
+"""
+Tests for the server launcher.
+"""
+
+import pytest
+
+from app.__main__ import worker_count
+from app.config import settings
+
+
+class TestWorkerCount:
+    """Tests for sizing the worker pool."""
+
+    def test_one_worker_per_cpu(self, monkeypatch: pytest.MonkeyPatch):
+        """Test the CPU count limits workers when the database allows more."""
+        monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 1000)
+        assert worker_count(cpus=4) == 4
+
+    def test_capped_by_connection_budget(self, monkeypatch: pytest.MonkeyPatch):
+        """Test workers never open more connections than the budget."""
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", 10)
+        monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 20)
+        monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 100)
+        assert worker_count(cpus=16) == 3
+
+    def test_at_least_one_worker(self, monkeypatch: pytest.MonkeyPatch):
+        """Test a tiny budget still runs one worker."""
+        monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 5)
+        assert worker_count(cpus=8) == 1
@@ -0,0 +1,147 @@
+"""
+Tests for sharding users and tasks across databases.
+"""
+
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.database import Base, configure_shards, get_global_db, shard_for_user
+from app.main import app
+from app.models.task import Task
+from app.models.user import User
+from app.models.user_directory import UserDirectory
+from app.utils import security
+from app.utils.security import decode_access_token
+
+SHARD_COUNT = 2
+
+
+@pytest.fixture
+async def shards(tmp_path: Path) -> AsyncGenerator[None, None]:
+    """Spread users over SQLite files for the duration of a test."""
+    configure_shards(
+        [f"sqlite+aiosqlite:///{tmp_path}/shard{n}.db" for n in range(SHARD_COUNT)]
+    )
+    for engine in database.shard_engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield
+    for engine in database.shard_engines:
+        await engine.dispose()
+    configure_shards([])
+
+
+@pytest.fixture
+async def sharded_client(
+    db_session: AsyncSession, shards: None
+) -> AsyncGenerator[AsyncClient, None]:
+    """Client whose global database is the test session and data is sharded."""
+
+    async def override_get_global_db() -> AsyncGenerator[AsyncSession, None]:
+        yield db_session
+
+    app.dependency_overrides[get_global_db] = override_get_global_db
+    async with AsyncClient(app=app, base_url="http://test") as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+async def register_and_login(client: AsyncClient, name: str) -> dict[str, str]:
+    """Register a user and return their authorization headers."""
+    await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": f"{name}@example.com",
+            "username": name,
+            "password": "password123",
+        },
+    )
+    response = await client.post(
+        "/api/v1/auth/login", json={"username": name, "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class TestSharding:
+    """Tests for routing users to their shard."""
+
+    @pytest.mark.asyncio
+    async def test_users_are_placed_by_directory(
+        self, sharded_client: AsyncClient, db_session: AsyncSession
+    ):
+        """Test users get global IDs and live on the shard the directory records."""
+        for n in range(4):
+            await register_and_login(sharded_client, f"user{n}")
+
+        entries = (await db_session.execute(select(UserDirectory))).scalars().all()
+        assert len({entry.id for entry in entries}) == 4
+        for entry in entries:
+            assert entry.shard == shard_for_user(entry.id)
+            async with database.shard_sessionmakers[entry.shard]() as session:
+                user = await session.get(User, entry.id)
+            assert user.username == entry.username
+
+    @pytest.mark.asyncio
+    async def test_requests_use_the_callers_shard(self, sharded_client: AsyncClient):
+        """Test tasks are written to and read from the owner's shard only."""
+        headers = {}
+        for n in range(4):
+            headers[n] = await register_and_login(sharded_client, f"user{n}")
+        token = headers[0]["Authorization"].split()[1]
+        shard = decode_access_token(token)["shard"]
+
+        response = await sharded_client.post(
+            "/api/v1/tasks", json={"title": "Sharded"}, headers=headers[0]
+        )
+        assert response.status_code == 201
+        response = await sharded_client.get("/api/v1/tasks", headers=headers[0])
+        assert response.json()["total"] == 1
+
+        for number, sessionmaker in enumerate(database.shard_sessionmakers):
+            async with sessionmaker() as session:
+                titles = (await session.execute(select(Task.title))).scalars().all()
+            assert titles == (["Sharded"] if number == shard else [])
+
+    @pytest.mark.asyncio
+    async def test_token_is_decoded_once_per_request(
+        self, sharded_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test shard routing, idempotency and auth share one decoded token."""
+        headers = await register_and_login(sharded_client, "once")
+        decoded = []
+
+        def counting_decode(token: str) -> dict:
+            decoded.append(token)
+            return decode_access_token(token)
+
+        monkeypatch.setattr(security, "decode_access_token", counting_decode)
+        response = await sharded_client.post(
+            "/api/v1/tasks",
+            json={"title": "Once"},
+            headers={**headers, "Idempotency-Key": "once-1"},
+        )
+
+        assert response.status_code == 201
+        assert len(decoded) == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_username_across_shards(self, sharded_client: AsyncClient):
+        """Test usernames stay unique across shards."""
+        await register_and_login(sharded_client, "taken")
+
+        response = await sharded_client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": "other@example.com",
+                "username": "taken",
+                "password": "password123",
+            },
+        )
+
+        assert response.status_code == 409
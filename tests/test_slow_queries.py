@@ -0,0 +1,134 @@
+"""
+Tests for the slow-query log and plan capture.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import settings
+from app.database import Base, _sessionmaker
+from app.models.user import User
+from app.services import slow_queries
+from app.services.task import TaskService
+
+
+@pytest.fixture
+async def file_engine(tmp_path: Path) -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/slow.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def clear_captured_plans() -> None:
+    slow_queries.captured_plans.clear()
+    yield
+    slow_queries.captured_plans.clear()
+
+
+@pytest.fixture
+def log_every_query(monkeypatch: pytest.MonkeyPatch, clear_captured_plans) -> None:
+    """Treat every statement as slow and capture every plan."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MAX_PENDING_CAPTURES", 10)
+
+
+class TestSlowQueryLog:
+    """Tests for logging slow statements and capturing their plans."""
+
+    def test_redact_keeps_numbers_only(self):
+        """Test strings and other values are hidden, numbers kept."""
+        redacted = slow_queries.redact({"owner_id": 3, "title": "secret", "x": None})
+
+        assert redacted == {"owner_id": 3, "title": "<str>", "x": None}
+
+    def test_plan_literals_are_scrubbed(self):
+        """Test quoted values are hidden in plans and bare numbers kept."""
+        plan = "Filter: ((owner_id = 7) AND ((title)::text = 'it''s secret'::text))"
+
+        assert slow_queries.scrub_plan(plan) == (
+            "Filter: ((owner_id = 7) AND ((title)::text = '<redacted>'::text))"
+        )
+
+    def test_locking_selects_are_not_re_run(self):
+        """Test only SELECTs without row locking clauses are explained."""
+        assert slow_queries._is_plain_select("SELECT id FROM tasks WHERE id = $1")
+        assert not slow_queries._is_plain_select(
+            "SELECT id FROM tasks LIMIT $1 FOR UPDATE SKIP LOCKED"
+        )
+        assert not slow_queries._is_plain_select("SELECT id FROM tasks FOR share")
+        assert not slow_queries._is_plain_select("UPDATE tasks SET title = $1")
+
+    async def test_postgres_plan_hides_values(
+        self, postgres_engine: AsyncEngine, log_every_query
+    ):
+        """Test EXPLAIN ANALYZE output keeps no string the query ran with."""
+        async with _sessionmaker(postgres_engine)() as session:
+            await TaskService.get_tasks(session, User(id=1), status="todo")
+        await asyncio.gather(*slow_queries._pending_captures)
+
+        plans = [query.plan for query in slow_queries.captured_plans]
+        assert plans and all("'<redacted>'" in plan for plan in plans)
+        assert not any("todo" in plan for plan in plans)
+
+    async def test_slow_select_is_logged_with_caller_and_plan(
+        self, file_engine: AsyncEngine, log_every_query, caplog
+    ):
+        """Test a slow SELECT names its service method and gets a plan."""
+        async with _sessionmaker(file_engine)() as session:
+            await TaskService.get_tasks(session, User(id=1), status="todo")
+        await asyncio.gather(*slow_queries._pending_captures)
+
+        [count, page] = slow_queries.captured_plans
+        assert count.service == page.service == "TaskService.get_tasks"
+        assert page.parameters == [1, "<str>", 20, 0]
+        assert "tasks" in page.plan
+        assert any(r.name == slow_queries.__name__ for r in caplog.records)
+
+
+class TestSlowQueriesEndpoint:
+    """Tests for the admin slow-query endpoint."""
+
+    async def test_requires_superuser(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ):
+        """Test regular users cannot read slow queries."""
+        response = await client.get("/api/v1/admin/slow-queries", headers=auth_headers)
+
+        assert response.status_code == 403
+
+    async def test_lists_captured_queries(
+        self,
+        client: AsyncClient,
+        superuser: User,
+        auth_headers: dict[str, str],
+        clear_captured_plans,
+    ):
+        """Test superusers get the captured queries, newest first."""
+        slow_queries.captured_plans.extend(
+            slow_queries.SlowQuery(
+                captured_at=datetime.now(timezone.utc),
+                duration_ms=duration,
+                statement="SELECT 1",
+                parameters=[],
+                service=None,
+                route="/api/v1/tasks",
+                request_id=None,
+                plan="SCAN",
+            )
+            for duration in (600.0, 900.0)
+        )
+
+        response = await client.get("/api/v1/admin/slow-queries", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [q["duration_ms"] for q in response.json()] == [900.0, 600.0]
@@ -0,0 +1,61 @@
+"""
+Tests for cold start cost.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Generous for slow CI machines; a regression to eager imports of the app,
+# drivers or crypto backends roughly doubles these
+IMPORT_DATABASE_BUDGET_SECONDS = 1.0
+CREATE_APP_BUDGET_SECONDS = 2.0
+
+HEAVY_MODULES = ("fastapi", "jose", "passlib", "asyncpg", "aiosqlite")
+
+
+def run_fresh(code: str) -> dict:
+    """Run code in a new interpreter; it must print a JSON object."""
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def loaded_after(statement: str) -> dict:
+    """Time a statement in a fresh interpreter and list heavy modules it loaded."""
+    return run_fresh(
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "import app.database, app.main\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy,\n"
+        "    'engine': 'engine' in vars(app.database),\n"
+        "    'app': 'app' in vars(app.main)}))\n"
+    )
+
+
+@pytest.mark.slow
+class TestColdStart:
+    """Tests keeping imports cheap."""
+
+    def test_database_import_is_light(self):
+        """Test Alembic and CLI tools load no web framework, driver or crypto."""
+        result = loaded_after("import app.database, app.models")
+
+        assert result["heavy"] == []
+        assert not result["engine"]
+        assert result["elapsed"] < IMPORT_DATABASE_BUDGET_SECONDS
+
+    def test_create_app_builds_no_engine(self):
+        """Test the app is built without a database engine or crypto backends."""
+        result = loaded_after("from app.main import create_app; create_app()")
+
+        assert result["heavy"] == ["fastapi"]
+        assert not result["engine"]
+        assert not result["app"]
+        assert result["elapsed"] < CREATE_APP_BUDGET_SECONDS
@@ -0,0 +1,49 @@
+"""
+Tests for prebuilt, parameterized hot queries.
+"""
+
+from httpx import AsyncClient
+
+from app.database import compiled_cache_lookups
+from app.schemas.task import DEFAULT_TASK_LIST_FIELDS
+from app.services.task import _list_statements
+
+
+class TestPrebuiltStatements:
+    """Tests for reusing statements across requests."""
+
+    def test_list_statements_are_built_once_per_shape(self):
+        """Test the same list shape returns the same statement objects."""
+        first = _list_statements(DEFAULT_TASK_LIST_FIELDS, True, False, True, False)
+        again = _list_statements(DEFAULT_TASK_LIST_FIELDS, True, False, True, False)
+        other = _list_statements(DEFAULT_TASK_LIST_FIELDS, False, False, True, False)
+
+        assert first[0] is again[0] and first[1] is again[1]
+        assert other[1] is not first[1]
+
+    async def test_repeated_requests_hit_compiled_cache(
+        self, client: AsyncClient, auth_headers: dict[str, str]
+    ):
+        """Test listing and fetching tasks again compiles nothing new."""
+        response = await client.post(
+            "/api/v1/tasks", json={"title": "Cached"}, headers=auth_headers
+        )
+        task_id = response.json()["id"]
+        paths = ["/api/v1/tasks?status=todo", f"/api/v1/tasks/{task_id}"]
+        for path in paths:
+            assert (await client.get(path, headers=auth_headers)).status_code == 200
+        misses = compiled_cache_lookups.value(result="miss")
+        hits = compiled_cache_lookups.value(result="hit")
+
+        for path in paths:
+            assert (await client.get(path, headers=auth_headers)).status_code == 200
+
+        assert compiled_cache_lookups.value(result="miss") == misses
+        assert compiled_cache_lookups.value(result="hit") > hits
+
+    async def test_compiled_cache_size_is_exported(self, client: AsyncClient):
+        """Test the compiled cache metrics are rendered on /metrics."""
+        response = await client.get("/metrics")
+
+        assert "taskflow_sql_compiled_cache_size" in response.text
+        assert "taskflow_sql_compiled_cache_total" in response.text
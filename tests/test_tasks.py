@@ -2,12 +2,20 @@
 Tests for task management endpoints.
 """
 
+import time
+from datetime import datetime, timedelta
+
 import pytest
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.task_change import TaskChange
 from app.models.user import User
+from app.services.archive import ArchiveService
+from app.services.sync import SyncService
+from app.services.task import TaskService
 
 
 @pytest.fixture
@@ -161,6 +169,62 @@ class TestGetTasks:
         data = response.json()
         assert all(task["status"] == "todo" for task in data["tasks"])
 
+    @pytest.mark.asyncio
+    async def test_list_tasks_omits_description_by_default(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        test_task: Task,
+    ):
+        """Test list responses leave out the description unless requested."""
+        db_session.expunge_all()
+
+        response = await client.get("/api/v1/tasks", headers=auth_headers)
+
+        assert response.status_code == 200
+        task = response.json()["tasks"][0]
+        assert "description" not in task
+        assert task["title"] == test_task.title
+
+    @pytest.mark.asyncio
+    async def test_list_tasks_sparse_fields(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        test_task: Task,
+    ):
+        """Test selecting the fields returned for each task."""
+        db_session.expunge_all()
+
+        response = await client.get(
+            "/api/v1/tasks?fields=title,status,description", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["tasks"] == [
+            {
+                "title": test_task.title,
+                "description": test_task.description,
+                "status": "todo",
+                "id": test_task.id,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_list_tasks_unknown_field(
+        self, client: AsyncClient, auth_headers: dict
+    ):
+        """Test requesting an unknown field fails."""
+        response = await client.get(
+            "/api/v1/tasks?fields=title,hashed_password", headers=auth_headers
+        )
+
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     async def test_list_tasks_unauthorized(self, client: AsyncClient):
         """Test listing tasks without authentication fails."""
@@ -201,6 +265,26 @@ class TestGetTask:
         assert response.status_code == 403
 
 
+class TestCoreReadPath:
+    """Tests for reading tasks without ORM hydration."""
+
+    @pytest.mark.asyncio
+    async def test_core_reads_skip_identity_map(
+        self, db_session: AsyncSession, test_user: User, test_task: Task
+    ):
+        """Test Core reads return plain records and leave the session empty."""
+        db_session.expunge_all()
+
+        task = await TaskService.get_task(
+            db_session, test_task.id, test_user, core=True
+        )
+        tasks = await TaskService.get_tasks(db_session, test_user, core=True)
+
+        assert task["title"] == test_task.title
+        assert tasks.tasks[0].id == test_task.id
+        assert len(db_session.identity_map) == 0
+
+
 class TestUpdateTask:
     """Tests for updating tasks."""
 
@@ -292,3 +376,376 @@ class TestCompleteTask:
         )
 
         assert response.status_code == 404
+
+
+class TestWorkQueue:
+    """Tests for claiming tasks and managing leases."""
+
+    @pytest.mark.asyncio
+    async def test_claim_highest_priority_oldest_first(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        db_session: AsyncSession,
+        test_user: User,
+    ):
+        """Test claims follow priority, then age."""
+        now = datetime.utcnow()
+        db_session.add_all(
+            [
+                Task(
+                    title="Low",
+                    priority=TaskPriority.LOW.value,
+                    created_at=now - timedelta(hours=3),
+                    owner_id=test_user.id,
+                ),
+                Task(
+                    title="High newer",
+                    priority=TaskPriority.HIGH.value,
+                    created_at=now - timedelta(hours=1),
+                    owner_id=test_user.id,
+                ),
+                Task(
+                    title="High older",
+                    priority=TaskPriority.HIGH.value,
+                    created_at=now - timedelta(hours=2),
+                    owner_id=test_user.id,
+                ),
+            ]
+        )
+        await db_session.commit()
+
+        titles = []
+        for _ in range(3):
+            response = await client.post(
+                "/api/v1/tasks/claim",
+                json={"worker_id": "worker-1"},
+                headers=auth_headers,
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["status"] == "in_progress"
+            assert data["lease_owner"] == "worker-1"
+            assert data["lease_expires_at"] is not None
+            titles.append(data["title"])
+
+        assert titles == ["High older", "High newer", "Low"]
+
+    @pytest.mark.asyncio
+    async def test_claim_empty_queue(self, client: AsyncClient, auth_headers: dict):
+        """Test claiming from an empty queue returns no content."""
+        response = await client.post(
+            "/api/v1/tasks/claim",
+            json={"worker_id": "worker-1"},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 204
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_and_release(
+        self, client: AsyncClient, auth_headers: dict, test_task: Task
+    ):
+        """Test renewing and releasing a lease."""
+        claim = await client.post(
+            "/api/v1/tasks/claim",
+            json={"worker_id": "worker-1", "lease_seconds": 10},
+            headers=auth_headers,
+        )
+        assert claim.status_code == 200
+
+        heartbeat = await client.post(
+            f"/api/v1/tasks/{test_task.id}/lease/heartbeat",
+            json={"worker_id": "worker-1", "lease_seconds": 60},
+            headers=auth_headers,
+        )
+        assert heartbeat.status_code == 200
+        assert heartbeat.json()["lease_expires_at"] > claim.json()["lease_expires_at"]
+
+        stolen = await client.post(
+            f"/api/v1/tasks/{test_task.id}/lease/release",
+            json={"worker_id": "worker-2"},
+            headers=auth_headers,
+        )
+        assert stolen.status_code == 409
+
+        release = await client.post(
+            f"/api/v1/tasks/{test_task.id}/lease/release",
+            json={"worker_id": "worker-1"},
+            headers=auth_headers,
+        )
+        assert release.status_code == 200
+        assert release.json()["status"] == "todo"
+        assert release.json()["lease_owner"] is None
+
+    @pytest.mark.asyncio
+    async def test_expired_leases_are_reaped(
+        self, db_session: AsyncSession, test_user: User, test_task: Task
+    ):
+        """Test expired leases return their tasks to the queue."""
+        test_task.status = TaskStatus.IN_PROGRESS.value
+        test_task.lease_owner = "worker-1"
+        test_task.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await db_session.commit()
+
+        released = await TaskService.release_expired_leases(db_session)
+        await db_session.refresh(test_task)
+
+        assert released == 1
+        assert test_task.status == TaskStatus.TODO.value
+        assert test_task.lease_owner is None
+
+
+class TestDeltaSync:
+    """Tests for the delta sync endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_requires_reset(
+        self, client: AsyncClient, auth_headers: dict
+    ):
+        """Test syncing without a token asks for a full download."""
+        response = await client.get("/api/v1/tasks/changes", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reset"] is True
+        assert data["next_token"]
+
+    @pytest.mark.asyncio
+    async def test_changes_since_token(self, client: AsyncClient, auth_headers: dict):
+        """Test only tasks changed after the token are returned."""
+        untouched = await client.post(
+            "/api/v1/tasks", json={"title": "Untouched"}, headers=auth_headers
+        )
+        doomed = await client.post(
+            "/api/v1/tasks", json={"title": "Doomed"}, headers=auth_headers
+        )
+        sync = await client.get("/api/v1/tasks/changes", headers=auth_headers)
+        token = sync.json()["next_token"]
+
+        created = await client.post(
+            "/api/v1/tasks", json={"title": "Created"}, headers=auth_headers
+        )
+        await client.put(
+            f"/api/v1/tasks/{created.json()['id']}",
+            json={"title": "Created and renamed"},
+            headers=auth_headers,
+        )
+        await client.delete(
+            f"/api/v1/tasks/{doomed.json()['id']}", headers=auth_headers
+        )
+
+        response = await client.get(
+            f"/api/v1/tasks/changes?since={token}", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reset"] is False
+        assert [task["title"] for task in data["tasks"]] == ["Created and renamed"]
+        assert data["deleted"] == [doomed.json()["id"]]
+        assert untouched.json()["id"] not in [task["id"] for task in data["tasks"]]
+
+        again = await client.get(
+            f"/api/v1/tasks/changes?since={data['next_token']}", headers=auth_headers
+        )
+        assert again.json()["tasks"] == []
+        assert again.json()["deleted"] == []
+
+    @pytest.mark.asyncio
+    async def test_invalid_token(self, client: AsyncClient, auth_headers: dict):
+        """Test a malformed sync token is rejected."""
+        response = await client.get(
+            "/api/v1/tasks/changes?since=garbage", headers=auth_headers
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_token_from_before_transaction_order_resets(
+        self, client: AsyncClient, auth_headers: dict
+    ):
+        """Test tokens without exactly three parts ask for a full download."""
+        for since in (f"5.{int(time.time())}", "7", f"1.2.3.{int(time.time())}"):
+            response = await client.get(
+                f"/api/v1/tasks/changes?since={since}", headers=auth_headers
+            )
+
+            assert response.status_code == 200
+            assert response.json()["reset"] is True
+
+    @pytest.mark.asyncio
+    async def test_changes_committed_out_of_order_are_not_skipped(
+        self, migrated_postgres_engine: AsyncEngine
+    ):
+        """Test an entry committing after a later-numbered one is still synced."""
+        sessions = async_sessionmaker(migrated_postgres_engine, expire_on_commit=False)
+        async with sessions() as db:
+            user = User(email="o@example.com", username="o", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            tasks = [Task(title=title, owner_id=user.id) for title in ("a", "b")]
+            db.add_all(tasks)
+            await db.commit()
+            token = (await SyncService.get_changes(db, user, None, 10)).next_token
+            await db.commit()
+
+        async with sessions() as slow, sessions() as fast, sessions() as reader:
+            # The slow writer takes the lower change ID but commits last
+            SyncService.record_change(slow, tasks[0].id, user.id)
+            await slow.flush()
+            SyncService.record_change(fast, tasks[1].id, user.id)
+            await fast.commit()
+
+            early = await SyncService.get_changes(reader, user, token, 10)
+            await reader.commit()
+            await slow.commit()
+            late = await SyncService.get_changes(reader, user, early.next_token, 10)
+
+        assert early.tasks == []
+        assert sorted(task.id for task in late.tasks) == [task.id for task in tasks]
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_latest_entries(
+        self, db_session: AsyncSession, test_user: User
+    ):
+        """Test compaction drops superseded entries and expired tombstones."""
+        old = datetime.utcnow() - timedelta(days=365)
+        db_session.add_all(
+            [
+                TaskChange(task_id=1, owner_id=test_user.id),
+                TaskChange(task_id=1, owner_id=test_user.id),
+                TaskChange(task_id=2, owner_id=test_user.id),
+                TaskChange(
+                    task_id=3, owner_id=test_user.id, deleted=True, changed_at=old
+                ),
+            ]
+        )
+        await db_session.commit()
+
+        removed = await SyncService.compact_changes(db_session)
+        remaining = await db_session.execute(
+            select(TaskChange.task_id, func.count()).group_by(TaskChange.task_id)
+        )
+
+        assert removed == 2
+        assert dict(remaining.all()) == {1: 1, 2: 1}
+
+
+class TestArchive:
+    """Tests for archiving finished tasks."""
+
+    @pytest.fixture
+    async def archived_task(self, db_session: AsyncSession, test_user: User) -> int:
+        """Create a long-finished task and archive it."""
+        long_ago = datetime.utcnow() - timedelta(days=90)
+        task = Task(
+            title="Old Task",
+            description="Done long ago",
+            status=TaskStatus.COMPLETED.value,
+            is_completed=True,
+            completed_at=long_ago,
+            created_at=long_ago,
+            updated_at=long_ago,
+            owner_id=test_user.id,
+        )
+        db_session.add(task)
+        await db_session.commit()
+        task_id = task.id
+
+        archived = await ArchiveService.archive_tasks(db_session, older_than_days=30)
+        assert archived == 1
+        return task_id
+
+    @pytest.mark.asyncio
+    async def test_only_long_finished_tasks_are_archived(
+        self, db_session: AsyncSession, test_task: Task, archived_task: int
+    ):
+        """Test open and recently finished tasks stay in the hot table."""
+        remaining = await db_session.execute(select(Task.id))
+
+        assert remaining.scalars().all() == [test_task.id]
+
+    @pytest.mark.asyncio
+    async def test_archiving_records_tombstones(
+        self, client: AsyncClient, auth_headers: dict, archived_task: int
+    ):
+        """Test delta sync reports archived tasks as deleted."""
+        response = await client.get(
+            f"/api/v1/tasks/changes?since=0.0.{int(time.time())}",
+            headers=auth_headers,
+        )
+
+        data = response.json()
+        assert data["tasks"] == []
+        assert data["deleted"] == [archived_task]
+
+    @pytest.mark.asyncio
+    async def test_archiving_syncs_on_migrated_postgres(
+        self, migrated_postgres_engine: AsyncEngine
+    ):
+        """Test archive tombstones get their transaction without a column default."""
+        long_ago = datetime.utcnow() - timedelta(days=90)
+        sessions = async_sessionmaker(migrated_postgres_engine, expire_on_commit=False)
+        async with sessions() as db:
+            user = User(email="a@example.com", username="a", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            token = (await SyncService.get_changes(db, user, None, 10)).next_token
+            await db.commit()
+            task = Task(
+                title="Old",
+                status=TaskStatus.COMPLETED.value,
+                updated_at=long_ago,
+                owner_id=user.id,
+            )
+            db.add(task)
+            await db.commit()
+
+            await ArchiveService.archive_tasks(db, older_than_days=30)
+            changes = await SyncService.get_changes(db, user, token, 10)
+            xids = (await db.execute(select(TaskChange.xid))).scalars().all()
+
+        assert changes.deleted == [task.id]
+        assert xids and None not in xids
+
+    @pytest.mark.asyncio
+    async def test_get_archived_task(
+        self, client: AsyncClient, auth_headers: dict, archived_task: int
+    ):
+        """Test archived tasks are only found when asked for."""
+        hot = await client.get(f"/api/v1/tasks/{archived_task}", headers=auth_headers)
+        assert hot.status_code == 404
+
+        response = await client.get(
+            f"/api/v1/tasks/{archived_task}?include_archived=true",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["title"] == "Old Task"
+        assert data["status"] == "completed"
+        assert data["lease_owner"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_with_archived_tasks(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        test_task: Task,
+        archived_task: int,
+    ):
+        """Test listing merges hot and archived tasks, newest first."""
+        hot = await client.get("/api/v1/tasks", headers=auth_headers)
+        assert hot.json()["total"] == 1
+
+        response = await client.get(
+            "/api/v1/tasks?include_archived=true&fields=title", headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert data["tasks"] == [
+            {"id": test_task.id, "title": test_task.title},
+            {"id": archived_task, "title": "Old Task"},
+        ]
@@ -0,0 +1,191 @@
+"""
+Tests for request tracing.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.user import User
+from app.utils import tracing
+from app.utils.tracing import FileSpanExporter, InMemorySpanExporter, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(autouse=True)
+def kept_traces(monkeypatch: pytest.MonkeyPatch) -> InMemorySpanExporter:
+    """Keep traces in memory and sample none unless the caller asks."""
+    exporter = InMemorySpanExporter(10)
+    monkeypatch.setattr(tracing.tracer, "exporter", exporter)
+    monkeypatch.setattr(tracing.tracer, "sample_rate", 0.0)
+    monkeypatch.setattr(tracing.tracer, "parent_sampled_per_second", None)
+    return exporter
+
+
+def traceparent(sampled: bool) -> dict[str, str]:
+    return {"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-{'01' if sampled else '00'}"}
+
+
+class TestTraceparent:
+    """Tests for parsing W3C traceparent headers."""
+
+    def test_valid_header(self):
+        """Test the trace ID, parent span and sampled flag are read."""
+        context = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")
+
+        assert context.trace_id == TRACE_ID
+        assert context.parent_id == PARENT_ID
+        assert context.sampled
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "",
+            f"00-{TRACE_ID}-{PARENT_ID}",
+            f"ff-{TRACE_ID}-{PARENT_ID}-01",
+            f"00-{'0' * 32}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{'0' * 16}-01",
+            f"00-{TRACE_ID.upper()}-{PARENT_ID}-01",
+            f"00-{TRACE_ID}-{PARENT_ID}-01-extra",
+        ],
+    )
+    def test_invalid_headers_are_ignored(self, value: str):
+        """Test malformed headers start a new trace instead."""
+        assert parse_traceparent(value) is None
+
+    def test_future_versions_may_add_fields(self):
+        """Test fields after the flags are allowed in later versions."""
+        assert parse_traceparent(f"01-{TRACE_ID}-{PARENT_ID}-00-extra") is not None
+
+
+class TestRequestTracing:
+    """Tests for the spans recorded while serving requests."""
+
+    async def test_sampled_caller_trace_is_continued(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        kept_traces: InMemorySpanExporter,
+    ):
+        """Test auth, service, SQL and serialization spans nest under the request."""
+        response = await client.get(
+            "/api/v1/tasks", headers={**auth_headers, **traceparent(True)}
+        )
+
+        assert response.status_code == 200
+        spans = {span.name: span for span in kept_traces.get(TRACE_ID)}
+        root = spans["GET /api/v1/tasks"]
+        assert root.parent_id == PARENT_ID
+        assert root.attributes["http.route"] == "/api/v1/tasks"
+        assert root.attributes["http.status_code"] == 200
+        assert spans["get_current_user"].parent_id == root.span_id
+        service = spans["TaskService.get_tasks"]
+        assert service.parent_id == root.span_id
+        selects = [
+            span
+            for span in kept_traces.get(TRACE_ID)
+            if span.name == "SELECT" and span.parent_id == service.span_id
+        ]
+        assert selects
+        assert "FROM tasks" in selects[0].attributes["db.statement"]
+        assert spans["serialize"].parent_id == root.span_id
+
+    async def test_unsampled_requests_record_nothing(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        kept_traces: InMemorySpanExporter,
+    ):
+        """Test a caller's decision not to sample is followed."""
+        kept_traces.clear()
+        tracing.tracer.sample_rate = 1.0
+
+        await client.get(
+            "/api/v1/tasks", headers={**auth_headers, **traceparent(False)}
+        )
+
+        assert kept_traces.list() == []
+
+    async def test_caller_sampled_traces_are_capped(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        kept_traces: InMemorySpanExporter,
+    ):
+        """Test callers cannot get every request traced."""
+        kept_traces.clear()
+        tracing.tracer.parent_sampled_per_second = 0.001
+        tracing.tracer._parent_tokens = float("inf")
+
+        for _ in range(3):
+            await client.get(
+                "/api/v1/tasks", headers={**auth_headers, **traceparent(True)}
+            )
+
+        roots = [
+            span for span in kept_traces.get(TRACE_ID) if span.parent_id == PARENT_ID
+        ]
+        assert len(roots) == 1
+
+    async def test_errors_are_recorded(
+        self,
+        client: AsyncClient,
+        auth_headers: dict[str, str],
+        kept_traces: InMemorySpanExporter,
+    ):
+        """Test a span ended by an exception records its type."""
+        response = await client.get(
+            "/api/v1/tasks/999", headers={**auth_headers, **traceparent(True)}
+        )
+
+        assert response.status_code == 404
+        spans = {span.name: span for span in kept_traces.get(TRACE_ID)}
+        assert spans["TaskService.get_task"].error == "NotFoundException"
+
+    async def test_admin_api_lists_traces(
+        self,
+        client: AsyncClient,
+        superuser: User,
+        auth_headers: dict[str, str],
+    ):
+        """Test kept traces can be listed and fetched by superusers."""
+        await client.get("/api/v1/tasks", headers={**auth_headers, **traceparent(True)})
+
+        listed = await client.get("/api/v1/admin/traces", headers=auth_headers)
+        trace = await client.get(
+            f"/api/v1/admin/traces/{TRACE_ID}", headers=auth_headers
+        )
+        missing = await client.get(
+            f"/api/v1/admin/traces/{'1' * 32}", headers=auth_headers
+        )
+
+        [summary] = listed.json()
+        assert summary["trace_id"] == TRACE_ID
+        assert summary["name"] == "GET /api/v1/tasks"
+        assert summary["spans"] == len(trace.json())
+        assert trace.json()[0]["name"] == "GET /api/v1/tasks"
+        assert missing.status_code == 404
+
+
+class TestFileSpanExporter:
+    """Tests for writing traces to a file."""
+
+    def test_spans_are_written_as_json_lines(self, tmp_path: Path):
+        """Test each span is one JSON object, written by the time of shutdown."""
+        exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"))
+        tracer = tracing.Tracer(exporter, sample_rate=1.0)
+
+        with tracer.trace("job") as root:
+            with tracing.span("step", items=3):
+                pass
+        exporter.shutdown()
+
+        lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+        step, job = [json.loads(line) for line in lines]
+        assert job["span_id"] == root.span_id
+        assert step["parent_id"] == root.span_id
+        assert step["attributes"] == {"items": 3}
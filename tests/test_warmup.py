@@ -0,0 +1,78 @@
+"""
+Tests for startup warm-up and readiness.
+"""
+
+from pathlib import Path
+from typing import AsyncGenerator
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.database import Base
+from app.main import app, warm_up_then_ready
+from app.services import warmup
+
+
+@pytest.fixture
+async def pooled_engine(tmp_path: Path) -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/warmup.db",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=5,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def not_ready() -> None:
+    """Start a test with the app reporting not ready, and restore it after."""
+    app.state.ready = False
+    yield
+    del app.state.ready
+
+
+class TestWarmUp:
+    """Tests for warming up the pool, statements and serializers."""
+
+    @pytest.mark.asyncio
+    async def test_pool_keeps_warmed_connections(self, pooled_engine: AsyncEngine):
+        """Test the warmed connections stay in the pool for the first requests."""
+        await warmup.warm_up_engine(pooled_engine, 3)
+
+        assert pooled_engine.pool.checkedin() == 3
+        assert pooled_engine.pool.checkedout() == 0
+
+    @pytest.mark.asyncio
+    async def test_failure_still_reports_ready(
+        self, not_ready: None, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test an unreachable database delays nothing beyond the warm-up."""
+
+        async def unreachable(bind, connections):
+            raise ConnectionRefusedError
+
+        monkeypatch.setattr(warmup, "warm_up_engine", unreachable)
+
+        await warm_up_then_ready(app)
+
+        assert app.state.ready is True
+
+
+class TestReadiness:
+    """Tests for the readiness probe."""
+
+    @pytest.mark.asyncio
+    async def test_ready_after_warm_up(self, client: AsyncClient, not_ready: None):
+        """Test /ready answers 503 until warm-up has finished."""
+        before = await client.get("/ready")
+        app.state.ready = True
+        after = await client.get("/ready")
+
+        assert before.status_code == 503
+        assert after.status_code == 200
+        assert after.json() == {"status": "ready"}